@@ -15,6 +15,10 @@ python manage.py collectstatic --no-input
 echo "🗄️ Ejecutando migraciones..."
 python manage.py migrate
 
+echo "🤖 Generando índice de recomendaciones..."
+python manage.py build_recommendations
+python manage.py build_copurchases
+
 echo "👤 Creando superusuario..."
 python create_superuser.py
 
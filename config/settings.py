@@ -55,6 +55,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     
     # Terceros
     'corsheaders',
@@ -67,6 +68,7 @@ INSTALLED_APPS = [
     'orders',
     'payments',
     'reviews',
+    'jobs',
 ]
 
 # ==============================================================================
@@ -127,6 +129,14 @@ DATABASES = {
     )
 }
 
+# SQLite (desarrollo): con transacciones IMMEDIATE los checkouts concurrentes
+# esperan el lock de escritura en vez de fallar con "database is locked"
+# La base de pruebas va en un archivo: la de memoria compartida no espera el
+# lock y la prueba de checkouts en paralelo (orders/tests.py) fallaría
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    DATABASES['default'].setdefault('OPTIONS', {})['transaction_mode'] = 'IMMEDIATE'
+    DATABASES['default'].setdefault('TEST', {}).setdefault('NAME', str(BASE_DIR / 'test_db.sqlite3'))
+
 # ==============================================================================
 # VALIDACIÓN DE CONTRASEÑAS
 # ==============================================================================
@@ -207,6 +217,12 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 10,
 }
 
+# Listados de lectura armados desde values() (utils/fast_serializers.py)
+FAST_SERIALIZERS = config('FAST_SERIALIZERS', default=True, cast=bool)
+
+# Tope de filas de ?no_paginate=true en listados públicos (se exporta en streaming)
+EXPORT_MAX_ROWS = config('EXPORT_MAX_ROWS', default=10000, cast=int)
+
 # ==============================================================================
 # SIMPLE JWT
 # ==============================================================================
@@ -219,6 +235,61 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# ==============================================================================
+# CACHÉ
+# ==============================================================================
+
+# locmem por defecto (un caché por proceso). Con varios workers conviene uno
+# compartido para que la invalidación llegue a todos:
+#   CACHE_URL=redis://localhost:6379/1   (requiere el paquete redis)
+#   CACHE_URL=file:///var/tmp/django_cache
+CACHE_URL = config('CACHE_URL', default='locmem://')
+
+if CACHE_URL.startswith(('redis://', 'rediss://')):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache', 'LOCATION': CACHE_URL}}
+elif CACHE_URL.startswith('file://'):
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': CACHE_URL[len('file://'):]}}
+else:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tienda'}}
+
+# Respuestas renderizadas del catálogo público (utils/response_cache.py)
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Estadísticas de admin (utils/stats_cache.py): se recalculan como mucho cada
+# STATS_CACHE_TTL segundos; hasta STATS_CACHE_STALE_TTL más se sirven viejas mientras se recalculan
+STATS_CACHE_ALIAS = 'default'
+STATS_CACHE_TTL = config('STATS_CACHE_TTL', default=15, cast=int)
+STATS_CACHE_STALE_TTL = config('STATS_CACHE_STALE_TTL', default=120, cast=int)
+
+# ==============================================================================
+# TRABAJOS EN SEGUNDO PLANO
+# ==============================================================================
+
+# 'database': los trabajos pesados los ejecuta `python manage.py run_worker`
+# 'immediate': se ejecutan en el mismo proceso (cómodo en desarrollo)
+JOBS_BACKEND = config('JOBS_BACKEND', default='immediate' if DEBUG else 'database')
+
+# ==============================================================================
+# RECOMENDACIONES
+# ==============================================================================
+
+# Índice precalculado de productos relacionados (python manage.py build_recommendations).
+# Se publica en la base; esta carpeta es la copia local de cada proceso
+RECOMMENDATIONS_DIR = config(
+    'RECOMMENDATIONS_DIR',
+    default=os.path.join(BASE_DIR, 'var', 'recommendations')
+)
+RECOMMENDATIONS_TOP_K = config('RECOMMENDATIONS_TOP_K', default=20, cast=int)
+
+# Reajuste completo cuando la proporción de tokens fuera de vocabulario en las
+# ediciones supera en este margen a la del último ajuste
+RECOMMENDATIONS_DRIFT_THRESHOLD = config('RECOMMENDATIONS_DRIFT_THRESHOLD', default=0.1, cast=float)
+
+# Peso de cada señal en el score final: similitud de contenido y "comprados juntos"
+RECOMMENDATIONS_CONTENT_WEIGHT = config('RECOMMENDATIONS_CONTENT_WEIGHT', default=0.7, cast=float)
+RECOMMENDATIONS_COPURCHASE_WEIGHT = config('RECOMMENDATIONS_COPURCHASE_WEIGHT', default=0.3, cast=float)
+
 # ==============================================================================
 # CONFIGURACIONES DE SEGURIDAD PARA PRODUCCIÓN
 # ==============================================================================
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+Reporte del costo de importación por app (tiempo de arranque de un worker)
+
+Cada medición corre en un proceso nuevo, como un worker de gunicorn recién
+levantado: primero django.setup() y luego la importación de las urls de cada
+app. Al final se muestran los módulos de terceros más pesados.
+
+Uso:
+    python import_report.py [--budget 1.0] [--top 10]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Se ejecuta en un proceso limpio; imprime los tiempos como JSON
+MEASURE_SNIPPET = """
+import json, os, sys, time
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+start = time.perf_counter()
+import django
+django.setup()
+setup = time.perf_counter() - start
+start = time.perf_counter()
+if sys.argv[1]:
+    __import__(sys.argv[1])
+print(json.dumps({'setup': setup, 'module': time.perf_counter() - start}))
+"""
+
+
+def local_apps():
+    """
+    Apps propias del proyecto (las de INSTALLED_APPS con carpeta en el repo)
+    """
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    from django.conf import settings
+
+    return [app for app in settings.INSTALLED_APPS if os.path.isdir(os.path.join(BASE_DIR, app))]
+
+
+def measure(module, importtime=False):
+    """
+    Importa el módulo en un proceso nuevo y devuelve (tiempos, salida de -X importtime)
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', MEASURE_SNIPPET, module]
+    result = subprocess.run(command, cwd=BASE_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1]), result.stderr
+
+
+def heaviest_imports(importtime_output, top):
+    """
+    Módulos de primer nivel con mayor tiempo acumulado según -X importtime
+    """
+    modules = []
+    for line in importtime_output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith(' ') or name.startswith('  '):
+            continue  # solo imports de primer nivel
+        modules.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(modules, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget', type=float, default=1.0, help='Segundos máximos para el arranque completo')
+    parser.add_argument('--top', type=int, default=10, help='Cantidad de módulos pesados a listar')
+    args = parser.parse_args()
+
+    print("⏱️  Costo de importación por app (proceso nuevo en cada medición)\n")
+
+    base, _ = measure('')
+    print(f"{'django.setup()':<34} {base['setup']:.3f}s")
+    for app in local_apps():
+        module = f'{app}.urls' if os.path.exists(os.path.join(BASE_DIR, app, 'urls.py')) else app
+        times, _ = measure(module)
+        print(f"{module:<34} {times['module']:.3f}s")
+
+    # Un worker resuelve todas las urls en su primer request
+    total, importtime_output = measure('config.urls', importtime=True)
+    startup = total['setup'] + total['module']
+    print(f"\n{'Arranque completo (setup + urls)':<34} {startup:.3f}s")
+
+    print("\n📦 Módulos más pesados:")
+    for seconds, name in heaviest_imports(importtime_output, args.top):
+        print(f"   {name:<40} {seconds:.3f}s")
+
+    if startup > args.budget:
+        print(f"\n❌ El arranque supera el presupuesto de {args.budget:.2f}s")
+        sys.exit(1)
+    print(f"\n✅ Dentro del presupuesto de {args.budget:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
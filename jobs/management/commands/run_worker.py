@@ -0,0 +1,40 @@
+# jobs/management/commands/run_worker.py
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from jobs.runner import purge_finished, requeue_stale, run_next
+
+
+class Command(BaseCommand):
+    help = 'Procesa los trabajos en segundo plano (recomendaciones, co-compras, ...). Ejecutar un solo worker.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesar lo pendiente y salir')
+        parser.add_argument('--sleep', type=float, default=2.0, help='Segundos de espera sin trabajos')
+        parser.add_argument('--keep-days', type=int, default=7, help='Días que se guardan los trabajos terminados')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+
+        requeue_stale()
+        purge_finished(timedelta(days=options['keep_days']))
+        self.stdout.write('👷 Worker iniciado')
+
+        while self.running:
+            job = run_next()
+            if job is not None:
+                self.stdout.write(f'{job.name} #{job.id}: {job.status}')
+                continue
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write('👋 Worker detenido')
+
+    def _stop(self, signum, frame):
+        self.running = False
@@ -0,0 +1,124 @@
+# jobs/runner.py
+"""
+Ejecución de trabajos pesados fuera de los workers web.
+
+Las tareas se registran con @task('nombre') en el tasks.py de cada app y se
+piden con enqueue('nombre', **payload). El backend se elige con JOBS_BACKEND:
+
+- 'database': se guarda un Job y lo ejecuta `python manage.py run_worker`.
+- 'immediate': se ejecuta en el momento, en el mismo proceso (desarrollo).
+"""
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Job
+
+_registry = {}
+
+
+def task(name):
+    """
+    Registra una función como tarea ejecutable por el worker
+    """
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+class ImmediateBackend:
+    def enqueue(self, name, payload):
+        _registry[name](**payload)
+
+
+class DatabaseBackend:
+    def enqueue(self, name, payload):
+        # Si ya hay un trabajo idéntico esperando, no se duplica
+        if Job.objects.filter(name=name, payload=payload, status='pending').exists():
+            return
+        Job.objects.create(name=name, payload=payload)
+
+
+BACKENDS = {
+    'immediate': ImmediateBackend,
+    'database': DatabaseBackend,
+}
+
+
+def get_backend():
+    return BACKENDS[settings.JOBS_BACKEND]()
+
+
+def enqueue(name, **payload):
+    """
+    Pide la ejecución de una tarea registrada
+
+    Args:
+        name: Nombre con el que se registró la tarea
+        **payload: Argumentos de la tarea (deben ser serializables a JSON)
+    """
+    if name not in _registry:
+        raise KeyError(f"Tarea no registrada: {name}")
+    get_backend().enqueue(name, payload)
+
+
+def run_next():
+    """
+    Toma el próximo trabajo pendiente y lo ejecuta
+
+    Returns:
+        El Job procesado, o None si no había trabajos pendientes
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        job = Job.objects.select_for_update(skip_locked=True).filter(
+            status='pending', run_after__lte=now
+        ).order_by('run_after', 'id').first()
+        if job is None:
+            return None
+
+        job.status = 'running'
+        job.started_at = now
+        job.attempts += 1
+        job.save(update_fields=['status', 'started_at', 'attempts'])
+
+    try:
+        _registry[job.name](**job.payload)
+    except Exception:
+        job.error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            # Reintento con espera exponencial
+            job.status = 'pending'
+            job.run_after = timezone.now() + timedelta(seconds=30 * 2 ** job.attempts)
+        else:
+            job.status = 'failed'
+    else:
+        job.status = 'done'
+        job.error = ''
+
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'run_after', 'finished_at'])
+    return job
+
+
+def requeue_stale(older_than=timedelta(hours=1)):
+    """
+    Devuelve a la cola los trabajos que quedaron 'running' por un worker caído
+    """
+    return Job.objects.filter(
+        status='running', started_at__lt=timezone.now() - older_than
+    ).update(status='pending')
+
+
+def purge_finished(older_than=timedelta(days=7)):
+    """
+    Elimina los trabajos terminados más antiguos que older_than
+    """
+    deleted, _ = Job.objects.filter(
+        status='done', finished_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
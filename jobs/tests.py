@@ -0,0 +1,114 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Job
+from .runner import enqueue, purge_finished, requeue_stale, run_next, task
+
+# Tareas de prueba: registran cada llamada
+_calls = []
+
+
+@task('pruebas.anotar')
+def anotar(valor):
+    _calls.append(valor)
+
+
+@task('pruebas.fallar')
+def fallar():
+    _calls.append('fallo')
+    raise RuntimeError('falla a propósito')
+
+
+class JobTestCase(TestCase):
+    def setUp(self):
+        _calls.clear()
+
+    def vencer(self, job):
+        # Saltar la espera del reintento
+        Job.objects.filter(pk=job.pk).update(run_after=timezone.now() - timedelta(seconds=1))
+
+
+@override_settings(JOBS_BACKEND='immediate')
+class ImmediateBackendTests(JobTestCase):
+    def test_se_ejecuta_en_el_momento(self):
+        enqueue('pruebas.anotar', valor=1)
+        self.assertEqual(_calls, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_tarea_no_registrada(self):
+        with self.assertRaises(KeyError):
+            enqueue('pruebas.no_existe')
+
+
+@override_settings(JOBS_BACKEND='database')
+class DatabaseBackendTests(JobTestCase):
+    def test_encola_sin_ejecutar_ni_duplicar(self):
+        enqueue('pruebas.anotar', valor=1)
+        enqueue('pruebas.anotar', valor=1)
+        enqueue('pruebas.anotar', valor=2)
+        self.assertEqual(_calls, [])
+        self.assertEqual(
+            sorted(Job.objects.values_list('payload__valor', 'status')),
+            [(1, 'pending'), (2, 'pending')],
+        )
+
+    def test_run_next_toma_con_skip_locked(self):
+        enqueue('pruebas.anotar', valor=1)
+        select_for_update = Job.objects.select_for_update
+        with mock.patch.object(Job.objects, 'select_for_update', wraps=select_for_update) as claim:
+            job = run_next()
+        # Varios workers no toman el mismo trabajo ni se esperan entre sí
+        claim.assert_called_once_with(skip_locked=True)
+        self.assertEqual((job.status, job.attempts, job.error), ('done', 1, ''))
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+        self.assertEqual(_calls, [1])
+        self.assertIsNone(run_next())
+
+    def test_orden_y_run_after(self):
+        enqueue('pruebas.anotar', valor='despues')
+        Job.objects.update(run_after=timezone.now() + timedelta(hours=1))
+        enqueue('pruebas.anotar', valor='primero')
+        enqueue('pruebas.anotar', valor='segundo')
+
+        while run_next() is not None:
+            pass
+        self.assertEqual(_calls, ['primero', 'segundo'])
+
+    def test_reintenta_hasta_el_limite_y_marca_fallido(self):
+        enqueue('pruebas.fallar')
+
+        for attempt in (1, 2):
+            job = run_next()
+            self.assertEqual((job.status, job.attempts), ('pending', attempt))
+            self.assertIn('RuntimeError: falla a propósito', job.error)
+            # Espera exponencial: no se reintenta enseguida
+            self.assertGreater(job.run_after, timezone.now())
+            self.assertIsNone(run_next())
+            self.vencer(job)
+
+        job = run_next()
+        self.assertEqual((job.status, job.attempts), ('failed', job.max_attempts))
+        self.assertIn('RuntimeError', job.error)
+        self.assertEqual(_calls, ['fallo'] * 3)
+        self.assertIsNone(run_next())
+
+    def test_recupera_trabajos_de_un_worker_caido(self):
+        enqueue('pruebas.anotar', valor=1)
+        Job.objects.update(status='running', started_at=timezone.now() - timedelta(hours=2))
+        self.assertIsNone(run_next())
+
+        self.assertEqual(requeue_stale(), 1)
+        self.assertEqual(run_next().status, 'done')
+
+    def test_purga_solo_terminados_viejos(self):
+        viejo = timezone.now() - timedelta(days=30)
+        Job.objects.create(name='pruebas.anotar', status='done', finished_at=viejo)
+        Job.objects.create(name='pruebas.anotar', status='failed', finished_at=viejo)
+        Job.objects.create(name='pruebas.anotar', status='done', finished_at=timezone.now())
+
+        self.assertEqual(purge_finished(), 1)
+        self.assertEqual(sorted(Job.objects.values_list('status', flat=True)), ['done', 'failed'])
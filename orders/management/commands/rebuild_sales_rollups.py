@@ -0,0 +1,12 @@
+# orders/management/commands/rebuild_sales_rollups.py
+from django.core.management.base import BaseCommand
+
+from orders.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recalcula desde cero los resúmenes de ventas del dashboard (por hora y por producto y día)'
+
+    def handle(self, *args, **options):
+        total = rebuild()
+        self.stdout.write(self.style.SUCCESS(f'✅ Resúmenes de ventas recalculados ({total} horas con órdenes)'))
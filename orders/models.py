@@ -18,6 +18,19 @@ class Order(models.Model):
     total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0.00)
     shipping_address = models.TextField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Listado de admin y paginación por cursor (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+            # "Mis órdenes"
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+            # Filtro por estado y conteos por estado en un rango de fechas
+            models.Index(fields=['status', 'created_at'], name='order_status_created_idx'),
+            # Ventas: índice parcial solo con las órdenes pagadas
+            models.Index(fields=['created_at'], name='order_paid_created_idx', condition=models.Q(is_paid=True)),
+        ]
     
     def __str__(self):
         return f"Order #{self.id} - {self.user.username}"
@@ -29,4 +42,36 @@ class OrderItem(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     
     def __str__(self):
-        return f"{self.quantity} x {self.product.name}"
\ No newline at end of file
+        return f"{self.quantity} x {self.product.name}"
+
+# Resúmenes de ventas para el dashboard (se mantienen en orders/rollups.py)
+class SalesRollup(models.Model):
+    hour = models.DateTimeField()  # Inicio de la hora (UTC)
+    status = models.CharField(max_length=20, choices=Order.STATUS_CHOICES)
+    is_paid = models.BooleanField()
+    orders = models.IntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    units = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'status', 'is_paid'], name='sales_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.hour:%Y-%m-%d %H:00} {self.status} - {self.orders} órdenes"
+
+
+class ProductSalesRollup(models.Model):
+    day = models.DateField()  # Día en la zona horaria del sitio
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    units = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'product'], name='product_sales_rollup_unique'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.product_id} - {self.units} unidades"
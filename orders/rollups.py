@@ -0,0 +1,326 @@
+# orders/rollups.py
+"""
+Resúmenes de ventas para el dashboard.
+
+SalesRollup guarda una fila por (hora, estado, pagada) con cantidad de
+órdenes, monto y unidades; ProductSalesRollup una fila por (día local,
+producto) con unidades e ingresos. Se actualizan de forma incremental desde
+las señales de Order y OrderItem (orders/signals.py), dentro de la misma
+transacción que el cambio, con UPDATE ... SET x = x + delta.
+
+Las horas se guardan en UTC y los días se arman sumando horas, lo que vale
+para zonas con desfase de horas enteras como America/La_Paz.
+
+sales_series() arma series por hora/día/semana/mes para cualquier rango con
+una sola consulta agrupada sobre SalesRollup.
+
+Si se cargan datos sin señales (fixtures, SQL a mano) se recalculan con:
+python manage.py rebuild_sales_rollups
+"""
+from collections import defaultdict, namedtuple
+from datetime import datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.apps import apps as global_apps
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, DecimalField, F, IntegerField, Q, Sum, Value, When
+from django.db.models.functions import TruncDate, TruncDay, TruncHour, TruncMonth, TruncWeek
+from django.utils import timezone
+
+OrderState = namedtuple('OrderState', 'created_at status is_paid total_price')
+ItemState = namedtuple('ItemState', 'product_id quantity price')
+
+
+def hour_bucket(value):
+    return value.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def local_day(value):
+    return timezone.localdate(value, timezone.get_default_timezone())
+
+
+def order_state(order):
+    return OrderState(order.created_at, order.status, order.is_paid, Decimal(order.total_price))
+
+
+def item_state(item):
+    return ItemState(item.product_id, item.quantity, Decimal(item.price))
+
+
+def _sales_key(state):
+    return {'hour': hour_bucket(state.created_at), 'status': state.status, 'is_paid': state.is_paid}
+
+
+def _bump(model, key, **deltas):
+    """
+    Suma deltas a la fila de key; la crea si no existe
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    changes = {field: F(field) + delta for field, delta in deltas.items()}
+    if model.objects.filter(**key).update(**changes):
+        return
+    # Restar sin fila: ya se borró en cascada (ej. se eliminó el producto)
+    if not any(delta > 0 for delta in deltas.values()):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # Otra transacción creó la fila al mismo tiempo
+        model.objects.filter(**key).update(**changes)
+
+
+def record_order_change(order_id, old, new):
+    """
+    Mueve una orden entre resúmenes
+
+    Args:
+        order_id: Id de la orden
+        old: OrderState antes del cambio (None si se creó)
+        new: OrderState después del cambio (None si se eliminó)
+    """
+    from .models import OrderItem, SalesRollup
+
+    if old is not None and new is not None and _sales_key(old) == _sales_key(new):
+        _bump(SalesRollup, _sales_key(new), amount=new.total_price - old.total_price)
+        return
+
+    # Cambió de hora, estado o pago: sus unidades se mueven con la orden. Al
+    # crearla todavía no tiene ítems y al eliminarla ya se restaron (se borran antes)
+    per_product = {}
+    if old is not None and new is not None:
+        per_product = _per_product(
+            ItemState(*values) for values in OrderItem.objects.filter(order_id=order_id).values_list('product_id', 'quantity', 'price')
+        )
+    units = sum(totals[0] for totals in per_product.values())
+    if old is not None:
+        _bump(SalesRollup, _sales_key(old), orders=-1, amount=-old.total_price, units=-units)
+    if new is not None:
+        _bump(SalesRollup, _sales_key(new), orders=1, amount=new.total_price, units=units)
+
+    # Cambió de día (se editó created_at): las ventas por producto también se mueven
+    if per_product and local_day(old.created_at) != local_day(new.created_at):
+        _bump_products(local_day(old.created_at), per_product, sign=-1)
+        _bump_products(local_day(new.created_at), per_product, sign=1)
+
+
+def _per_product(items):
+    per_product = defaultdict(lambda: [0, Decimal('0')])
+    for item in items:
+        totals = per_product[item.product_id]
+        totals[0] += item.quantity
+        totals[1] += item.quantity * Decimal(item.price)
+    return per_product
+
+
+def record_items(order, items, sign=1):
+    """
+    Suma (sign=1) o resta (sign=-1) ítems de una orden a los resúmenes
+
+    Args:
+        order: Orden de los ítems
+        items: ItemState (u objetos con product_id, quantity y price)
+    """
+    from .models import SalesRollup
+
+    per_product = _per_product(items)
+    if not per_product:
+        return
+
+    units = sum(totals[0] for totals in per_product.values())
+    _bump(SalesRollup, _sales_key(order_state(order)), units=sign * units)
+    _bump_products(local_day(order.created_at), per_product, sign)
+
+
+def _bump_products(day, per_product, sign):
+    """
+    Suma (sign=1) o resta (sign=-1) {producto: [unidades, ingresos]} a las filas del día
+
+    Una fila por producto del día, en un número fijo de consultas (carritos grandes).
+    """
+    from .models import ProductSalesRollup
+
+    rows = ProductSalesRollup.objects.filter(day=day, product_id__in=list(per_product))
+    # Bloqueo en orden de producto: evita deadlocks entre checkouts
+    existing = list(rows.select_for_update().order_by('product_id').values_list('product_id', flat=True))
+    if existing:
+        rows.filter(product_id__in=existing).update(
+            units=F('units') + Case(
+                *[When(product_id=product_id, then=Value(sign * per_product[product_id][0])) for product_id in existing],
+                output_field=IntegerField(),
+            ),
+            revenue=F('revenue') + Case(
+                *[When(product_id=product_id, then=Value(sign * per_product[product_id][1])) for product_id in existing],
+                output_field=DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+
+    # Restar sin fila: ya se borró en cascada (ej. se eliminó el producto)
+    missing = sorted(set(per_product) - set(existing))
+    if sign < 0 or not missing:
+        return
+    try:
+        with transaction.atomic():
+            ProductSalesRollup.objects.bulk_create([
+                ProductSalesRollup(day=day, product_id=product_id, units=per_product[product_id][0], revenue=per_product[product_id][1])
+                for product_id in missing
+            ])
+    except IntegrityError:
+        # Otra transacción creó alguna fila al mismo tiempo: de a una
+        for product_id in missing:
+            units, revenue = per_product[product_id]
+            _bump(ProductSalesRollup, {'day': day, 'product_id': product_id}, units=units, revenue=revenue)
+
+
+# Series de ventas (analítica de admin)
+GRANULARITIES = {'hour': TruncHour, 'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+MAX_BUCKETS = 2000
+
+
+def _floor(value, granularity):
+    # value: datetime local sin zona
+    if granularity == 'hour':
+        return value.replace(minute=0, second=0, microsecond=0)
+    value = value.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == 'week':
+        return value - timedelta(days=value.weekday())  # Lunes, igual que TruncWeek
+    if granularity == 'month':
+        return value.replace(day=1)
+    return value
+
+
+def _next(value, granularity):
+    if granularity == 'hour':
+        return value + timedelta(hours=1)
+    if granularity == 'day':
+        return value + timedelta(days=1)
+    if granularity == 'week':
+        return value + timedelta(days=7)
+    if value.month == 12:
+        return value.replace(year=value.year + 1, month=1)
+    return value.replace(month=value.month + 1)
+
+
+def bucket_starts(start, end, granularity):
+    """
+    Inicio (local, sin zona) de cada período que cubre los días start..end
+
+    Los extremos se amplían a períodos completos (ej. semana de lunes a domingo).
+    """
+    current = _floor(datetime.combine(start, time.min), granularity)
+    limit = datetime.combine(end + timedelta(days=1), time.min)
+    buckets = []
+    while current < limit:
+        buckets.append(current)
+        current = _next(current, granularity)
+    return buckets
+
+
+def sales_series(start, end, granularity='day', status=None):
+    """
+    Ventas, órdenes y unidades por período entre los días start y end (incluidos)
+
+    Una consulta agrupada sobre SalesRollup; los períodos sin ventas salen en
+    cero. Los días y semanas son los de la zona horaria del sitio.
+
+    Args:
+        start, end: Fechas locales
+        granularity: 'hour', 'day', 'week' o 'month'
+        status: Filtrar por estado de la orden (opcional)
+    """
+    from .models import SalesRollup
+
+    tz = timezone.get_default_timezone()
+    buckets = bucket_starts(start, end, granularity)
+    range_end = _next(buckets[-1], granularity)
+
+    queryset = SalesRollup.objects.filter(
+        hour__gte=timezone.make_aware(buckets[0], tz),
+        hour__lt=timezone.make_aware(range_end, tz),
+    )
+    if status:
+        queryset = queryset.filter(status=status)
+    rows = queryset.annotate(
+        period=GRANULARITIES[granularity]('hour', tzinfo=tz)
+    ).values('period').annotate(
+        # Nombres distintos a las columnas: si no, el segundo Sum('orders') vería el agregado
+        order_count=Sum('orders'),
+        paid_count=Sum('orders', filter=Q(is_paid=True)),
+        paid_amount=Sum('amount', filter=Q(is_paid=True)),
+        unit_count=Sum('units'),
+    ).order_by()
+    by_period = {timezone.localtime(row['period'], tz).replace(tzinfo=None): row for row in rows}
+
+    series = []
+    for bucket in buckets:
+        row = by_period.get(bucket, {})
+        series.append({
+            'period': timezone.make_aware(bucket, tz).isoformat(),
+            'sales': float(row.get('paid_amount') or 0),
+            'orders': row.get('order_count') or 0,
+            'paid_orders': row.get('paid_count') or 0,
+            'units': row.get('unit_count') or 0,
+        })
+    return {
+        'granularity': granularity,
+        'timezone': str(tz),
+        'start': series[0]['period'],
+        'end': timezone.make_aware(range_end, tz).isoformat(),
+        'totals': {
+            key: sum(point[key] for point in series)
+            for key in ('sales', 'orders', 'paid_orders', 'units')
+        },
+        'series': series,
+    }
+
+
+def rebuild(apps=global_apps):
+    """
+    Recalcula ambos resúmenes desde Order y OrderItem (4 consultas + inserts)
+    """
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    SalesRollup = apps.get_model('orders', 'SalesRollup')
+    ProductSalesRollup = apps.get_model('orders', 'ProductSalesRollup')
+
+    with transaction.atomic():
+        SalesRollup.objects.all().delete()
+        ProductSalesRollup.objects.all().delete()
+
+        buckets = {}
+        orders = Order.objects.annotate(
+            hour=TruncHour('created_at', tzinfo=dt_timezone.utc)
+        ).values('hour', 'status', 'is_paid').annotate(
+            orders=Count('id'), amount=Sum('total_price')
+        ).order_by()
+        for row in orders:
+            key = (row['hour'], row['status'], row['is_paid'])
+            buckets[key] = SalesRollup(
+                hour=row['hour'], status=row['status'], is_paid=row['is_paid'],
+                orders=row['orders'], amount=row['amount'] or 0,
+            )
+
+        units = OrderItem.objects.annotate(
+            hour=TruncHour('order__created_at', tzinfo=dt_timezone.utc)
+        ).values('hour', 'order__status', 'order__is_paid').annotate(units=Sum('quantity')).order_by()
+        for row in units:
+            bucket = buckets.get((row['hour'], row['order__status'], row['order__is_paid']))
+            if bucket is not None:
+                bucket.units = row['units'] or 0
+        SalesRollup.objects.bulk_create(buckets.values(), batch_size=1000)
+
+        products = OrderItem.objects.annotate(
+            day=TruncDate('order__created_at', tzinfo=timezone.get_default_timezone())
+        ).values('day', 'product_id').annotate(
+            units=Sum('quantity'), revenue=Sum(F('quantity') * F('price'))
+        ).order_by()
+        ProductSalesRollup.objects.bulk_create(
+            [
+                ProductSalesRollup(day=row['day'], product_id=row['product_id'], units=row['units'] or 0, revenue=row['revenue'] or 0)
+                for row in products
+            ],
+            batch_size=1000,
+        )
+    return len(buckets)
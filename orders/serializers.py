@@ -1,8 +1,19 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
-from .models import Order, OrderItem
-from products.serializers import ProductSerializer
+
+from jobs.runner import enqueue
 from payments.models import Payment  # si lo necesitas en otro serializer
-from django.db import transaction
+from products.models import Product
+from products.serializers import ProductSerializer
+from products.stock import InsufficientStock, reserve_stock
+from utils.fast_serializers import FastSerializer
+from .models import Order, OrderItem
+from .rollups import GRANULARITIES, MAX_BUCKETS, bucket_starts, record_items
 
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -15,13 +26,6 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'product_name', 'product_image', 'product_price', 'quantity', 'price']
         read_only_fields = ['id']
 
-# Serializer para crear ítems
-class OrderCreateItemSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = OrderItem
-        fields = ['product', 'quantity', 'price']
-
-
 # Serializer para mostrar órdenes completas
 class OrderSerializer(serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
@@ -37,43 +41,93 @@ class OrderSerializer(serializers.ModelSerializer):
         ]
         read_only_fields = ['id', 'created_at', 'user']
 
-class OrderCreateItemSerializer(serializers.ModelSerializer):
-    class Meta:
-        model = OrderItem
-        fields = ['product', 'quantity', 'price']
+# Misma salida que OrderSerializer, armada desde values() (listados de solo lectura).
+# user_name sale de get_full_name(), que no es una columna
+OrderFastSerializer = FastSerializer(OrderSerializer, computed={
+    'user_name': (('user__first_name', 'user__last_name'), lambda first, last: f'{first} {last}'.strip()),
+})
+
+# El precio de cada línea lo calcula el servidor; los productos del carrito
+# se buscan todos juntos en OrderCreateSerializer.validate_items
+class OrderCreateItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
 class OrderStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['status']
 
 class OrderCreateSerializer(serializers.ModelSerializer):
-    items = OrderCreateItemSerializer(many=True)
+    # Sin líneas no hay orden (sería una orden de 0.00)
+    items = OrderCreateItemSerializer(many=True, allow_empty=False)
 
     class Meta:
         model = Order
         fields = ['shipping_address', 'total_price', 'items']
+        # 💰 El total sale de los precios actuales, no del cliente
+        read_only_fields = ['total_price']
+
+    def validate_items(self, items):
+        # Todos los productos del carrito en una consulta
+        products = Product.objects.in_bulk({item['product'] for item in items})
+        missing = sorted({item['product'] for item in items} - set(products))
+        if missing:
+            raise serializers.ValidationError(f"Productos no encontrados: {', '.join(map(str, missing))}")
+        for item in items:
+            item['product'] = products[item['product']]
+        return items
 
     @transaction.atomic
     def create(self, validated_data):
         items_data = validated_data.pop('items')
         user = self.context['request'].user
-        order = Order.objects.create(user=user, **validated_data)
 
+        # 📉 Reservar stock de todas las líneas de una vez (sin sobreventa, ver products/stock.py)
+        quantities = defaultdict(int)
         for item_data in items_data:
-            product = item_data['product']
-            quantity = item_data['quantity']
+            quantities[item_data['product'].pk] += item_data['quantity']
+        try:
+            reserve_stock(quantities)
+        except InsufficientStock as e:
+            raise serializers.ValidationError({"detail": str(e)})
 
-            # 🛑 Validar stock suficiente
-            if product.stock < quantity:
-                raise serializers.ValidationError({
-                    "detail": f"No hay suficiente stock para el producto '{product.name}'"
-                })
+        # 🧾 Líneas con el precio actual de cada producto
+        lines = [
+            OrderItem(product=item_data['product'], quantity=item_data['quantity'], price=item_data['product'].price)
+            for item_data in items_data
+        ]
+        total_price = sum((line.price * line.quantity for line in lines), Decimal('0.00'))
+        order = Order.objects.create(user=user, total_price=total_price, **validated_data)
 
-            # 🧾 Crear item
-            OrderItem.objects.create(order=order, **item_data)
+        for line in lines:
+            line.order = order
+        OrderItem.objects.bulk_create(lines)
+        # bulk_create no dispara post_save: sumar las líneas a los resúmenes de ventas
+        record_items(order, lines)
 
-            # 📉 Actualizar stock
-            product.stock -= quantity
-            product.save()
+        # 🤝 Sumar la orden a "comprados juntos" una vez confirmada
+        transaction.on_commit(lambda: enqueue('copurchases.record_order', order_id=order.id))
 
         return order
+
+
+# Parámetros de la analítica de ventas (?granularity=day&days=90 o ?start=&end=)
+class SalesAnalyticsQuerySerializer(serializers.Serializer):
+    granularity = serializers.ChoiceField(choices=list(GRANULARITIES), default='day')
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    days = serializers.IntegerField(required=False, default=30, min_value=1, max_value=3660)
+    status = serializers.ChoiceField(choices=Order.STATUS_CHOICES, required=False)
+
+    def validate(self, data):
+        end = data.get('end') or timezone.localdate(timezone=timezone.get_default_timezone())
+        start = data.get('start') or end - timedelta(days=data['days'] - 1)
+        if start > end:
+            raise serializers.ValidationError({'start': 'La fecha de inicio debe ser anterior a la de fin.'})
+        if len(bucket_starts(start, end, data['granularity'])) > MAX_BUCKETS:
+            raise serializers.ValidationError({
+                'granularity': f'El rango tiene más de {MAX_BUCKETS} períodos; usa una granularidad mayor.'
+            })
+        data['start'], data['end'] = start, end
+        return data
@@ -0,0 +1,97 @@
+# orders/signals.py
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from jobs.runner import enqueue
+from .models import Order, OrderItem
+from .rollups import item_state, order_state, record_items, record_order_change
+
+# Resúmenes de ventas del dashboard (orders/rollups.py). Cada instancia guarda
+# cómo estaba al cargarse para poder restar lo viejo y sumar lo nuevo.
+ORDER_FIELDS = {'created_at', 'status', 'is_paid', 'total_price'}
+ITEM_FIELDS = {'order_id', 'product_id', 'quantity', 'price'}
+
+
+@receiver(post_init, sender=Order)
+def remember_order_state(sender, instance, **kwargs):
+    # Sin pk todavía no cuenta en los resúmenes; con campos diferidos se lee en pre_save
+    if instance.pk is None or ORDER_FIELDS & instance.get_deferred_fields():
+        instance._rollup_state = None
+        return
+    instance._rollup_state = order_state(instance)
+
+
+@receiver(pre_save, sender=Order)
+def load_order_state(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None or instance._rollup_state is not None:
+        return
+    old = Order.objects.filter(pk=instance.pk).values(*ORDER_FIELDS).first()
+    if old is not None:
+        instance._rollup_state = order_state(Order(**old))
+
+
+@receiver(post_save, sender=Order)
+def order_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else instance._rollup_state
+    new = order_state(instance)
+    record_order_change(instance.pk, old, new)
+    instance._rollup_state = new
+
+    # Co-compras (products/copurchase.py): las órdenes canceladas no cuentan
+    if old is not None and (old.status == 'cancelled') != (new.status == 'cancelled'):
+        sign = -1 if new.status == 'cancelled' else 1
+        order_id = instance.pk
+        transaction.on_commit(lambda: enqueue('copurchases.record_order', order_id=order_id, sign=sign))
+
+
+@receiver(post_delete, sender=Order)
+def order_deleted(sender, instance, **kwargs):
+    record_order_change(instance.pk, instance._rollup_state or order_state(instance), None)
+
+
+@receiver(post_init, sender=OrderItem)
+def remember_item_state(sender, instance, **kwargs):
+    if instance.pk is None or ITEM_FIELDS & instance.get_deferred_fields():
+        instance._rollup_state = None
+        return
+    instance._rollup_state = (instance.order_id, item_state(instance))
+
+
+@receiver(pre_save, sender=OrderItem)
+def load_item_state(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None or instance._rollup_state is not None:
+        return
+    old = OrderItem.objects.filter(pk=instance.pk).values(*ITEM_FIELDS).first()
+    if old is not None:
+        instance._rollup_state = (old['order_id'], item_state(OrderItem(**old)))
+
+
+@receiver(post_save, sender=OrderItem)
+def order_item_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    old = None if created else instance._rollup_state
+    new = item_state(instance)
+    if old is not None:
+        old_order_id, old_item = old
+        if old_order_id == instance.order_id and old_item == new:
+            return
+        old_order = instance.order if old_order_id == instance.order_id else Order.objects.get(pk=old_order_id)
+        record_items(old_order, [old_item], sign=-1)
+    record_items(instance.order, [new])
+    instance._rollup_state = (instance.order_id, new)
+
+
+@receiver(post_delete, sender=OrderItem)
+def order_item_deleted(sender, instance, **kwargs):
+    order_id, item = instance._rollup_state or (instance.order_id, item_state(instance))
+    # Se borra antes que su orden, así que la orden todavía existe
+    if OrderItem.order.is_cached(instance) and order_id == instance.order_id:
+        order = instance.order
+    else:
+        order = Order.objects.filter(pk=order_id).first()
+    if order is not None:
+        record_items(order, [item], sign=-1)
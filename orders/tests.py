@@ -1,3 +1,421 @@
-from django.test import TestCase
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from itertools import count
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from rest_framework.decorators import api_view
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from utils.prefetch import plan_queryset
+from utils.stats_cache import cached_stats, stats_cache_metrics
+from utils.testing import assert_constant_queries
+from . import rollups
+from .models import Order, OrderItem, ProductSalesRollup, SalesRollup
+from .serializers import OrderFastSerializer, OrderSerializer
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+STATS_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'stats-tests'}}
+
+_sequence = count()
+
+
+def crear_producto():
+    index = next(_sequence)
+    categoria = Category.objects.create(name=f'Categoría {index}')
+    return Product.objects.create(
+        name=f'Producto {index}', description='Descripción', price=Decimal('12.50'),
+        stock=100, image=f'products/{index}.jpg', category=categoria,
+    )
+
+
+def crear_orden(user, items=3):
+    order = Order.objects.create(user=user, total_price=Decimal('37.50'), shipping_address='Calle 1')
+    for _ in range(items):
+        product = crear_producto()
+        OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+    return order
+
+
+@override_settings(CACHES=NO_CACHE)
+class OrderQueryCountTests(TestCase):
+    def setUp(self):
+        User = get_user_model()
+        self.user = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', is_staff=True)
+        self.client = APIClient()
+        self.order = crear_orden(self.user)
+
+    def crear_ordenes(self, n):
+        for _ in range(n):
+            crear_orden(self.user)
+
+    def test_mis_ordenes_sin_n_mas_1(self):
+        self.client.force_authenticate(self.user)
+        assert_constant_queries(self, lambda: self.client.get('/api/orders/'), self.crear_ordenes)
+
+    def test_ordenes_admin_sin_n_mas_1(self):
+        self.client.force_authenticate(self.admin)
+        assert_constant_queries(self, lambda: self.client.get('/api/orders/admin/orders/'), self.crear_ordenes)
+
+    def test_detalle_de_orden_sin_n_mas_1(self):
+        self.client.force_authenticate(self.admin)
+
+        def agregar_items(n):
+            for _ in range(n):
+                product = crear_producto()
+                OrderItem.objects.create(order=self.order, product=product, quantity=2, price=product.price)
+
+        assert_constant_queries(
+            self, lambda: self.client.get(f'/api/orders/admin/orders/{self.order.pk}/'), agregar_items,
+        )
+
+
+@override_settings(TIME_ZONE='America/La_Paz')
+class OrderFastSerializerContractTests(TestCase):
+    """
+    OrderFastSerializer tiene que renderizar los mismos bytes que OrderSerializer
+    """
+
+    def setUp(self):
+        User = get_user_model()
+        # Sin nombre: user_name sale vacío de get_full_name()
+        anonimo = User.objects.create_user(username='sin_nombre', email='sin@example.com', password='x')
+        ana = User.objects.create_user(
+            username='ana', email='ana@example.com', password='x', first_name='Ana', last_name='Pérez',
+        )
+        categoria = Category.objects.create(name='Ropa', image=None)
+        productos = [
+            Product.objects.create(name='Polera', description='', price=Decimal('49.9'), stock=10, image='', category=categoria),
+            Product.objects.create(name='Zapato', description='', price=Decimal('1234.56'), stock=10, image=None, category=categoria),
+            Product.objects.create(name='Gorra', description='', price=Decimal('0.10'), stock=10, image='products/gorra 1.jpg', category=categoria),
+        ]
+        for minutes, (user, status) in enumerate([(anonimo, 'pending'), (ana, 'shipped'), (ana, 'cancelled')]):
+            order = Order.objects.create(user=user, total_price=Decimal('99.5'), shipping_address='Calle 1', status=status)
+            for product in productos[minutes:]:
+                OrderItem.objects.create(order=order, product=product, quantity=2, price=product.price)
+            # Fechas en UTC cerca de la medianoche: en La Paz (UTC-4) caen el día anterior
+            Order.objects.filter(pk=order.pk).update(
+                created_at=datetime(2024, 3, 1, 2, minutes, 30, 123456, tzinfo=dt_timezone.utc)
+            )
+        # Una orden sin ítems: la lista anidada sale vacía
+        Order.objects.create(user=ana, total_price=Decimal('0'), shipping_address='', status='pending')
+
+    def test_listado_identico_byte_a_byte(self):
+        request = Request(RequestFactory().get('/api/orders/'))
+        renderer = JSONRenderer()
+        queryset = Order.objects.order_by('-created_at', '-id')
+
+        drf = renderer.render(
+            OrderSerializer(plan_queryset(queryset, OrderSerializer), many=True, context={'request': request}).data
+        )
+        fast = renderer.render(OrderFastSerializer.serialize(OrderFastSerializer.values(queryset), request))
+        self.assertEqual(drf, fast)
+        self.assertIn(b'"created_at":"2024-02-29T22:00:30.123456-04:00"', fast)
+        self.assertIn(b'"user_name":""', fast)
+        self.assertIn(b'"total_price":"99.50"', fast)
+        self.assertIn(b'"items":[]', fast)
+
+
+@override_settings(CACHES=NO_CACHE)
+class CheckoutConcurrencyTests(TransactionTestCase):
+    """
+    Muchos checkouts en paralelo contra pocos productos con poco stock: no puede haber sobreventa
+
+    TransactionTestCase: los hilos usan sus propias conexiones y tienen que ver
+    los datos ya confirmados (la base de pruebas se vacía al terminar).
+    """
+    THREADS = 8
+    CHECKOUTS = 120
+    STOCK = 30
+    MAX_QUANTITY = 3
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='stress', email='stress@example.com', password='x')
+        categoria = Category.objects.create(name='Stress')
+        self.product_ids = [
+            Product.objects.create(
+                name=f'Stress #{index}', description='', price=Decimal('10.00'), stock=self.STOCK, category=categoria,
+            ).pk
+            for index in range(3)
+        ]
+
+    def checkout_all(self, carts):
+        lock = threading.Lock()
+        results = {'created': 0, 'rejected': 0, 'errors': Counter(), 'sold': Counter()}
+
+        def checkout(cart):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            payload = {
+                'shipping_address': 'Prueba de concurrencia',
+                'items': [{'product': product_id, 'quantity': quantity} for product_id, quantity in cart],
+            }
+            try:
+                outcome = client.post('/api/orders/create/', payload, format='json').status_code
+            except Exception as e:
+                outcome = type(e).__name__
+            finally:
+                connections.close_all()
+
+            with lock:
+                if outcome == 201:
+                    results['created'] += 1
+                    for product_id, quantity in cart:
+                        results['sold'][product_id] += quantity
+                elif outcome == 400:
+                    results['rejected'] += 1
+                else:
+                    results['errors'][outcome] += 1
+
+        # Los 400 por falta de stock son esperados: no llenar la salida con avisos
+        request_logger = logging.getLogger('django.request')
+        previous_level = request_logger.level
+        request_logger.setLevel(logging.CRITICAL)
+        try:
+            with ThreadPoolExecutor(self.THREADS) as executor:
+                list(executor.map(checkout, carts))
+        finally:
+            request_logger.setLevel(previous_level)
+        return results
+
+    def test_sin_sobreventa(self):
+        rng = random.Random(42)
+        carts = []
+        for _ in range(self.CHECKOUTS):
+            # Varios productos por carrito y en orden aleatorio: así se prueba también el orden de bloqueo
+            cart = rng.sample(self.product_ids, rng.randint(1, len(self.product_ids)))
+            carts.append([(product_id, rng.randint(1, self.MAX_QUANTITY)) for product_id in cart])
+
+        results = self.checkout_all(carts)
+
+        self.assertFalse(results['errors'])
+        self.assertTrue(results['created'])
+        self.assertTrue(results['rejected'])  # Se agotó el stock: la prueba llegó a competir por él
+        stocks = dict(Product.objects.filter(pk__in=self.product_ids).values_list('pk', 'stock'))
+        ordered = Counter()
+        for product_id, quantity in OrderItem.objects.values_list('product_id', 'quantity'):
+            ordered[product_id] += quantity
+        for product_id in self.product_ids:
+            sold = self.STOCK - stocks[product_id]
+            self.assertGreaterEqual(stocks[product_id], 0)
+            self.assertEqual(sold, ordered[product_id])
+            self.assertEqual(sold, results['sold'][product_id])
+
+
+class StatsCacheTests(TestCase):
+    def setUp(self):
+        self.admin = get_user_model().objects.create_user(
+            username='admin', email='admin@example.com', password='x', is_staff=True,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        crear_orden(self.admin)
+
+    @override_settings(CACHES=NO_CACHE)
+    def test_sin_cache_real_no_falla(self):
+        # DummyCache no guarda nada: los contadores no pueden romper la respuesta
+        for url in ('/api/orders/admin/orders/stats/', '/api/store/admin/dashboard/stats/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['X-Cache'], 'MISS')
+
+
+# Vistas de prueba para @cached_stats: lentas y sin base, para poder llamarlas desde varios hilos
+_calls = Counter()
+
+
+@api_view(['GET'])
+@cached_stats('prueba_lenta', ttl=60, stale_ttl=60)
+def vista_lenta(request):
+    _calls['lenta'] += 1
+    time.sleep(0.3)
+    return Response({'llamadas': _calls['lenta']})
+
+
+@api_view(['GET'])
+@cached_stats('prueba_vieja', ttl=0, stale_ttl=60)
+def vista_vieja(request):
+    _calls['vieja'] += 1
+    return Response({'llamadas': _calls['vieja']})
+
+
+@override_settings(CACHES=STATS_CACHE)
+class StatsCacheStatesTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        _calls.clear()
+        self.factory = RequestFactory()
+        User = get_user_model()
+        self.admin = User.objects.create_user(username='admin', email='admin@example.com', password='x', is_staff=True)
+        self.cliente = User.objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        self.client = APIClient()
+
+    def test_miss_y_luego_hit(self):
+        first, second = vista_lenta(self.factory.get('/')), vista_lenta(self.factory.get('/'))
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.data, {'llamadas': 1})
+        # Otros parámetros son otra entrada
+        self.assertEqual(vista_lenta(self.factory.get('/?days=7'))['X-Cache'], 'MISS')
+
+    def test_peticiones_simultaneas_calculan_una_vez(self):
+        with ThreadPoolExecutor(5) as executor:
+            statuses = list(executor.map(lambda _: vista_lenta(self.factory.get('/'))['X-Cache'], range(5)))
+        self.assertEqual(sorted(statuses), ['COALESCED'] * 4 + ['MISS'])
+        self.assertEqual(_calls['lenta'], 1)
+
+    def test_stale_sirve_lo_viejo_y_recalcula_en_segundo_plano(self):
+        self.assertEqual(vista_vieja(self.factory.get('/'))['X-Cache'], 'MISS')
+        response = vista_vieja(self.factory.get('/'))
+        self.assertEqual(response['X-Cache'], 'STALE')
+        self.assertEqual(response.data, {'llamadas': 1})
+        deadline = time.monotonic() + 5
+        while _calls['vieja'] < 2 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(_calls['vieja'], 2)
+
+    def test_order_stats_solo_admin(self):
+        self.client.force_authenticate(self.cliente)
+        self.assertEqual(self.client.get('/api/orders/admin/orders/stats/').status_code, 403)
+
+    def test_endpoint_de_metricas(self):
+        self.client.force_authenticate(self.admin)
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/orders/admin/orders/stats/').status_code, 200)
+
+        response = self.client.get('/api/store/admin/dashboard/cache-metrics/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.data['order_stats'],
+            {'hits': 2, 'stale': 0, 'coalesced': 0, 'misses': 1, 'hit_ratio': 0.6667},
+        )
+        self.assertEqual(response.data, stats_cache_metrics())
+
+        self.client.force_authenticate(self.cliente)
+        self.assertEqual(self.client.get('/api/store/admin/dashboard/cache-metrics/').status_code, 403)
+
+
+@override_settings(CACHES=NO_CACHE)
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        categoria = Category.objects.create(name='Ropa')
+        self.polera = Product.objects.create(name='Polera', description='', price=Decimal('49.90'), stock=10, category=categoria)
+        self.gorra = Product.objects.create(name='Gorra', description='', price=Decimal('15.25'), stock=10, category=categoria)
+
+    def checkout(self, items, **extra):
+        payload = {'shipping_address': 'Calle 1', 'items': items, **extra}
+        return self.client.post('/api/orders/create/', payload, format='json')
+
+    def test_precios_del_cliente_se_ignoran(self):
+        response = self.checkout(
+            [
+                {'product': self.polera.pk, 'quantity': 2, 'price': '0.01'},
+                {'product': self.gorra.pk, 'quantity': 1, 'price': '0.01'},
+            ],
+            total_price='0.03',
+        )
+        self.assertEqual(response.status_code, 201)
+        # 2 × 49.90 + 15.25 con los precios actuales
+        self.assertEqual(response.data['total_price'], '115.05')
+        order = Order.objects.get(pk=response.data['id'])
+        self.assertEqual(order.total_price, Decimal('115.05'))
+        self.assertEqual(
+            sorted(order.items.values_list('product_id', 'quantity', 'price')),
+            sorted([(self.polera.pk, 2, Decimal('49.90')), (self.gorra.pk, 1, Decimal('15.25'))]),
+        )
+        self.polera.refresh_from_db()
+        self.assertEqual(self.polera.stock, 8)
+
+    def test_carrito_vacio(self):
+        response = self.checkout([], total_price='10.00')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('items', response.data)
+        self.assertFalse(Order.objects.exists())
+
+    def test_producto_inexistente_o_sin_stock(self):
+        self.assertEqual(self.checkout([{'product': 999999, 'quantity': 1}]).status_code, 400)
+        self.assertEqual(self.checkout([{'product': self.gorra.pk, 'quantity': 11}]).status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        self.gorra.refresh_from_db()
+        self.assertEqual(self.gorra.stock, 10)
+
+
+@override_settings(CACHES=NO_CACHE)
+class SalesRollupTests(TestCase):
+    """
+    Los resúmenes incrementales (orders/signals.py) tienen que dar lo mismo que rollups.rebuild()
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.products = [crear_producto() for _ in range(3)]
+
+    def snapshot(self):
+        # Las filas que quedan en cero no cambian ningún total (el recálculo no las crea)
+        sales = {
+            (row.hour, row.status, row.is_paid, row.orders, row.amount, row.units)
+            for row in SalesRollup.objects.all()
+            if row.orders or row.amount or row.units
+        }
+        products = {
+            (row.day, row.product_id, row.units, row.revenue)
+            for row in ProductSalesRollup.objects.all()
+            if row.units or row.revenue
+        }
+        return sales, products
+
+    def checkout(self, *lines):
+        items = [{'product': product.pk, 'quantity': quantity} for product, quantity in lines]
+        response = self.client.post('/api/orders/create/', {'shipping_address': 'Calle 1', 'items': items}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return Order.objects.get(pk=response.data['id'])
+
+    def test_incremental_igual_al_recalculo(self):
+        a, b, c = self.products
+        cancelada = self.checkout((a, 1), (b, 2))
+        pagada = self.checkout((b, 1), (c, 3))
+        editada = self.checkout((a, 2), (c, 1))
+        borrada = self.checkout((a, 1), (b, 1), (c, 1))
+        self.checkout((c, 2))
+
+        cancelada.status = 'cancelled'
+        cancelada.save()
+
+        pagada.is_paid = True
+        pagada.save(update_fields=['is_paid', 'updated_at'])
+
+        # Otra hora y otro día local (La Paz): se mueve de fila con sus unidades
+        pagada.created_at = datetime(2024, 3, 1, 2, 30, tzinfo=dt_timezone.utc)
+        pagada.save()
+
+        # Editar una línea: cantidad, precio y producto
+        item = editada.items.get(product=a)
+        item.quantity, item.price, item.product = 5, Decimal('9.99'), b
+        item.save()
+        editada.items.get(product=c).delete()
+        editada.total_price = Decimal('49.95')
+        editada.save()
+
+        borrada.delete()
+
+        incremental = self.snapshot()
+        self.assertTrue(incremental[0] and incremental[1])
+        rollups.rebuild()
+        self.assertEqual(incremental, self.snapshot())
@@ -6,7 +6,8 @@ from .views import (
     OrderListView,
     OrderDetailView,
     OrderStatusUpdateView,
-    order_stats
+    order_stats,
+    sales_analytics
 )
 
 urlpatterns = [
@@ -20,4 +21,5 @@ urlpatterns = [
     path('admin/orders/<int:pk>/', OrderDetailView.as_view(), name='admin-order-detail'),
     path('admin/orders/<int:pk>/update-status/', OrderStatusUpdateView.as_view(), name='admin-order-update-status'),
     path('admin/orders/stats/', order_stats, name='admin-order-stats'),
+    path('admin/analytics/sales/', sales_analytics, name='admin-sales-analytics'),
 ]
@@ -6,26 +6,33 @@ from .serializers import OrderSerializer, OrderCreateSerializer
 from rest_framework.response import Response
 from rest_framework import status
 
-from rest_framework.decorators import api_view
+from rest_framework.decorators import api_view, permission_classes
 from django.db.models import Q
 
 # views.py
 from rest_framework import generics, permissions, status
 from rest_framework.response import Response
 from .models import Order, OrderItem
-from .serializers import OrderSerializer, OrderCreateSerializer, OrderStatusUpdateSerializer
+from .serializers import OrderSerializer, OrderFastSerializer, OrderCreateSerializer, OrderStatusUpdateSerializer, SalesAnalyticsQuerySerializer
+from .rollups import sales_series
+from utils.stats_cache import cached_stats
+from utils.pagination import OptionalPagination
+from utils.export import StreamingExportMixin
+from utils.conditional import ConditionalGetMixin
+from utils.prefetch import PrefetchPlannerMixin, plan_queryset
+from utils.fast_serializers import FastListMixin
 
 
-# orders/views.py - Asegúrate de que el queryset incluya prefetch_related
-class UserOrderListView(generics.ListAPIView):
+# orders/views.py - Los joins y prefetch los arma PrefetchPlannerMixin según OrderSerializer
+class UserOrderListView(StreamingExportMixin, FastListMixin, PrefetchPlannerMixin, generics.ListAPIView):
     serializer_class = OrderSerializer
+    fast_serializer = OrderFastSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = OptionalPagination
     
     def get_queryset(self):
         return Order.objects.filter(
             user=self.request.user
-        ).select_related('user').prefetch_related(
-            'items__product'  
         ).order_by('-created_at')
     
 
@@ -42,14 +49,17 @@ class OrderCreateView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         order = serializer.save()
+        # Releer con los joins que pide OrderSerializer: consultas fijas aunque el carrito sea grande
+        order = plan_queryset(Order.objects.filter(pk=order.pk), OrderSerializer).get()
         return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
 
-class OrderListView(generics.ListAPIView):
+class OrderListView(StreamingExportMixin, PrefetchPlannerMixin, generics.ListAPIView):
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = OptionalPagination
     
     def get_queryset(self):
-        queryset = Order.objects.all().select_related('user').prefetch_related('items').order_by('-created_at')
+        queryset = Order.objects.all().order_by('-created_at')
         
         # Filtros
         status_filter = self.request.query_params.get('status')
@@ -69,12 +79,16 @@ class OrderListView(generics.ListAPIView):
             
         return queryset
 
-class OrderDetailView(generics.RetrieveAPIView):
-    queryset = Order.objects.all().select_related('user').prefetch_related('items')
+class OrderDetailView(ConditionalGetMixin, PrefetchPlannerMixin, generics.RetrieveAPIView):
+    queryset = Order.objects.all()
+    # Los ítems muestran nombre, imagen y precio actual del producto
+    version_fields = ('updated_at', 'items__product__updated_at')
     serializer_class = OrderSerializer
     permission_classes = [permissions.IsAdminUser]
 # Estadísticas de órdenes
 @api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+@cached_stats('order_stats')
 def order_stats(request):
     from django.db.models import Count, Sum, Q
     from django.utils import timezone
@@ -103,6 +117,18 @@ def order_stats(request):
         'orders_by_status': list(orders_by_status)
     })
 
+# Analítica de ventas: series por hora/día/semana/mes para cualquier rango (una consulta)
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def sales_analytics(request):
+    query_serializer = SalesAnalyticsQuerySerializer(data=request.query_params)
+    query_serializer.is_valid(raise_exception=True)
+    data = query_serializer.validated_data
+
+    return Response(sales_series(
+        data['start'], data['end'], granularity=data['granularity'], status=data.get('status'),
+    ))
+
 class OrderStatusUpdateView(generics.UpdateAPIView):
     queryset = Order.objects.all()
     serializer_class = OrderStatusUpdateSerializer
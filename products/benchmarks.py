@@ -0,0 +1,267 @@
+# products/benchmarks.py
+"""
+Benchmark del recomendador sobre catálogos sintéticos.
+
+Genera productos con descripciones en español y órdenes con estructura de
+"comprados juntos" (misma marca, categoría igual o complementaria), y mide:
+
+- tiempo de ajuste del TF-IDF y de construcción de los vecinos
+- latencia por consulta (p50/p99) del índice precalculado y de una consulta en línea
+- pico de memoria residente (RSS) del proceso
+- precision@K y recall@K contra co-compras de órdenes reservadas para test
+
+Se usa desde `python manage.py benchmark_recommendations`.
+"""
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from itertools import combinations
+
+import numpy as np
+
+from . import recommendations, similarity
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CATEGORIES = {
+    'Laptops': {
+        'tipos': ['laptop', 'notebook', 'ultrabook', 'laptop gamer'],
+        'marcas': ['Asus', 'Lenovo', 'HP', 'Dell', 'Acer'],
+        'rasgos': ['procesador intel core i7', 'procesador amd ryzen', 'tarjeta gráfica nvidia',
+                   'pantalla de 15 pulgadas', 'memoria ram de 16 gb', 'disco ssd rápido',
+                   'teclado retroiluminado', 'batería de larga duración'],
+        'complementaria': 'Accesorios',
+    },
+    'Accesorios': {
+        'tipos': ['mouse inalámbrico', 'teclado mecánico', 'mochila para laptop', 'audífonos', 'cargador'],
+        'marcas': ['Asus', 'Lenovo', 'HP', 'Dell', 'Acer'],
+        'rasgos': ['conexión bluetooth', 'sensor óptico de alta precisión', 'iluminación rgb',
+                   'cable usb tipo c', 'cancelación de ruido', 'material resistente al agua'],
+        'complementaria': 'Laptops',
+    },
+    'Celulares': {
+        'tipos': ['celular', 'smartphone', 'teléfono plegable'],
+        'marcas': ['Samsung', 'Xiaomi', 'Motorola', 'Apple'],
+        'rasgos': ['cámara de 108 megapíxeles', 'pantalla amoled', 'carga rápida',
+                   'almacenamiento de 256 gb', 'doble chip', 'conectividad 5g'],
+        'complementaria': 'Fundas',
+    },
+    'Fundas': {
+        'tipos': ['funda', 'protector de pantalla', 'cargador portátil'],
+        'marcas': ['Samsung', 'Xiaomi', 'Motorola', 'Apple'],
+        'rasgos': ['silicona suave', 'vidrio templado', 'protección contra caídas',
+                   'diseño delgado', 'batería de 10000 mah'],
+        'complementaria': 'Celulares',
+    },
+    'Poleras': {
+        'tipos': ['polera', 'camiseta', 'polera deportiva'],
+        'marcas': ['Nike', 'Adidas', 'Puma', 'Umbro'],
+        'rasgos': ['algodón peinado', 'tela transpirable', 'corte regular', 'estampado frontal',
+                   'cuello redondo', 'manga corta'],
+        'complementaria': 'Gorras',
+    },
+    'Gorras': {
+        'tipos': ['gorra', 'visera', 'gorro de lana'],
+        'marcas': ['Nike', 'Adidas', 'Puma', 'Umbro'],
+        'rasgos': ['ajuste regulable', 'bordado frontal', 'tela transpirable', 'protección solar'],
+        'complementaria': 'Poleras',
+    },
+    'Bebidas': {
+        'tipos': ['gaseosa', 'jugo', 'agua mineral', 'bebida energética'],
+        'marcas': ['Coca-Cola', 'Pepsi', 'Del Valle', 'Vital'],
+        'rasgos': ['lata de 354 ml', 'botella de 2 litros', 'sin azúcar', 'sabor original',
+                   'sabor a durazno', 'pack de seis unidades'],
+        'complementaria': 'Snacks',
+    },
+    'Snacks': {
+        'tipos': ['papas fritas', 'galletas', 'chocolate', 'maní salado'],
+        'marcas': ['Coca-Cola', 'Pepsi', 'Del Valle', 'Vital'],
+        'rasgos': ['bolsa familiar', 'sabor a queso', 'sin gluten', 'receta tradicional',
+                   'porción individual'],
+        'complementaria': 'Bebidas',
+    },
+}
+
+COMMON_PHRASES = [
+    'ideal para el uso diario', 'excelente calidad', 'envío a todo el país',
+    'garantía de un año', 'precio especial por tiempo limitado', 'disponible en varios colores',
+    'diseño moderno y elegante', 'producto original', 'el mejor regalo para toda la familia',
+]
+
+
+def generate_catalog(n_products, rng):
+    """
+    Productos sintéticos con nombre, descripción y categoría en español
+
+    Returns:
+        Tupla (ids, textos, atributos (categoría, marca) de cada producto)
+    """
+    names = list(CATEGORIES)
+    ids = np.arange(1, n_products + 1, dtype=np.int64)
+    documents, attributes = [], []
+
+    for _ in range(n_products):
+        category = rng.choice(names)
+        spec = CATEGORIES[category]
+        kind, brand = rng.choice(spec['tipos']), rng.choice(spec['marcas'])
+        features = rng.sample(spec['rasgos'], 3)
+        model = f"{rng.choice('XZGSPK')}{rng.randint(1, 999)}"
+
+        name = f"{kind.capitalize()} {brand} {model}"
+        description = (
+            f"{kind} {brand} con {features[0]}, {features[1]} y {features[2]}. "
+            f"{rng.choice(COMMON_PHRASES).capitalize()}. {rng.choice(COMMON_PHRASES).capitalize()}."
+        )
+        documents.append(f"{name} {description} {category}")
+        attributes.append((category, brand))
+
+    return ids, documents, attributes
+
+
+def generate_orders(ids, attributes, n_orders, rng):
+    """
+    Órdenes de 2 a 4 productos: un producto base más otros de la misma marca,
+    de su categoría o de la complementaria (p. ej. laptop + mouse)
+    """
+    by_group = defaultdict(list)
+    for product_id, group in zip(ids.tolist(), attributes):
+        by_group[group].append(product_id)
+
+    orders = []
+    for _ in range(n_orders):
+        base = rng.randrange(len(ids))
+        category, brand = attributes[base]
+        items = {int(ids[base])}
+        for _ in range(rng.randint(1, 3)):
+            if rng.random() < 0.5:
+                group = (CATEGORIES[category]['complementaria'], brand)
+            else:
+                group = (category, brand)
+            if by_group[group]:
+                items.add(rng.choice(by_group[group]))
+        if len(items) > 1:
+            orders.append(sorted(items))
+    return orders
+
+
+def _copurchase_lookup(orders, top_k):
+    """
+    Equivalente en memoria de copurchase_scores para las órdenes de entrenamiento
+    """
+    counts = defaultdict(Counter)
+    for items in orders:
+        for a, b in combinations(items, 2):
+            counts[a][b] += 1
+            counts[b][a] += 1
+
+    def lookup(product_id):
+        related = counts.get(product_id)
+        if not related:
+            return []
+        best = related.most_common(top_k)
+        max_count = best[0][1]
+        return [(product_id, other, count / max_count) for other, count in best]
+
+    return lookup
+
+
+def _percentiles_ms(samples):
+    samples = np.asarray(samples) * 1000
+    return {'p50': round(float(np.percentile(samples, 50)), 4), 'p99': round(float(np.percentile(samples, 99)), 4)}
+
+
+def peak_rss_mb():
+    """
+    Pico de memoria residente del proceso en MB (None si la plataforma no lo expone)
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS lo informa en bytes; Linux en KB
+    if sys.platform == 'darwin':
+        peak /= 1024
+    return round(peak / 1024, 1)
+
+
+def run_benchmark(n_products, queries=500, top_k=20, k=5, seed=42):
+    """
+    Ejecuta el benchmark completo para un tamaño de catálogo
+
+    Returns:
+        Diccionario con los resultados (serializable a JSON)
+    """
+    rng = random.Random(seed)
+    ids, documents, attributes = generate_catalog(n_products, rng)
+    orders = generate_orders(ids, attributes, min(2 * n_products, 50_000), rng)
+    split = int(len(orders) * 0.8)
+    train_orders, test_orders = orders[:split], orders[split:]
+
+    # Crear el vectorizador fuera de la medición (importa scikit-learn y las stopwords)
+    vectorizer = recommendations._make_vectorizer()
+    start = time.perf_counter()
+    tfidf_matrix = vectorizer.fit_transform(documents)
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    neighbors, scores = recommendations._top_k_neighbors(tfidf_matrix, np.arange(len(ids)), ids, top_k)
+    neighbors_seconds = time.perf_counter() - start
+
+    index = {'product_ids': ids, 'neighbors': neighbors, 'scores': scores}
+    bought_together = _copurchase_lookup(train_orders, top_k)
+
+    # Latencia por consulta
+    sample_rows = [rng.randrange(len(ids)) for _ in range(queries)]
+    index_latency, hybrid_latency, online_latency = [], [], []
+    for row in sample_rows:
+        product_id = int(ids[row])
+
+        start = time.perf_counter()
+        recommendations.rank_candidates(index, [product_id], [], k)
+        index_latency.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        recommendations.rank_candidates(index, [product_id], bought_together(product_id), k)
+        hybrid_latency.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        similarity.query_top_k(tfidf_matrix, tfidf_matrix[row], k, exclude=row)
+        online_latency.append(time.perf_counter() - start)
+
+    # Calidad contra co-compras reservadas: el primer producto de la orden es la consulta
+    hits = {'content': [], 'hybrid': []}
+    for items in test_orders[:queries]:
+        seed_id, expected = items[0], set(items[1:])
+        content = recommendations.rank_candidates(index, [seed_id], [], k)
+        hybrid = recommendations.rank_candidates(index, [seed_id], bought_together(seed_id), k)
+        hits['content'].append((len(expected.intersection(content)), len(expected)))
+        hits['hybrid'].append((len(expected.intersection(hybrid)), len(expected)))
+
+    quality = {
+        name: {
+            'precision_at_k': round(float(np.mean([found / k for found, _ in values])), 4),
+            'recall_at_k': round(float(np.mean([found / total for found, total in values])), 4),
+        }
+        for name, values in hits.items() if values
+    }
+
+    return {
+        'products': n_products,
+        'orders': {'train': len(train_orders), 'test': len(test_orders)},
+        'vocabulary_size': len(vectorizer.vocabulary_),
+        'tfidf_nnz': int(tfidf_matrix.nnz),
+        'fit_seconds': round(fit_seconds, 3),
+        'neighbors_seconds': round(neighbors_seconds, 3),
+        'latency_ms': {
+            'index': _percentiles_ms(index_latency),
+            'index_hybrid': _percentiles_ms(hybrid_latency),
+            'online_query': _percentiles_ms(online_latency),
+        },
+        'quality': quality,
+        'k': k,
+        'top_k': top_k,
+        'peak_rss_mb': peak_rss_mb(),
+    }
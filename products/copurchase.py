@@ -0,0 +1,129 @@
+# products/copurchase.py
+"""
+Señal de "comprados juntos" a partir de OrderItem.
+
+Los conteos se guardan como una matriz dispersa en ProductCoPurchase: una
+fila por par de productos que alguna vez compartieron orden.
+"""
+from collections import Counter
+from itertools import combinations, groupby
+
+from django.db import connection, transaction
+from django.db.models import F, Max, Window
+from django.db.models.functions import RowNumber
+
+from orders.models import OrderItem
+from .models import ProductCoPurchase
+
+BULK_BATCH_SIZE = 5000
+
+
+def _order_pairs(product_ids):
+    """
+    Pares (a, b) en ambos sentidos de los productos distintos de una orden
+    """
+    for a, b in combinations(sorted(set(product_ids)), 2):
+        yield a, b
+        yield b, a
+
+
+def build_copurchase_counts(chunk_size=2000):
+    """
+    Recalcula toda la matriz de co-compras recorriendo OrderItem en streaming
+
+    Las líneas se leen ordenadas por orden y se agrupan de a una orden por vez,
+    así que la memoria depende de la cantidad de pares distintos, no de la
+    cantidad de líneas. Las órdenes canceladas no cuentan.
+
+    Returns:
+        Número de pares guardados
+    """
+    lines = OrderItem.objects.exclude(order__status='cancelled').order_by('order_id').values_list(
+        'order_id', 'product_id'
+    ).iterator(chunk_size=chunk_size)
+
+    counts = Counter()
+    for _, order_lines in groupby(lines, key=lambda line: line[0]):
+        counts.update(_order_pairs(product_id for _, product_id in order_lines))
+
+    with transaction.atomic():
+        ProductCoPurchase.objects.all().delete()
+        ProductCoPurchase.objects.bulk_create(
+            (ProductCoPurchase(product_id=a, related_id=b, count=n) for (a, b), n in counts.items()),
+            batch_size=BULK_BATCH_SIZE,
+        )
+
+    return len(counts)
+
+
+# Pares por INSERT: 3 parámetros cada uno, bajo el límite de SQLite
+UPSERT_BATCH_SIZE = 300
+
+
+def _increment_pairs(pairs):
+    """
+    Suma 1 a cada par con un solo INSERT ... ON CONFLICT DO UPDATE por lote
+
+    El incremento se hace en SQL: dos órdenes con el mismo par nuevo no se
+    pisan (ninguna lee el conteo antes de escribirlo).
+    """
+    quote = connection.ops.quote_name
+    meta = ProductCoPurchase._meta
+    table = quote(meta.db_table)
+    product, related, count = (quote(meta.get_field(name).column) for name in ('product', 'related', 'count'))
+    for start in range(0, len(pairs), UPSERT_BATCH_SIZE):
+        batch = pairs[start:start + UPSERT_BATCH_SIZE]
+        values = ', '.join(['(%s, %s, 1)'] * len(batch))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {table} ({product}, {related}, {count}) VALUES {values} '
+                f'ON CONFLICT ({product}, {related}) DO UPDATE SET {count} = {table}.{count} + 1',
+                [value for pair in batch for value in pair],
+            )
+
+
+@transaction.atomic
+def record_order(order_id, sign=1):
+    """
+    Suma (sign=1) o resta (sign=-1) una orden en la matriz de co-compras sin recalcularla
+
+    Se suma al crear la orden y se resta al cancelarla (y se vuelve a sumar si
+    deja de estar cancelada), así la matriz coincide con build_copurchase_counts.
+    Lo que cambia sin pasar por acá (órdenes o líneas borradas, ítems editados)
+    se corrige con el recálculo completo de cada deploy (build.sh).
+
+    Args:
+        order_id: ID de la orden
+    """
+    product_ids = set(OrderItem.objects.filter(order_id=order_id).values_list('product_id', flat=True))
+    if len(product_ids) < 2:
+        return
+
+    if sign > 0:
+        # Pares ordenados: las transacciones bloquean las filas en el mismo orden (sin deadlocks)
+        _increment_pairs(sorted(_order_pairs(product_ids)))
+        return
+
+    # Todos los pares de la orden son exactamente los pares con ambos extremos en product_ids
+    pairs = ProductCoPurchase.objects.filter(product_id__in=product_ids, related_id__in=product_ids)
+    pairs.filter(count__gt=0).update(count=F('count') - 1)
+    # Matriz dispersa: sin filas en cero, igual que el recálculo
+    pairs.filter(count=0).delete()
+
+
+def copurchase_scores(product_ids, top_k):
+    """
+    Scores de co-compra normalizados (0-1) de los productos más comprados junto a los dados
+
+    Trae los top_k pares de cada producto en una sola consulta; el conteo de
+    cada par se divide por el mayor conteo del producto base.
+
+    Returns:
+        Lista de tuplas (producto base, producto relacionado, score)
+    """
+    rows = ProductCoPurchase.objects.filter(product_id__in=list(product_ids)).annotate(
+        position=Window(RowNumber(), partition_by=F('product_id'), order_by=F('count').desc()),
+        max_count=Window(Max('count'), partition_by=F('product_id')),
+    ).filter(position__lte=top_k).values_list('product_id', 'related_id', 'count', 'max_count')
+
+    return [(product_id, related_id, count / max_count) for product_id, related_id, count, max_count in rows]
@@ -0,0 +1,241 @@
+"""
+Búsqueda facetada del catálogo (categoría, rango de precio, stock y rating).
+
+Todos los conteos salen de UNA consulta: se agrupa el catálogo (ya filtrado
+por texto) por (categoría, rango de precio, hay stock, rating) y el resto se
+suma en Python. Como el cubo tiene pocas filas (categorías x 5 x 2 x 5), cada
+faceta se cuenta con los filtros de las demás facetas pero no con el suyo,
+que es lo que espera el frontend para poder combinar opciones.
+"""
+
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Avg, Case, Count, IntegerField, OuterRef, Q, Subquery, Value, When
+
+from reviews.models import Review
+
+
+# Rangos de precio en Bs: (clave, desde, hasta) con "hasta" excluido
+PRICE_RANGES = [
+    ('0-100', None, Decimal('100')),
+    ('100-500', Decimal('100'), Decimal('500')),
+    ('500-1000', Decimal('500'), Decimal('1000')),
+    ('1000-5000', Decimal('1000'), Decimal('5000')),
+    ('5000+', Decimal('5000'), None),
+]
+
+# Opciones de "rating mínimo" (promedio de reseñas, 4 = 4 estrellas o más)
+RATING_OPTIONS = [4, 3, 2, 1]
+
+FACETS = ('category', 'price_range', 'in_stock', 'min_rating')
+
+
+def _price_range_q(key):
+    for range_key, low, high in PRICE_RANGES:
+        if range_key == key:
+            q = Q()
+            if low is not None:
+                q &= Q(price__gte=low)
+            if high is not None:
+                q &= Q(price__lt=high)
+            return q
+    return None
+
+
+def _price_bucket():
+    return Case(
+        *[
+            When(_price_range_q(key), then=Value(index))
+            for index, (key, _, _) in enumerate(PRICE_RANGES)
+        ],
+        output_field=IntegerField(),
+    )
+
+
+def _rating_bucket():
+    # 0 = sin reseñas; n = promedio >= n
+    return Case(
+        *[When(avg_rating__gte=rating, then=Value(rating)) for rating in RATING_OPTIONS],
+        default=Value(0),
+        output_field=IntegerField(),
+    )
+
+
+def with_avg_rating(queryset):
+    """
+    Anota el rating promedio con una subconsulta (no multiplica filas como un join)
+    """
+    average = Review.objects.filter(product=OuterRef('pk')).order_by().values('product').annotate(
+        value=Avg('rating')
+    ).values('value')
+    return queryset.annotate(avg_rating=Subquery(average))
+
+
+def parse_filters(params):
+    """
+    Lee los filtros facetados de los query params
+
+    Acepta valores separados por coma en category y price_range
+    (?category=1,3&price_range=0-100,100-500&in_stock=true&min_rating=4)
+
+    Returns:
+        Diccionario solo con los filtros presentes y válidos
+    """
+    filters = {}
+
+    categories = [value for value in params.get('category', '').split(',') if value.strip().isdigit()]
+    if categories:
+        filters['category'] = sorted({int(value) for value in categories})
+
+    price_ranges = [value for value in params.get('price_range', '').split(',') if _price_range_q(value)]
+    if price_ranges:
+        filters['price_range'] = price_ranges
+
+    # Rango libre, además de los rangos fijos
+    for param in ('min_price', 'max_price'):
+        try:
+            value = Decimal(params[param]) if params.get(param) else None
+        except InvalidOperation:
+            continue
+        # nan / Infinity son Decimal válidos pero no precios: se ignoran igual que el resto
+        if value is not None and value.is_finite():
+            filters[param] = value
+
+    if params.get('in_stock') == 'true':
+        filters['in_stock'] = True
+
+    if params.get('min_rating', '').isdigit() and int(params['min_rating']) in RATING_OPTIONS:
+        filters['min_rating'] = int(params['min_rating'])
+
+    return filters
+
+
+def _filter_q(facet, value):
+    if facet == 'category':
+        return Q(category_id__in=value)
+    if facet == 'price_range':
+        q = Q()
+        for key in value:
+            q |= _price_range_q(key)
+        return q
+    if facet == 'min_price':
+        return Q(price__gte=value)
+    if facet == 'max_price':
+        return Q(price__lte=value)
+    if facet == 'in_stock':
+        return Q(stock__gt=0)
+    if facet == 'min_rating':
+        return Q(avg_rating__gte=value)
+    raise ValueError(f'Faceta desconocida: {facet}')
+
+
+def apply_filters(queryset, filters):
+    if 'min_rating' in filters:
+        queryset = with_avg_rating(queryset)
+    for facet, value in filters.items():
+        queryset = queryset.filter(_filter_q(facet, value))
+    return queryset
+
+
+def _matches(cell, facet, value):
+    if facet == 'category':
+        return cell['category_id'] in value
+    if facet == 'price_range':
+        return PRICE_RANGES[cell['price_bucket']][0] in value
+    if facet == 'in_stock':
+        return cell['in_stock']
+    if facet == 'min_rating':
+        return cell['rating_bucket'] >= value
+    return True
+
+
+def compute_facets(queryset, filters):
+    """
+    Conteos de cada faceta en una sola consulta
+
+    Args:
+        queryset: Catálogo sin los filtros facetados (solo búsqueda de texto)
+        filters: Salida de parse_filters
+
+    Returns:
+        Diccionario {faceta: [{'value', 'label', 'count', 'selected'}, ...]}
+    """
+    # min_price/max_price no tienen faceta propia: se aplican directo en la base
+    for facet in ('min_price', 'max_price'):
+        if facet in filters:
+            queryset = queryset.filter(_filter_q(facet, filters[facet]))
+
+    cells = list(
+        with_avg_rating(queryset.order_by()).annotate(
+            price_bucket=_price_bucket(),
+            in_stock=Case(When(stock__gt=0, then=Value(True)), default=Value(False)),
+            rating_bucket=_rating_bucket(),
+        ).values(
+            'category_id', 'category__name', 'price_bucket', 'in_stock', 'rating_bucket'
+        ).annotate(count=Count('id')).order_by()
+    )
+
+    def count_by(facet, key):
+        # Cuenta con todos los filtros salvo el de la propia faceta
+        counts = defaultdict(int)
+        for cell in cells:
+            if all(
+                _matches(cell, other, value)
+                for other, value in filters.items()
+                if other != facet and other in FACETS
+            ):
+                for value in key(cell):
+                    counts[value] += cell['count']
+        return counts
+
+    category_names = {cell['category_id']: cell['category__name'] for cell in cells}
+    category_counts = count_by('category', lambda cell: [cell['category_id']])
+    price_counts = count_by('price_range', lambda cell: [PRICE_RANGES[cell['price_bucket']][0]])
+    stock_counts = count_by('in_stock', lambda cell: [True] if cell['in_stock'] else [])
+    # El rating es acumulativo: un producto de 4.5 cuenta en 4+, 3+, 2+ y 1+
+    rating_counts = count_by(
+        'min_rating',
+        lambda cell: [rating for rating in RATING_OPTIONS if cell['rating_bucket'] >= rating],
+    )
+
+    return {
+        'category': sorted(
+            [
+                {
+                    'value': category_id,
+                    'label': category_names[category_id],
+                    'count': count,
+                    'selected': category_id in filters.get('category', []),
+                }
+                for category_id, count in category_counts.items()
+            ],
+            key=lambda option: (-option['count'], option['label']),
+        ),
+        'price_range': [
+            {
+                'value': key,
+                'label': key,
+                'count': price_counts.get(key, 0),
+                'selected': key in filters.get('price_range', []),
+            }
+            for key, _, _ in PRICE_RANGES
+        ],
+        'in_stock': [
+            {
+                'value': True,
+                'label': 'En stock',
+                'count': stock_counts.get(True, 0),
+                'selected': filters.get('in_stock', False),
+            }
+        ],
+        'min_rating': [
+            {
+                'value': rating,
+                'label': f'{rating}+ ⭐',
+                'count': rating_counts.get(rating, 0),
+                'selected': filters.get('min_rating') == rating,
+            }
+            for rating in RATING_OPTIONS
+        ],
+    }
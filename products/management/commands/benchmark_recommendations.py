@@ -0,0 +1,67 @@
+# products/management/commands/benchmark_recommendations.py
+import json
+import os
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from products.benchmarks import run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo de ajuste, latencia, memoria y precision@K del recomendador sobre catálogos sintéticos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='Tamaños de catálogo separados por coma')
+        parser.add_argument('--queries', type=int, default=500, help='Consultas medidas por tamaño')
+        parser.add_argument('--top-k', type=int, default=settings.RECOMMENDATIONS_TOP_K, help='Vecinos por producto')
+        parser.add_argument('--k', type=int, default=5, help='K de precision@K')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Ruta del reporte JSON (por defecto en var/benchmarks/)')
+        # Uso interno: cada tamaño corre en su propio proceso para medir bien el pico de RSS
+        parser.add_argument('--single', type=int, help='Ejecutar un solo tamaño y escribir el resultado en stdout')
+
+    def handle(self, *args, **options):
+        params = {key: options[key] for key in ('queries', 'top_k', 'k', 'seed')}
+
+        if options['single']:
+            self.stdout.write(json.dumps(run_benchmark(options['single'], **params)))
+            return
+
+        results = []
+        for size in [int(value) for value in options['sizes'].split(',')]:
+            self.stdout.write(f'⏱️  Catálogo de {size} productos...')
+            output = subprocess.run(
+                [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'benchmark_recommendations',
+                 '--single', str(size)] + [f'--{key.replace("_", "-")}={value}' for key, value in params.items()],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            self.stdout.write(
+                f"   ajuste {result['fit_seconds']}s · vecinos {result['neighbors_seconds']}s · "
+                f"p99 índice {result['latency_ms']['index']['p99']}ms · RSS {result['peak_rss_mb']} MB · "
+                f"precision@{result['k']} {result['quality'].get('hybrid', {}).get('precision_at_k')}"
+            )
+
+        report = {
+            'generated_at': timezone.now().isoformat(),
+            'settings': {
+                'content_weight': settings.RECOMMENDATIONS_CONTENT_WEIGHT,
+                'copurchase_weight': settings.RECOMMENDATIONS_COPURCHASE_WEIGHT,
+                **params,
+            },
+            'results': results,
+        }
+
+        path = options['output'] or os.path.join(
+            settings.BASE_DIR, 'var', 'benchmarks', f"recommendations-{timezone.now():%Y%m%d-%H%M%S}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Reporte guardado en {path}'))
@@ -0,0 +1,123 @@
+# products/management/commands/benchmark_serializers.py
+import random
+import statistics
+import time
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from orders.models import Order, OrderItem
+from orders.serializers import OrderSerializer, OrderFastSerializer
+from products.models import Category, Product
+from products.serializers import ProductSerializer, ProductFastSerializer
+from utils.prefetch import plan_queryset
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara ProductSerializer/OrderSerializer con sus versiones rápidas (values()): '
+        'verifica que la salida sea idéntica byte a byte y mide el tiempo por página'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-sizes', default='10,50,100', help='Tamaños de página separados por coma')
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por medición')
+        parser.add_argument(
+            '--synthetic', type=int, default=0,
+            help='Crear N productos y órdenes de prueba dentro de una transacción que se revierte al final',
+        )
+
+    def handle(self, *args, **options):
+        page_sizes = [int(value) for value in options['page_sizes'].split(',')]
+        try:
+            with transaction.atomic():
+                if options['synthetic']:
+                    self._create_synthetic(options['synthetic'])
+                self._run(page_sizes, options['repeat'])
+                if options['synthetic']:
+                    raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, page_sizes, repeat):
+        request = Request(RequestFactory().get('/api/store/products/'))
+        context = {'request': request}
+        renderer = JSONRenderer()
+        endpoints = [
+            ('ProductListView', Product.objects.order_by('-created_at', '-id'), ProductSerializer, ProductFastSerializer),
+            ('UserOrderListView', Order.objects.order_by('-created_at', '-id'), OrderSerializer, OrderFastSerializer),
+        ]
+
+        for name, queryset, serializer_class, fast_serializer in endpoints:
+            for page_size in page_sizes:
+                def drf():
+                    objects = list(plan_queryset(queryset, serializer_class)[:page_size])
+                    return serializer_class(objects, many=True, context=context).data
+
+                def fast():
+                    rows = list(fast_serializer.values(queryset)[:page_size])
+                    return fast_serializer.serialize(rows, request)
+
+                # Contrato: misma salida byte a byte
+                drf_bytes, fast_bytes = renderer.render(drf()), renderer.render(fast())
+                if drf_bytes != fast_bytes:
+                    raise CommandError(
+                        f'❌ {name} (página de {page_size}): la salida rápida difiere del serializer DRF\n'
+                        f'DRF:    {drf_bytes[:300]!r}\nrápido: {fast_bytes[:300]!r}'
+                    )
+
+                drf_ms, fast_ms = self._time(drf, repeat), self._time(fast, repeat)
+                rows = len(fast())
+                self.stdout.write(
+                    f'✅ {name} · {rows} filas · DRF {drf_ms:.2f} ms · rápido {fast_ms:.2f} ms · '
+                    f'x{drf_ms / fast_ms:.1f}'
+                )
+
+    @staticmethod
+    def _time(function, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            function()
+            samples.append((time.perf_counter() - start) * 1000)
+        return statistics.median(samples)
+
+    def _create_synthetic(self, count):
+        rng = random.Random(42)
+        self.stdout.write(f'🧪 Creando {count} productos y {count} órdenes de prueba (se revierten al final)...')
+        categories = Category.objects.bulk_create(
+            [Category(name=f'Categoría {index}', description='Prueba', image=f'categories/{index}.jpg') for index in range(5)]
+        )
+        products = Product.objects.bulk_create([
+            Product(
+                name=f'Producto {index}',
+                description='Descripción de prueba con acentos: canción, ñandú',
+                price=Decimal(rng.randint(100, 500000)) / 100,
+                stock=rng.randint(0, 100),
+                image=f'products/producto {index}.jpg' if index % 3 else '',
+                category=rng.choice(categories),
+            )
+            for index in range(count)
+        ])
+        user = get_user_model().objects.create_user(
+            username='benchmark_serializers', email='benchmark@example.com', password=None,
+            first_name='Ana', last_name='Pérez',
+        )
+        orders = Order.objects.bulk_create([
+            Order(user=user, total_price=Decimal('0'), shipping_address='Calle 1', status='pending')
+            for _ in range(count)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=product, quantity=rng.randint(1, 3), price=product.price)
+            for order in orders
+            for product in rng.sample(products, 3)
+        ])
@@ -0,0 +1,31 @@
+# products/management/commands/build_copurchases.py
+from django.core.management.base import BaseCommand
+
+from jobs.runner import enqueue
+from products.copurchase import build_copurchase_counts
+
+
+class Command(BaseCommand):
+    help = 'Recalcula la matriz de productos comprados juntos a partir de las órdenes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Líneas de orden leídas por lote',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Encolar el recálculo para el worker en lugar de ejecutarlo ahora',
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            enqueue('copurchases.rebuild')
+            self.stdout.write(self.style.SUCCESS('✅ Recálculo de co-compras encolado'))
+            return
+
+        total = build_copurchase_counts(chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Matriz de co-compras generada con {total} pares'))
@@ -0,0 +1,32 @@
+# products/management/commands/build_recommendations.py
+from django.core.management.base import BaseCommand
+from django.conf import settings
+
+from jobs.runner import enqueue
+from products.recommendations import build_recommendation_index
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye el índice de productos relacionados (top-K vecinos por producto)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--top-k',
+            type=int,
+            default=settings.RECOMMENDATIONS_TOP_K,
+            help='Número de vecinos a guardar por producto',
+        )
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Encolar la reconstrucción para el worker en lugar de ejecutarla ahora',
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            enqueue('recommendations.rebuild', top_k=options['top_k'])
+            self.stdout.write(self.style.SUCCESS('✅ Reconstrucción del índice encolada'))
+            return
+
+        total = build_recommendation_index(top_k=options['top_k'])
+        self.stdout.write(self.style.SUCCESS(f'✅ Índice de recomendaciones generado para {total} productos'))
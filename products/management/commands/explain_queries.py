@@ -0,0 +1,134 @@
+# products/management/commands/explain_queries.py
+import json
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from orders.models import Order
+from products.models import Category, Product
+
+
+class _Rollback(Exception):
+    pass
+
+
+# Endpoints calientes: (nombre, URL, requiere admin). {product}, {category} y
+# {order} se reemplazan por ids reales.
+ENDPOINTS = [
+    ('Listado de productos', '/api/store/products/', False),
+    ('Productos por categoría', '/api/store/products/?category={category}', False),
+    ('Productos con cursor', '/api/store/products/?cursor=', False),
+    ('Detalle de producto', '/api/store/products/{product}/', False),
+    ('Reseñas de un producto', '/api/reviews/product/{product}/', False),
+    ('Mis órdenes', '/api/orders/', True),
+    ('Órdenes (admin)', '/api/orders/admin/orders/', True),
+    ('Órdenes pendientes (admin)', '/api/orders/admin/orders/?status=pending', True),
+    ('Detalle de orden (admin)', '/api/orders/admin/orders/{order}/', True),
+    ('Estadísticas de órdenes', '/api/orders/admin/orders/stats/', True),
+    ('Movimientos de inventario', '/api/store/admin/inventory/movements/?cursor=', True),
+    ('Alertas de stock bajo', '/api/store/admin/inventory/alerts/low-stock/', True),
+    ('Dashboard', '/api/store/admin/dashboard/stats/', True),
+    ('Analítica de ventas (365 días)', '/api/orders/admin/analytics/sales/?days=365', True),
+]
+
+# SQLite: "SCAN tabla" es un recorrido completo; "SCAN tabla USING INDEX x" recorre el índice en orden
+_SQLITE_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN sobre las consultas de cada endpoint caliente y marca los escaneos secuenciales'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--min-rows', type=int, default=1000,
+            help='PostgreSQL: ignorar Seq Scan de tablas estimadas en menos filas (para tablas chicas es lo correcto)',
+        )
+        parser.add_argument(
+            '--no-seqscan', action='store_true',
+            help='PostgreSQL: SET enable_seqscan = off para ver si existe un índice utilizable',
+        )
+        parser.add_argument('--sql', action='store_true', help='Mostrar el SQL de cada consulta marcada')
+        parser.add_argument('--fail', action='store_true', help='Terminar con error si hay escaneos secuenciales')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Base de datos no soportada: {connection.vendor}')
+
+        flagged = 0
+        try:
+            # Todo dentro de una transacción que se revierte (usuario admin temporal, etc.)
+            with transaction.atomic():
+                flagged = self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+        if flagged:
+            message = f'⚠️  {flagged} consultas con escaneo secuencial'
+            if options['fail']:
+                raise CommandError(message)
+            self.stdout.write(self.style.WARNING(message))
+        else:
+            self.stdout.write(self.style.SUCCESS('✅ Ninguna consulta hace escaneo secuencial'))
+
+    def _run(self, options):
+        admin = get_user_model().objects.create_user(
+            username='explain_queries_admin', email='explain_queries@example.com', password=None,
+            is_staff=True, is_superuser=True,
+        )
+        client = APIClient()
+        ids = {
+            'product': Product.objects.values_list('id', flat=True).first() or 0,
+            'category': Category.objects.values_list('id', flat=True).first() or 0,
+            'order': Order.objects.values_list('id', flat=True).first() or 0,
+        }
+        if options['no_seqscan'] and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+        flagged = 0
+        # Sin caché de respuestas: queremos ver las consultas reales
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}):
+            for name, url, needs_admin in ENDPOINTS:
+                client.force_authenticate(admin if needs_admin else None)
+                with CaptureQueriesContext(connection) as context:
+                    response = client.get(url.format(**ids))
+                    if getattr(response, 'streaming', False):
+                        b''.join(response.streaming_content)
+
+                selects = [query['sql'] for query in context.captured_queries if query['sql'].lstrip().upper().startswith('SELECT')]
+                self.stdout.write(f'\n🔎 {name} ({url}) → {response.status_code}, {len(selects)} consultas')
+                for sql in selects:
+                    scans = self._sequential_scans(sql, options['min_rows'])
+                    if scans:
+                        flagged += 1
+                        self.stdout.write(self.style.WARNING(f'   ⚠️  Escaneo secuencial: {", ".join(scans)}'))
+                        if options['sql']:
+                            self.stdout.write(f'      {sql}')
+        return flagged
+
+    def _sequential_scans(self, sql, min_rows):
+        with connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                return [
+                    f"{node['Relation Name']} (~{node['Plan Rows']} filas)"
+                    for node in self._walk(plan[0]['Plan'])
+                    if node['Node Type'] == 'Seq Scan' and node['Plan Rows'] >= min_rows
+                ]
+
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            # Filas (id, padre, notused, detalle)
+            return [match.group(1) for *_, detail in cursor.fetchall() if (match := _SQLITE_SCAN.match(detail))]
+
+    def _walk(self, node):
+        yield node
+        for child in node.get('Plans', []):
+            yield from self._walk(child)
@@ -0,0 +1,38 @@
+# Generated by Django 5.2 on 2026-10-18 11:02
+
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+# Índice de trigramas para el autocompletado (operador <% de pg_trgm). En
+# SQLite no hace nada y se usa el índice de trigramas en memoria.
+CREATE_TRIGRAM_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS products_product_name_trgm
+    ON products_product USING gin (name gin_trgm_ops);
+"""
+
+DROP_TRIGRAM_INDEX_SQL = """
+DROP INDEX IF EXISTS products_product_name_trgm;
+"""
+
+
+def create_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(CREATE_TRIGRAM_INDEX_SQL)
+
+
+def drop_trigram_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(DROP_TRIGRAM_INDEX_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('products', '0007_product_search_vector'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.RunPython(create_trigram_index, drop_trigram_index),
+    ]
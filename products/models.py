@@ -1,15 +1,23 @@
 from django.db import models
 from django.conf import settings 
+from django.contrib.postgres.search import SearchVectorField
 
 
 class Category(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     image = models.ImageField(upload_to='categories/', null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
 
+class ProductManager(models.Manager):
+    def get_queryset(self):
+        # El tsvector solo se usa dentro de la base para buscar; no viajar con cada producto
+        return super().get_queryset().defer('search_vector')
+
+
 class Product(models.Model):
     name = models.CharField(max_length=200)
     description = models.TextField()
@@ -18,6 +26,22 @@ class Product(models.Model):
     image = models.ImageField(upload_to='products/', null=True, blank=True)
     category = models.ForeignKey(Category, related_name='products', on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Para ETag / Last-Modified (ojo: queryset.update() no lo actualiza solo)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+    # tsvector (nombre peso A + descripción peso B) que mantiene un trigger en PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    objects = ProductManager()
+
+    class Meta:
+        indexes = [
+            # Listado por defecto y paginación por cursor (created_at, id)
+            models.Index(fields=['-created_at', '-id'], name='product_created_idx'),
+            # Listado filtrado por categoría
+            models.Index(fields=['category', '-created_at'], name='product_category_created_idx'),
+            # Alertas de stock bajo (stock < 10): índice parcial, solo las filas que interesan
+            models.Index(fields=['stock'], name='product_low_stock_idx', condition=models.Q(stock__lt=10)),
+        ]
 
     def __str__(self):
         return self.name
@@ -50,6 +74,44 @@ class InventoryMovement(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='movement_created_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.movement_type} - {self.product.name} - {self.quantity}"
\ No newline at end of file
+        return f"{self.movement_type} - {self.product.name} - {self.quantity}"
+
+
+class ProductCoPurchase(models.Model):
+    """
+    Veces que dos productos se compraron en la misma orden (matriz dispersa:
+    solo existen los pares que alguna vez se compraron juntos, en ambos sentidos)
+    """
+    product = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='copurchases')
+    related = models.ForeignKey('Product', on_delete=models.CASCADE, related_name='+')
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ['product', 'related']
+        indexes = [
+            models.Index(fields=['product', '-count'], name='copurchase_product_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id} + {self.related_id}: {self.count}"
+
+
+class RecommendationIndexVersion(models.Model):
+    """
+    Versión publicada del índice de recomendaciones (products/recommendations.py)
+
+    Los arreglos van empaquetados en la base para que la web y el worker vean la
+    misma versión aunque no compartan disco. Cada proceso la desempaqueta una
+    vez en RECOMMENDATIONS_DIR y la abre con mmap.
+    """
+    version = models.CharField(max_length=64, unique=True)
+    archive = models.BinaryField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.version
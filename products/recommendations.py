@@ -1,38 +1,542 @@
 # products/recommendations.py
+"""
+Recomendaciones de productos relacionados.
+
+La ruta de lectura (load_index / get_recommended_products) solo necesita numpy
+y los artefactos publicados. scipy, scikit-learn y nltk se importan
+recién al construir o actualizar el modelo, para no cargarlos en cada worker.
+
+Cada versión se publica en la base (RecommendationIndexVersion): el worker
+que la construye y la web que la sirve no comparten disco. RECOMMENDATIONS_DIR
+es solo la copia local desempaquetada de cada proceso.
+"""
+import functools
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+import zipfile
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from jobs.runner import enqueue
+from .copurchase import copurchase_scores
+from .models import Product, RecommendationIndexVersion
+from . import similarity
+
+# Lista manual por si NLTK no está disponible o no tiene los datos
+SPANISH_STOPWORDS = [
+    'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'ser', 'se', 'no', 
+    'haber', 'por', 'con', 'su', 'para', 'como', 'estar', 'tener', 
+    'le', 'lo', 'todo', 'pero', 'más', 'hacer', 'o', 'poder', 'decir',
+    'este', 'ir', 'otro', 'ese', 'la', 'si', 'me', 'ya', 'ver', 'porque',
+    'dar', 'cuando', 'él', 'muy', 'sin', 'vez', 'mucho', 'saber', 'qué',
+    'sobre', 'mi', 'alguno', 'mismo', 'yo', 'también', 'hasta', 'año',
+    'dos', 'querer', 'entre', 'así', 'primero', 'desde', 'grande', 'eso',
+    'ni', 'nos', 'llegar', 'pasar', 'tiempo', 'ella', 'sí', 'día', 'uno',
+    'bien', 'poco', 'deber', 'entonces', 'poner', 'cosa', 'tanto', 'hombre',
+    'parecer', 'nuestro', 'tan', 'donde', 'ahora', 'parte', 'después', 'vida',
+    'quedar', 'siempre', 'creer', 'hablar', 'llevar', 'dejar', 'nada', 'cada',
+    'seguir', 'menos', 'nuevo', 'encontrar', 'algo', 'solo', 'decir', 'casa',
+    'usar', 'tal', 'allí', 'sólo', 'escribir', 'madre', 'padre', 'trabajar',
+    'mes', 'pedir', 'hora', 'gente', 'estar', 'tener', 'los', 'las', 'del',
+    'al', 'una', 'unos', 'unas', 'estos', 'estas', 'esos', 'esas', 'aquel',
+    'aquella', 'aquellos', 'aquellas'
+]
+
+
+@functools.lru_cache(maxsize=None)
+def _spanish_stopwords():
+    # ✅ Manejo seguro de NLTK con fallback
+    try:
+        from nltk.corpus import stopwords
+        return stopwords.words('spanish')
+    except (ImportError, LookupError):
+        return SPANISH_STOPWORDS
+
+
+# Artefactos del modelo: arreglos .npy sin pickle, que se abren con mmap en
+# solo lectura para que todos los workers de gunicorn compartan las mismas páginas
+INDEX_ARRAYS = ('product_ids', 'neighbors', 'scores')
+MATRIX_ARRAYS = ('tfidf_data', 'tfidf_indices', 'tfidf_indptr')
+VOCABULARY_ARRAYS = ('vocabulary', 'idf')
+META_FILENAME = 'meta.json'
+
+# Cada construcción se desempaqueta en versions/<versión>/; la publicada es la
+# última fila de RecommendationIndexVersion
+VERSIONS_DIRNAME = 'versions'
+KEEP_VERSIONS = 3
+
+# Mínimo de tokens nuevos antes de evaluar la deriva del vocabulario
+MIN_DRIFT_TOKENS = 200
+
+# Productos leídos por lote al armar el corpus
+CORPUS_CHUNK_SIZE = 2000
+
+# Caché del índice por proceso: se recarga solo cuando se publica otra versión
+_index_cache = {'version': None, 'index': None}
+_index_lock = threading.RLock()
+
+
+def _versions_dir():
+    return os.path.join(settings.RECOMMENDATIONS_DIR, VERSIONS_DIRNAME)
+
+
+def _model_path(version, filename):
+    return os.path.join(_versions_dir(), version, filename)
+
+
+def _load_arrays(version, names):
+    return {name: np.load(_model_path(version, f'{name}.npy'), mmap_mode='r') for name in names}
+
+
+def current_version():
+    """
+    Versión del modelo publicada actualmente (None si nunca se construyó)
+    """
+    return RecommendationIndexVersion.objects.order_by('-id').values_list('version', flat=True).first()
+
+
+def _ensure_local(version):
+    """
+    Desempaqueta la versión publicada en el disco de este proceso si todavía no está
+    """
+    path = os.path.join(_versions_dir(), version)
+    if os.path.isdir(path):
+        return
+    archive = RecommendationIndexVersion.objects.values_list('archive', flat=True).get(version=version)
+
+    os.makedirs(_versions_dir(), exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=_versions_dir(), prefix='.tmp-')
+    try:
+        with zipfile.ZipFile(io.BytesIO(bytes(archive))) as f:
+            f.extractall(tmp_dir)
+        os.rename(tmp_dir, path)
+    except OSError:
+        # Otro worker de gunicorn la desempaquetó al mismo tiempo
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        if not os.path.isdir(path):
+            raise
+    _prune_versions(keep=version)
+
+
+def _iter_corpus(product_ids=None, chunk_size=CORPUS_CHUNK_SIZE):
+    """
+    Genera el texto de cada producto (nombre + descripción + categoría)
+
+    Lee la base por lotes con values_list (la categoría viene en el mismo
+    JOIN), así que no se instancian modelos ni se cargan todos los productos
+    en memoria a la vez.
+
+    Args:
+        product_ids: Limitar el corpus a estos productos (None = todo el catálogo)
+        chunk_size: Filas leídas por lote
+
+    Yields:
+        Tuplas (id, contenido) en orden ascendente de id
+    """
+    queryset = Product.objects.all()
+    if product_ids is not None:
+        queryset = queryset.filter(id__in=list(product_ids))
+
+    rows = queryset.order_by('id').values_list(
+        'id', 'name', 'description', 'category__name'
+    ).iterator(chunk_size=chunk_size)
+
+    for product_id, name, description, category in rows:
+        yield product_id, f"{name} {description or ''} {category or ''}"
+
+
+def _make_vectorizer():
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    # Vectorizar texto con stopwords
+    return TfidfVectorizer(
+        stop_words=_spanish_stopwords(),
+        max_features=1000,  # Limitar features para mejor rendimiento
+        ngram_range=(1, 2),  # Usar unigramas y bigramas
+        dtype=np.float32  # La mitad de memoria que float64, suficiente para coseno
+    )
+
+
+def _oov_stats(vectorizer, documents):
+    """
+    Cuenta cuántos tokens de los documentos quedan fuera del vocabulario ajustado
+
+    Returns:
+        Tupla (tokens fuera de vocabulario, tokens totales)
+    """
+    analyzer = vectorizer.build_analyzer()
+    vocabulary = vectorizer.vocabulary_
+    oov = total = 0
+    for document in documents:
+        tokens = analyzer(document)
+        total += len(tokens)
+        oov += sum(1 for token in tokens if token not in vocabulary)
+    return oov, total
+
+
+def _top_k_neighbors(tfidf_matrix, rows, product_ids, k):
+    """
+    Calcula los k vecinos más similares de las filas indicadas
+
+    Returns:
+        Tupla (ids de vecinos, scores), rellenadas con -1 / 0 cuando no hay más
+    """
+    columns, scores = similarity.top_k_neighbors(tfidf_matrix, rows, k)
+    neighbors = np.where(columns >= 0, product_ids[columns], -1)
+    return neighbors, scores
+
+
+def build_recommendation_index(top_k=None):
+    """
+    Ajusta el modelo TF-IDF sobre todo el catálogo y guarda en disco
+    los top-K vecinos de cada producto
+
+    Args:
+        top_k: Número de vecinos a guardar por producto
+
+    Returns:
+        Número de productos indexados
+    """
+    from scipy import sparse
+
+    top_k = top_k or settings.RECOMMENDATIONS_TOP_K
+
+    # Los textos van directo del cursor al vectorizador; solo se guardan los ids
+    product_ids = []
+
+    def documents():
+        for product_id, content in _iter_corpus():
+            product_ids.append(product_id)
+            yield content
+
+    vectorizer = _make_vectorizer()
+    try:
+        tfidf_matrix = vectorizer.fit_transform(documents())
+        # Segunda pasada en streaming para la proporción base de tokens fuera de vocabulario
+        oov, total = _oov_stats(vectorizer, (content for _, content in _iter_corpus()))
+    except ValueError:
+        # Catálogo vacío o sin términos útiles: no hay vocabulario que ajustar
+        vectorizer = None
+        tfidf_matrix = sparse.csr_matrix((len(product_ids), 0))
+        oov, total = 0, 0
+
+    ids = np.asarray(product_ids, dtype=np.int64)
+
+    neighbors, scores = _top_k_neighbors(tfidf_matrix, np.arange(len(ids)), ids, top_k)
+
+    meta = {
+        'baseline_oov_ratio': oov / total if total else 0.0,
+        'oov_tokens': 0,
+        'total_tokens': 0,
+    }
+
+    with _index_lock:
+        _save_model(ids, neighbors, scores, tfidf_matrix, vectorizer, meta)
+    return len(ids)
+
+
+def _save_model(product_ids, neighbors, scores, tfidf_matrix, vectorizer, meta):
+    """
+    Guarda el modelo completo como una versión nueva y la publica
+
+    Los archivos se escriben en un directorio temporal que recién se renombra
+    cuando está completo; luego se publican en la base en una sola fila, así que
+    las vistas ven la versión anterior o la nueva, nunca un índice a medias.
+    """
+    from scipy import sparse
+
+    os.makedirs(_versions_dir(), exist_ok=True)
+    version = f"{datetime.now():%Y%m%d%H%M%S%f}-{uuid.uuid4().hex[:6]}"
+
+    tmp_dir = tempfile.mkdtemp(dir=_versions_dir(), prefix='.tmp-')
+    try:
+        tfidf_matrix = sparse.csr_matrix(tfidf_matrix)
+        if vectorizer is not None:
+            vocabulary, idf = vectorizer.get_feature_names_out().astype(str), vectorizer.idf_
+        else:
+            vocabulary, idf = np.empty(0, dtype=str), np.empty(0, dtype=np.float64)
+        arrays = {
+            'product_ids': product_ids,
+            'neighbors': neighbors,
+            'scores': scores,
+            'tfidf_data': tfidf_matrix.data,
+            'tfidf_indices': tfidf_matrix.indices,
+            'tfidf_indptr': tfidf_matrix.indptr,
+            'vocabulary': vocabulary,
+            'idf': idf,
+        }
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), np.ascontiguousarray(array), allow_pickle=False)
+
+        meta = dict(meta, n_features=tfidf_matrix.shape[1])
+        with open(os.path.join(tmp_dir, META_FILENAME), 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        archive = _pack(tmp_dir)
+        os.rename(tmp_dir, os.path.join(_versions_dir(), version))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+    _publish(version, archive)
+    _prune_versions(keep=version)
+
+
+def _pack(directory):
+    # Sin compresión: los .npy son casi todo floats y enteros que no comprimen
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as f:
+        for name in sorted(os.listdir(directory)):
+            f.write(os.path.join(directory, name), name)
+    return buffer.getvalue()
+
+
+def _publish(version, archive):
+    RecommendationIndexVersion.objects.create(version=version, archive=archive)
+    # Las versiones anteriores quedan un rato: un proceso puede estar desempaquetándolas
+    old = RecommendationIndexVersion.objects.order_by('-id').values_list('id', flat=True)[KEEP_VERSIONS:]
+    RecommendationIndexVersion.objects.filter(id__in=list(old)).delete()
+
+
+def _prune_versions(keep):
+    """
+    Borra las versiones viejas, dejando las KEEP_VERSIONS más recientes
+    (un worker puede seguir leyendo la anterior mientras recarga)
+    """
+    if not os.path.isdir(_versions_dir()):
+        return
+    versions = sorted(name for name in os.listdir(_versions_dir()) if not name.startswith('.'))
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(_versions_dir(), name), ignore_errors=True)
+
+
+def _load_vectorizer(vocabulary, idf):
+    """
+    Rearma el TfidfVectorizer ajustado a partir de su vocabulario e idf guardados
+    """
+    if len(vocabulary) == 0:
+        return None
+    vectorizer = _make_vectorizer()
+    vectorizer.vocabulary_ = {term: i for i, term in enumerate(vocabulary.tolist())}
+    vectorizer.idf_ = np.asarray(idf)
+    return vectorizer
+
+
+def _load_model(version):
+    from scipy import sparse
+
+    _ensure_local(version)
+    with open(_model_path(version, META_FILENAME), encoding='utf-8') as f:
+        meta = json.load(f)
+    index = _load_arrays(version, INDEX_ARRAYS)
+    matrix = _load_arrays(version, MATRIX_ARRAYS)
+    vocabulary = _load_arrays(version, VOCABULARY_ARRAYS)
+
+    tfidf_matrix = sparse.csr_matrix(
+        (matrix['tfidf_data'], matrix['tfidf_indices'], matrix['tfidf_indptr']),
+        shape=(len(index['product_ids']), meta['n_features']),
+    )
+    return (
+        index['product_ids'],
+        index['neighbors'],
+        index['scores'],
+        tfidf_matrix,
+        _load_vectorizer(vocabulary['vocabulary'], vocabulary['idf']),
+        meta,
+    )
+
+
+def _empty_index():
+    k = settings.RECOMMENDATIONS_TOP_K
+    return {
+        'product_ids': np.empty(0, dtype=np.int64),
+        'neighbors': np.empty((0, k), dtype=np.int64),
+        'scores': np.empty((0, k), dtype=np.float32),
+    }
+
+
+def sync_products(product_ids):
+    """
+    Actualiza el índice de forma incremental para los productos indicados
+
+    Cada id se reindexa según su estado actual en la base de datos: los
+    productos nuevos o editados se vectorizan con el vocabulario ya ajustado
+    y los que ya no existen se eliminan. Solo se recalculan las listas de
+    vecinos afectadas. Si el vocabulario deriva demasiado respecto al último
+    ajuste completo, se reconstruye todo el índice.
+
+    Args:
+        product_ids: Ids de productos creados, editados o eliminados
+    """
+    from scipy import sparse
+
+    product_ids = set(product_ids)
+    if not product_ids:
+        return
+
+    with _index_lock:
+        version = current_version()
+        if version is None:
+            # Sin índice previo: se construirá completo en el primer uso
+            return
+
+        ids, neighbors, scores, tfidf_matrix, vectorizer, meta = _load_model(version)
+        k = neighbors.shape[1]
+
+        if vectorizer is None:
+            build_recommendation_index(top_k=k)
+            return
+
+        corpus = list(_iter_corpus(product_ids))
+        updated_ids = np.asarray([product_id for product_id, _ in corpus], dtype=np.int64)
+        content = [text for _, text in corpus]
+
+        # Deriva del vocabulario: tokens nuevos que el modelo no conoce
+        oov, total = _oov_stats(vectorizer, content)
+        meta['oov_tokens'] += oov
+        meta['total_tokens'] += total
+        if meta['total_tokens'] >= MIN_DRIFT_TOKENS:
+            drift = meta['oov_tokens'] / meta['total_tokens'] - meta['baseline_oov_ratio']
+            if drift > settings.RECOMMENDATIONS_DRIFT_THRESHOLD:
+                build_recommendation_index(top_k=k)
+                return
+
+        # Quitar las filas viejas y agregar las nuevas versiones, manteniendo los ids ordenados
+        keep = ~np.isin(ids, list(product_ids))
+        if len(updated_ids):
+            new_rows = vectorizer.transform(content)
+        else:
+            new_rows = sparse.csr_matrix((0, tfidf_matrix.shape[1]))
+        ids = np.concatenate([ids[keep], updated_ids])
+        tfidf_matrix = sparse.vstack([tfidf_matrix[keep], new_rows]).tocsr()
+        neighbors = np.concatenate([neighbors[keep], np.full((len(updated_ids), k), -1, dtype=np.int64)])
+        scores = np.concatenate([scores[keep], np.zeros((len(updated_ids), k), dtype=np.float32)])
+
+        order = np.argsort(ids, kind='stable')
+        ids, tfidf_matrix, neighbors, scores = ids[order], tfidf_matrix[order], neighbors[order], scores[order]
+
+        # Filas a refrescar: los productos cambiados, los que los tenían como vecinos
+        # y los que ahora los tendrían por superar su k-ésimo score
+        changed_rows = np.searchsorted(ids, updated_ids)
+        refresh = np.isin(neighbors, list(product_ids)).any(axis=1)
+        refresh[changed_rows] = True
+        if len(changed_rows) and k:
+            kth_score = np.where(neighbors[:, -1] >= 0, scores[:, -1], 0)
+            changed_sim = (tfidf_matrix[changed_rows] @ tfidf_matrix.T).tocoo()
+            other = changed_sim.col != changed_rows[changed_sim.row]
+            best_changed = np.zeros(len(ids), dtype=np.float32)
+            np.maximum.at(best_changed, changed_sim.col[other], changed_sim.data[other])
+            refresh |= best_changed > kth_score
+
+        rows = np.flatnonzero(refresh)
+        neighbors[rows], scores[rows] = _top_k_neighbors(tfidf_matrix, rows, ids, k)
+
+        _save_model(ids, neighbors, scores, tfidf_matrix, vectorizer, meta)
+
+
+def load_index():
+    """
+    Carga el índice de recomendaciones publicado, de forma perezosa
+
+    Si todavía no se construyó, se pide la construcción al worker y mientras
+    tanto se devuelve un índice vacío. La versión publicada se consulta en la
+    base en cada llamada (una fila por índice único); los arreglos solo se
+    recargan cuando cambia.
+    """
+    with _index_lock:
+        version = current_version()
+        if version is None:
+            enqueue('recommendations.rebuild')
+            version = current_version()
+            if version is None:
+                return _empty_index()
+
+        if _index_cache['version'] != version:
+            _ensure_local(version)
+            _index_cache['index'] = _load_arrays(version, INDEX_ARRAYS)
+            _index_cache['version'] = version
+
+        return _index_cache['index']
+
+
+def _content_candidates(index, product_ids):
+    """
+    Vecinos por contenido de los productos dados, leídos del índice precalculado
+
+    Returns:
+        Tupla (ids candidatos, scores), con un elemento por cada par producto-vecino
+    """
+    all_ids = index['product_ids']
+    rows = np.searchsorted(all_ids, product_ids)
+    found = rows < len(all_ids)
+    found[found] = all_ids[rows[found]] == product_ids[found]
+    rows = rows[found]
+
+    neighbors = index['neighbors'][rows].ravel()
+    scores = index['scores'][rows].ravel()
+    valid = neighbors >= 0
+    return neighbors[valid], scores[valid]
+
+
+def rank_candidates(index, product_ids, bought_together, top_n, exclude_given=True):
+    """
+    Combina similitud de contenido y co-compras en una sola lista de ids
+
+    Cada candidato recibe CONTENT_WEIGHT × similitud TF-IDF + COPURCHASE_WEIGHT ×
+    co-compra normalizada; si aparece para varios productos base, se suman.
+
+    Args:
+        index: Índice de vecinos (product_ids, neighbors, scores)
+        product_ids: IDs de los productos base
+        bought_together: Tuplas (producto base, relacionado, score) de co-compras
+        top_n: Número de ids a devolver
+        exclude_given: Excluir de la respuesta los productos base
+    """
+    given = np.unique(np.asarray(list(product_ids), dtype=np.int64))
+
+    candidates, scores = _content_candidates(index, given)
+    scores = scores * settings.RECOMMENDATIONS_CONTENT_WEIGHT
+
+    if bought_together:
+        _, related_ids, related_scores = zip(*bought_together)
+        candidates = np.concatenate([candidates, np.asarray(related_ids, dtype=np.int64)])
+        scores = np.concatenate([
+            scores, np.asarray(related_scores) * settings.RECOMMENDATIONS_COPURCHASE_WEIGHT
+        ])
+
+    if exclude_given:
+        keep = ~np.isin(candidates, given)
+        candidates, scores = candidates[keep], scores[keep]
+
+    # Sumar los scores de cada candidato (sin duplicados)
+    unique_candidates, inverse = np.unique(candidates, return_inverse=True)
+    merged = np.bincount(inverse, weights=scores, minlength=len(unique_candidates))
+    return [int(i) for i in unique_candidates[similarity.top_k(merged, top_n)]]
+
+
+def _recommend(product_ids, top_n, exclude_given=True):
+    product_ids = list(product_ids)
+    bought_together = []
+    if settings.RECOMMENDATIONS_COPURCHASE_WEIGHT > 0:
+        bought_together = copurchase_scores(product_ids, settings.RECOMMENDATIONS_TOP_K)
+    return rank_candidates(load_index(), product_ids, bought_together, top_n, exclude_given)
+
+
+def _fetch_in_order(product_ids):
+    products = Product.objects.select_related('category').in_bulk(product_ids)
+    return [products[i] for i in product_ids if i in products]
 
-import pandas as pd
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
-from .models import Product
-
-# ✅ Manejo seguro de NLTK con fallback
-try:
-    from nltk.corpus import stopwords
-    spanish_stopwords = stopwords.words('spanish')
-except (ImportError, LookupError):
-    # Si NLTK no está disponible o no tiene los datos, usar lista manual
-    spanish_stopwords = [
-        'el', 'la', 'de', 'que', 'y', 'a', 'en', 'un', 'ser', 'se', 'no', 
-        'haber', 'por', 'con', 'su', 'para', 'como', 'estar', 'tener', 
-        'le', 'lo', 'todo', 'pero', 'más', 'hacer', 'o', 'poder', 'decir',
-        'este', 'ir', 'otro', 'ese', 'la', 'si', 'me', 'ya', 'ver', 'porque',
-        'dar', 'cuando', 'él', 'muy', 'sin', 'vez', 'mucho', 'saber', 'qué',
-        'sobre', 'mi', 'alguno', 'mismo', 'yo', 'también', 'hasta', 'año',
-        'dos', 'querer', 'entre', 'así', 'primero', 'desde', 'grande', 'eso',
-        'ni', 'nos', 'llegar', 'pasar', 'tiempo', 'ella', 'sí', 'día', 'uno',
-        'bien', 'poco', 'deber', 'entonces', 'poner', 'cosa', 'tanto', 'hombre',
-        'parecer', 'nuestro', 'tan', 'donde', 'ahora', 'parte', 'después', 'vida',
-        'quedar', 'siempre', 'creer', 'hablar', 'llevar', 'dejar', 'nada', 'cada',
-        'seguir', 'menos', 'nuevo', 'encontrar', 'algo', 'solo', 'decir', 'casa',
-        'usar', 'tal', 'allí', 'sólo', 'escribir', 'madre', 'padre', 'trabajar',
-        'mes', 'pedir', 'hora', 'gente', 'estar', 'tener', 'los', 'las', 'del',
-        'al', 'una', 'unos', 'unas', 'estos', 'estas', 'esos', 'esas', 'aquel',
-        'aquella', 'aquellos', 'aquellas'
-    ]
 
 def get_recommended_products(product_id, top_n=5):
     """
-    Obtiene productos recomendados basados en similitud de contenido
+    Obtiene productos recomendados combinando similitud de contenido y co-compras
     
     Args:
         product_id: ID del producto base
@@ -42,57 +546,33 @@ def get_recommended_products(product_id, top_n=5):
         Lista de productos recomendados
     """
     try:
-        # Obtener todos los productos
-        products = list(Product.objects.all())
-
-        if not products:
-            return []
-
-        # Crear DataFrame
-        df = pd.DataFrame([{
-            'id': p.id,
-            'name': p.name,
-            'description': p.description or '',
-            'category': p.category.name if hasattr(p, 'category') and p.category else ''
-        } for p in products])
-
-        # Combinar texto
-        df['content'] = df['name'] + " " + df['description'] + " " + df['category']
-
-        # Vectorizar texto con stopwords
-        tfidf = TfidfVectorizer(
-            stop_words=spanish_stopwords,
-            max_features=1000,  # Limitar features para mejor rendimiento
-            ngram_range=(1, 2)  # Usar unigramas y bigramas
-        )
-        tfidf_matrix = tfidf.fit_transform(df['content'])
-
-        # Calcular similaridad de coseno
-        cosine_sim = linear_kernel(tfidf_matrix, tfidf_matrix)
-
-        # Crear mapa de índices
-        indices = pd.Series(df.index, index=df['id'])
-
-        # Verificar que el producto existe
-        if product_id not in indices.index:
-            return []
-
-        # Obtener índice del producto
-        idx = indices[product_id]
-        
-        # Calcular scores de similitud
-        sim_scores = list(enumerate(cosine_sim[idx]))
-        sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-
-        # Excluir el producto actual y limitar resultados
-        sim_scores = [s for s in sim_scores if s[0] != idx][:top_n]
-        similar_indices = [i[0] for i in sim_scores]
-
-        # Devolver productos recomendados
-        return [products[i] for i in similar_indices]
+        return _fetch_in_order(_recommend([product_id], top_n))
         
     except Exception as e:
         # Log del error (en producción esto debería ir a tu sistema de logs)
         print(f"Error en get_recommended_products: {str(e)}")
         # Devolver lista vacía en caso de error
-        return []
\ No newline at end of file
+        return []
+
+
+def get_batch_recommendations(product_ids, top_n=10, exclude_given=True):
+    """
+    Obtiene recomendaciones combinadas para varios productos (p. ej. un carrito)
+
+    Los vecinos de todos los productos se juntan en una sola pasada sobre el
+    índice; si un producto aparece para varios, sus scores se suman.
+
+    Args:
+        product_ids: IDs de los productos base
+        top_n: Número de recomendaciones a devolver
+        exclude_given: Excluir de la respuesta los productos base
+
+    Returns:
+        Lista de productos recomendados, del más al menos relevante
+    """
+    try:
+        return _fetch_in_order(_recommend(product_ids, top_n, exclude_given))
+
+    except Exception as e:
+        print(f"Error en get_batch_recommendations: {str(e)}")
+        return []
@@ -0,0 +1,306 @@
+# products/search.py
+"""
+Búsqueda y autocompletado de productos por texto.
+
+En PostgreSQL se usa la columna tsvector `search_vector` (configuración
+'spanish', índice GIN, mantenida por un trigger) y se ordena por SearchRank.
+En otras bases (SQLite en desarrollo y tests) se usa un índice invertido en
+memoria con el mismo comportamiento: todas las palabras deben aparecer, la
+última puede estar incompleta y el nombre pesa más que la descripción.
+
+El autocompletado usa trigramas (pg_trgm en PostgreSQL, un índice de
+trigramas en memoria en otras bases) para tolerar errores de tipeo.
+"""
+import bisect
+import math
+import re
+import threading
+import unicodedata
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db import connection
+from django.db.models import Case, F, IntegerField, When
+
+from .models import Product
+from .recommendations import SPANISH_STOPWORDS
+
+# Máximo de resultados que devuelve el índice en memoria
+FALLBACK_LIMIT = 1000
+
+# Similitud mínima para autocompletar (mismo umbral por defecto que el operador <% de pg_trgm)
+SUGGEST_MIN_SIMILARITY = 0.6
+
+NAME_WEIGHT = 2.0
+DESCRIPTION_WEIGHT = 1.0
+
+_WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """
+    Minúsculas y sin tildes, para comparar 'Polera' con 'poléra'
+    """
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    return ''.join(char for char in text if not unicodedata.combining(char))
+
+
+_STOPWORDS = frozenset(normalize(word) for word in SPANISH_STOPWORDS)
+
+
+def tokenize(text):
+    return [word for word in _WORD_RE.findall(normalize(text)) if word not in _STOPWORDS]
+
+
+class LocalIndex:
+    """
+    Índice en memoria clave -> {producto: peso}, construido en el primer uso
+    y actualizado producto a producto cuando las señales lo invalidan
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = defaultdict(dict)
+        self._documents = {}  # producto -> claves indexadas (para poder quitarlo)
+        self._built = False
+        self._dirty = set()
+
+    def invalidate(self, product_ids):
+        with self._lock:
+            self._dirty.update(product_ids)
+
+    def clear(self):
+        """
+        Vacía el índice: se vuelve a construir completo en el próximo uso
+        """
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            self._built = False
+            self._dirty = set()
+
+    def _weights(self, product_id, name, description):
+        """
+        Claves del producto con su peso (lo define cada índice)
+        """
+        raise NotImplementedError
+
+    def _after_refresh(self):
+        pass
+
+    def _remove(self, product_id):
+        for key in self._documents.pop(product_id, ()):
+            postings = self._postings[key]
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[key]
+
+    def _add(self, product_id, name, description):
+        weights = self._weights(product_id, name, description)
+        for key, weight in weights.items():
+            self._postings[key][product_id] = weight
+        self._documents[product_id] = set(weights)
+
+    def _refresh(self):
+        if self._built and not self._dirty:
+            return
+
+        queryset = Product.objects.all()
+        if self._built:
+            queryset = queryset.filter(id__in=self._dirty)
+            for product_id in self._dirty:
+                self._remove(product_id)
+        for product_id, name, description in queryset.values_list('id', 'name', 'description').iterator():
+            self._add(product_id, name, description)
+
+        self._after_refresh()
+        self._built = True
+        self._dirty = set()
+
+
+class InvertedIndex(LocalIndex):
+    """
+    Índice invertido de palabras de nombre y descripción
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._terms = []  # términos ordenados, para buscar por prefijo con bisect
+
+    def _weights(self, product_id, name, description):
+        weights = defaultdict(float)
+        for term in tokenize(name):
+            weights[term] += NAME_WEIGHT
+        for term in tokenize(description):
+            weights[term] += DESCRIPTION_WEIGHT
+        return weights
+
+    def _after_refresh(self):
+        self._terms = sorted(self._postings)
+
+    def _prefix_terms(self, prefix):
+        start = bisect.bisect_left(self._terms, prefix)
+        end = bisect.bisect_left(self._terms, prefix + '\uffff')
+        return self._terms[start:end]
+
+    def search(self, query, limit=FALLBACK_LIMIT):
+        """
+        Ids de productos que contienen todas las palabras de la búsqueda, por relevancia
+
+        La última palabra se compara por prefijo (el usuario todavía la está escribiendo).
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            self._refresh()
+            total = max(len(self._documents), 1)
+            scores = None
+
+            for position, word in enumerate(words):
+                terms = self._prefix_terms(word) if position == len(words) - 1 else [word]
+                word_scores = defaultdict(float)
+                for term in terms:
+                    postings = self._postings.get(term, {})
+                    idf = math.log(1 + total / len(postings)) if postings else 0
+                    for product_id, weight in postings.items():
+                        word_scores[product_id] = max(word_scores[product_id], weight * idf)
+
+                if scores is None:
+                    scores = word_scores
+                else:
+                    scores = {pid: score + word_scores[pid] for pid, score in scores.items() if pid in word_scores}
+                if not scores:
+                    return []
+
+        # Mayor relevancia primero; a igual relevancia, el producto más nuevo
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))
+        return [product_id for product_id, _ in ranked[:limit]]
+
+
+def trigrams(text):
+    """
+    Trigramas de cada palabra al estilo de pg_trgm ('polera' -> '  p', ' po', 'pol', ..., 'ra ')
+    """
+    grams = set()
+    for word in _WORD_RE.findall(normalize(text)):
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex(LocalIndex):
+    """
+    Índice de trigramas del nombre, para autocompletar con tolerancia a errores
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._names = {}
+
+    def _weights(self, product_id, name, description):
+        self._names[product_id] = name
+        return dict.fromkeys(trigrams(name), 1)
+
+    def _remove(self, product_id):
+        super()._remove(product_id)
+        self._names.pop(product_id, None)
+
+    def suggest(self, query, limit, min_similarity):
+        """
+        Nombres más parecidos a la búsqueda
+
+        La similitud es la fracción de trigramas de la búsqueda presentes en el
+        nombre (equivalente aproximado a word_similarity de pg_trgm).
+
+        Returns:
+            Lista de tuplas (id, nombre), de la más a la menos parecida
+        """
+        query_grams = trigrams(query)
+        if not query_grams:
+            return []
+
+        with self._lock:
+            self._refresh()
+            shared = defaultdict(int)
+            for gram in query_grams:
+                for product_id in self._postings.get(gram, ()):
+                    shared[product_id] += 1
+
+            matches = [
+                (count / len(query_grams), product_id)
+                for product_id, count in shared.items()
+                if count / len(query_grams) >= min_similarity
+            ]
+            # Más parecido primero; a igual similitud, el nombre más corto
+            matches.sort(key=lambda match: (-match[0], len(self._names[match[1]]), match[1]))
+            return [(product_id, self._names[product_id]) for _, product_id in matches[:limit]]
+
+
+fallback_index = InvertedIndex()
+fallback_trigram_index = TrigramIndex()
+
+
+def _tsquery(query):
+    """
+    Convierte la búsqueda en un tsquery con la última palabra por prefijo: 'asus tu' -> 'asus & tu:*'
+    """
+    words = _WORD_RE.findall(query.lower())
+    if words:
+        words[-1] += ':*'
+    return ' & '.join(words)
+
+
+def search_products(queryset, query):
+    """
+    Filtra el queryset por la búsqueda y lo ordena por relevancia
+
+    Args:
+        queryset: Queryset de Product a filtrar
+        query: Texto ingresado por el usuario
+
+    Returns:
+        Queryset filtrado y ordenado de mayor a menor relevancia
+    """
+    if connection.vendor == 'postgresql':
+        tsquery = _tsquery(query)
+        if not tsquery:
+            return queryset.none()
+        search_query = SearchQuery(tsquery, config='spanish', search_type='raw')
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-created_at')
+
+    product_ids = fallback_index.search(query)
+    if not product_ids:
+        return queryset.none()
+    position = Case(
+        *[When(id=product_id, then=index) for index, product_id in enumerate(product_ids)],
+        output_field=IntegerField(),
+    )
+    return queryset.filter(id__in=product_ids).order_by(position)
+
+
+def suggest_products(query, limit=8):
+    """
+    Autocompletado tolerante a errores de tipeo ('polra' -> 'Polera negra')
+
+    En PostgreSQL usa pg_trgm: el operador <% (trigram_word_similar) aprovecha
+    el índice GIN de trigramas sobre el nombre y se ordena por similitud.
+
+    Returns:
+        Lista de diccionarios {'id', 'name'}
+    """
+    query = query.strip()
+    if connection.vendor == 'postgresql':
+        return list(
+            Product.objects.filter(name__trigram_word_similar=query).annotate(
+                similarity=TrigramWordSimilarity(query, 'name')
+            ).order_by('-similarity', 'name').values('id', 'name')[:limit]
+        )
+
+    return [
+        {'id': product_id, 'name': name}
+        for product_id, name in fallback_trigram_index.suggest(query, limit, SUGGEST_MIN_SIMILARITY)
+    ]
@@ -1,11 +1,13 @@
 # products/serializers.py - Actualizado
 from rest_framework import serializers
+from utils.fast_serializers import FastSerializer
 from .models import Category, Product
 
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
-        fields = '__all__'
+        # updated_at es solo para ETag / Last-Modified (utils/conditional.py)
+        fields = ['id', 'name', 'description', 'image']
 
 class ProductWriteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -24,6 +26,9 @@ class ProductSerializer(serializers.ModelSerializer):
         model = Product
         fields = ['id', 'name', 'description', 'price', 'stock', 'image', 'category', 'category_id', 'created_at']
 
+# Misma salida que ProductSerializer, armada desde values() (listados de solo lectura)
+ProductFastSerializer = FastSerializer(ProductSerializer)
+
 
 
 # products/serializers.py - Agregar estos serializers
@@ -40,6 +45,27 @@ class InventoryMovementSerializer(serializers.ModelSerializer):
         fields = ['id', 'product', 'product_name', 'product_image', 'movement_type', 
                  'quantity', 'reason', 'created_by', 'created_at']
 
+class CartItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField()
+
+class RelatedProductsBatchSerializer(serializers.Serializer):
+    product_ids = serializers.ListField(child=serializers.IntegerField(), required=False, max_length=200)
+    cart = CartItemSerializer(many=True, required=False, max_length=200)
+    exclude_cart = serializers.BooleanField(required=False, default=True)
+    limit = serializers.IntegerField(required=False, default=10, min_value=1, max_value=50)
+
+    def validate(self, attrs):
+        product_ids = list(attrs.get('product_ids', []))
+        product_ids += [item['product'] for item in attrs.get('cart', [])]
+        if not product_ids:
+            raise serializers.ValidationError("Debes enviar 'product_ids' o 'cart'.")
+        attrs['product_ids'] = product_ids
+        return attrs
+
+class ProductSuggestQuerySerializer(serializers.Serializer):
+    q = serializers.CharField(min_length=2, max_length=100, trim_whitespace=True)
+    limit = serializers.IntegerField(required=False, default=8, min_value=1, max_value=20)
+
 class ProductWithStockSerializer(serializers.ModelSerializer):
     category = CategorySerializer(read_only=True)
     low_stock_alert = serializers.SerializerMethodField()
@@ -0,0 +1,128 @@
+# products/signals.py
+import threading
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from jobs.runner import enqueue
+from utils.response_cache import invalidate as invalidate_responses
+from .models import Category, Product, ProductImage
+from .search import fallback_index, fallback_trigram_index
+
+# Productos pendientes de reindexar en este hilo (se aplican al confirmar la transacción)
+_pending = threading.local()
+
+
+def _mark_dirty(product_ids):
+    dirty = getattr(_pending, 'product_ids', None)
+    if dirty is None:
+        dirty = _pending.product_ids = set()
+    dirty.update(product_ids)
+    transaction.on_commit(_flush)
+
+
+def _flush():
+    product_ids = getattr(_pending, 'product_ids', None)
+    if not product_ids:
+        return
+    _pending.product_ids = set()
+    try:
+        enqueue('recommendations.sync_products', product_ids=sorted(product_ids))
+    except Exception as e:
+        # Nunca romper el guardado del admin por el índice de recomendaciones
+        print(f"Error actualizando recomendaciones: {e}")
+
+
+CONTENT_FIELDS = {'name', 'description', 'category_id'}
+
+
+def _product_content(product):
+    return (product.name, product.description, product.category_id)
+
+
+@receiver(post_init, sender=Product)
+def remember_product_content(sender, instance, **kwargs):
+    # Con only() (utils/prefetch.py) leer un campo diferido sería una consulta por fila
+    if CONTENT_FIELDS & instance.get_deferred_fields():
+        instance._recommendation_content = None
+        return
+    instance._recommendation_content = _product_content(instance)
+
+
+@receiver(post_save, sender=Product)
+def product_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    # Los cambios de stock o precio no afectan las recomendaciones
+    # Sin foto del contenido (se cargó con only()) se asume que cambió
+    if created or instance._recommendation_content is None or instance._recommendation_content != _product_content(instance):
+        instance._recommendation_content = _product_content(instance)
+        fallback_index.invalidate([instance.pk])
+        fallback_trigram_index.invalidate([instance.pk])
+        _mark_dirty([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def product_deleted(sender, instance, **kwargs):
+    fallback_index.invalidate([instance.pk])
+    fallback_trigram_index.invalidate([instance.pk])
+    _mark_dirty([instance.pk])
+
+
+@receiver(post_init, sender=Category)
+def remember_category_name(sender, instance, **kwargs):
+    instance._recommendation_name = None if 'name' in instance.get_deferred_fields() else instance.name
+
+
+@receiver(post_save, sender=Category)
+def category_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or created or instance._recommendation_name == instance.name:
+        return
+    instance._recommendation_name = instance.name
+    _mark_dirty(instance.products.values_list('id', flat=True))
+
+
+# Caché de respuestas del catálogo (utils/response_cache.py). Se invalida al
+# confirmar la transacción para que nadie vuelva a cachear los datos viejos.
+def _invalidate_on_commit(*namespaces):
+    transaction.on_commit(lambda: invalidate_responses(*namespaces))
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def invalidate_product_responses(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Cualquier cambio (también stock o precio) se ve en los listados y en el detalle
+    _invalidate_on_commit('products', f'product:{instance.pk}')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_responses(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Los productos muestran su categoría anidada
+    product_ids = instance.products.values_list('id', flat=True) if kwargs.get('signal') is post_save else []
+    _invalidate_on_commit(
+        'categories', f'category:{instance.pk}', 'products',
+        *[f'product:{product_id}' for product_id in product_ids],
+    )
+
+
+@receiver(post_save, sender=ProductImage)
+@receiver(post_delete, sender=ProductImage)
+def invalidate_product_image_responses(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _invalidate_on_commit('products', f'product:{instance.product_id}')
+
+
+@receiver(post_save, sender='reviews.Review')
+@receiver(post_delete, sender='reviews.Review')
+def invalidate_review_responses(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # El listado filtra por ?min_rating= y cuenta las facetas de rating (products/facets.py)
+    _invalidate_on_commit('products')
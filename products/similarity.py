@@ -0,0 +1,92 @@
+# products/similarity.py
+"""
+Búsqueda de los K vecinos más similares sobre vectores TF-IDF dispersos.
+
+Los vectores de TF-IDF vienen normalizados (norma L2), así que el producto
+punto entre filas es directamente la similaridad de coseno. Nunca se arma la
+matriz N×N: se calcula una fila de consulta o un bloque de filas a la vez y se
+queda solo con los K mejores de cada una.
+"""
+import numpy as np
+
+# Tope aproximado de celdas (filas del bloque × productos) por bloque de similitudes
+MAX_BLOCK_CELLS = 4_000_000
+
+
+def top_k(scores, k):
+    """
+    Índices de los k scores más altos, ordenados de mayor a menor
+
+    Usa argpartition (O(n)) y solo ordena los k elegidos.
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        best = np.argpartition(-scores, k - 1)[:k]
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind='stable')]
+
+
+def _select(columns, values, exclude, k):
+    """
+    Top-k de una fila dispersa de similitudes, sin la propia fila y sin scores nulos
+    """
+    mask = values > 0
+    if exclude is not None:
+        mask &= columns != exclude
+    columns, values = columns[mask], values[mask]
+    best = top_k(values, k)
+    return columns[best], values[best]
+
+
+def query_top_k(matrix, vector, k, exclude=None):
+    """
+    Vecinos más similares a un único vector
+
+    Args:
+        matrix: Matriz CSR del catálogo (una fila por producto)
+        vector: Matriz CSR de 1 fila con el vector de consulta
+        k: Número de vecinos
+        exclude: Columna a ignorar (el propio producto)
+
+    Returns:
+        Tupla (columnas, scores) ordenadas de mayor a menor similitud
+    """
+    row_sim = (vector @ matrix.T).tocsr()
+    return _select(row_sim.indices, row_sim.data, exclude, k)
+
+
+def top_k_neighbors(matrix, rows, k, block_size=None):
+    """
+    Vecinos más similares de varias filas del catálogo, calculados por bloques
+
+    Args:
+        matrix: Matriz CSR del catálogo (una fila por producto)
+        rows: Filas para las que se buscan vecinos (se excluyen a sí mismas)
+        k: Número de vecinos por fila
+        block_size: Filas por bloque (por defecto según MAX_BLOCK_CELLS)
+
+    Returns:
+        Tupla (columnas, scores) de forma (len(rows), k), rellenadas con -1 / 0
+    """
+    rows = np.asarray(rows, dtype=np.int64)
+    columns = np.full((len(rows), k), -1, dtype=np.int64)
+    scores = np.zeros((len(rows), k), dtype=np.float32)
+    if len(rows) == 0 or k <= 0 or matrix.shape[0] == 0:
+        return columns, scores
+
+    block_size = block_size or max(1, MAX_BLOCK_CELLS // matrix.shape[0])
+    transposed = matrix.T.tocsc()
+
+    for start in range(0, len(rows), block_size):
+        block = rows[start:start + block_size]
+        block_sim = (matrix[block] @ transposed).tocsr()
+        indptr, indices, data = block_sim.indptr, block_sim.indices, block_sim.data
+        for offset, row in enumerate(block):
+            lo, hi = indptr[offset], indptr[offset + 1]
+            best_columns, best_scores = _select(indices[lo:hi], data[lo:hi], row, k)
+            columns[start + offset, :len(best_columns)] = best_columns
+            scores[start + offset, :len(best_scores)] = best_scores
+
+    return columns, scores
@@ -0,0 +1,85 @@
+# products/stock.py
+"""
+Reserva de stock para el checkout sin sobreventa.
+
+Nada de leer stock, comparar en Python y product.save(): entre la lectura y
+el guardado otro checkout puede vender las mismas unidades. reserve_stock()
+hace, dentro de la transacción del checkout:
+
+1. SELECT ... FOR UPDATE de los productos ordenados por id. Dos checkouts
+   con los mismos productos bloquean las filas en el mismo orden, así que
+   uno espera al otro en vez de trabarse (deadlock).
+2. Un solo UPDATE condicional para todas las líneas:
+   SET stock = stock - CASE id WHEN ... END WHERE id IN (...) AND stock >= CASE ...
+   Si alguna fila no cumple la condición no se actualiza y se aborta.
+
+En SQLite no hay FOR UPDATE (las escrituras ya se hacen de a una) y el WHERE
+condicional es lo que impide la sobreventa.
+
+La prueba de concurrencia es CheckoutConcurrencyTests (orders/tests.py).
+"""
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Now
+
+from utils.response_cache import invalidate as invalidate_responses
+from .models import Product
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_id, name, available, requested):
+        self.product_id = product_id
+        self.name = name
+        self.available = available
+        self.requested = requested
+        super().__init__(f"No hay suficiente stock para el producto '{name}'")
+
+
+def reserve_stock(quantities):
+    """
+    Descuenta stock de varios productos de forma atómica (todo o nada)
+
+    Debe llamarse dentro de transaction.atomic(): si falta stock se levanta
+    InsufficientStock y la transacción revierte lo que se haya hecho.
+
+    Args:
+        quantities: {product_id: cantidad} (las líneas repetidas ya sumadas)
+    """
+    quantities = {product_id: quantity for product_id, quantity in quantities.items() if quantity}
+    if not quantities:
+        return
+    product_ids = sorted(quantities)
+
+    # 1. Bloquear en orden de id y validar con el stock bloqueado
+    locked = Product.objects.select_for_update().filter(pk__in=product_ids).order_by('pk').values_list('pk', 'name', 'stock')
+    names = {}
+    for product_id, name, stock in locked:
+        names[product_id] = name
+        if stock < quantities[product_id]:
+            raise InsufficientStock(product_id, name, stock, quantities[product_id])
+    for product_id in product_ids:
+        if product_id not in names:
+            raise InsufficientStock(product_id, str(product_id), 0, quantities[product_id])
+
+    # 2. Un UPDATE para todas las líneas; el WHERE stock >= cantidad es la garantía final
+    requested = Case(
+        *[When(pk=product_id, then=Value(quantities[product_id])) for product_id in product_ids],
+        output_field=PositiveIntegerField(),
+    )
+    updated = Product.objects.filter(pk__in=product_ids, stock__gte=requested).update(
+        stock=F('stock') - requested,
+        updated_at=Now(),  # update() no pasa por auto_now
+    )
+    if updated != len(product_ids):
+        # Solo sin FOR UPDATE: otra transacción vendió entre la lectura y el UPDATE
+        stocks = dict(Product.objects.filter(pk__in=product_ids).values_list('pk', 'stock'))
+        product_id = next(
+            (product_id for product_id in product_ids if stocks.get(product_id, 0) < quantities[product_id]),
+            product_ids[0],
+        )
+        raise InsufficientStock(product_id, names[product_id], stocks.get(product_id, 0), quantities[product_id])
+
+    # update() no dispara post_save: invalidar a mano el caché del catálogo
+    transaction.on_commit(lambda: invalidate_responses(
+        'products', *[f'product:{product_id}' for product_id in product_ids]
+    ))
@@ -0,0 +1,24 @@
+# products/tasks.py
+from jobs.runner import task
+
+from . import copurchase, recommendations
+
+
+@task('recommendations.rebuild')
+def rebuild_recommendations(top_k=None):
+    recommendations.build_recommendation_index(top_k=top_k)
+
+
+@task('recommendations.sync_products')
+def sync_recommendations(product_ids):
+    recommendations.sync_products(product_ids)
+
+
+@task('copurchases.rebuild')
+def rebuild_copurchases(chunk_size=2000):
+    copurchase.build_copurchase_counts(chunk_size=chunk_size)
+
+
+@task('copurchases.record_order')
+def record_order_copurchases(order_id, sign=1):
+    copurchase.record_order(order_id, sign=sign)
@@ -1,3 +1,445 @@
-from django.test import TestCase
+import base64
+import tempfile
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import count
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from jobs.runner import run_next
+from orders.models import Order, OrderItem
+from reviews.models import Review
+from utils.prefetch import plan_queryset
+from utils.testing import assert_constant_queries
+from .benchmarks import run_benchmark
+from . import recommendations
+from .copurchase import build_copurchase_counts, record_order
+from .facets import parse_filters
+from .models import Category, Product, ProductCoPurchase, ProductImage
+from .search import fallback_index, fallback_trigram_index, search_products, suggest_products
+from .serializers import ProductFastSerializer, ProductSerializer
+
+# Sin caché de respuestas: se miden las consultas reales de cada vista
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+RESPONSE_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'response-tests'}}
+
+_sequence = count()
+
+
+def crear_productos(n):
+    # Una categoría por producto: un N+1 en la categoría anidada se nota enseguida
+    productos = []
+    for _ in range(n):
+        index = next(_sequence)
+        categoria = Category.objects.create(name=f'Categoría {index}', image=f'categories/{index}.jpg')
+        productos.append(Product.objects.create(
+            name=f'Producto {index}', description='Descripción', price=Decimal('19.90'),
+            stock=5 + index % 20, image=f'products/{index}.jpg', category=categoria,
+        ))
+    return productos
+
+
+@override_settings(CACHES=NO_CACHE)
+class ProductQueryCountTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product = crear_productos(1)[0]
+
+    def test_listado_sin_n_mas_1(self):
+        # ETag + COUNT de la paginación + página
+        assert_constant_queries(self, lambda: self.client.get('/api/store/products/'), crear_productos, expected=3)
+
+    def test_listado_con_cursor_sin_n_mas_1(self):
+        assert_constant_queries(self, lambda: self.client.get('/api/store/products/?cursor='), crear_productos)
+
+    def test_listado_con_facetas_sin_n_mas_1(self):
+        assert_constant_queries(self, lambda: self.client.get('/api/store/products/?facets=true'), crear_productos)
+
+    def test_detalle_consultas_fijas(self):
+        assert_constant_queries(
+            self, lambda: self.client.get(f'/api/store/products/{self.product.pk}/'), crear_productos, expected=2,
+        )
+
+
+@override_settings(TIME_ZONE='America/La_Paz')
+class ProductFastSerializerContractTests(TestCase):
+    """
+    ProductFastSerializer tiene que renderizar los mismos bytes que ProductSerializer
+    """
+
+    def setUp(self):
+        self.request = Request(RequestFactory().get('/api/store/products/'))
+        self.renderer = JSONRenderer()
+        con_imagen = Category.objects.create(name='Ropa', description='Invierno', image='categories/ropa de niño.jpg')
+        sin_imagen = Category.objects.create(name='Calzado', description='', image=None)
+        productos = [
+            # Imagen vacía, nula y con espacios; precios con distinta cantidad de decimales
+            Product.objects.create(name='Polera', description='Algodón', price=Decimal('49.9'), stock=10, image='', category=con_imagen),
+            Product.objects.create(name='Zapato', description='Cuero', price=Decimal('1234.56'), stock=0, image=None, category=sin_imagen),
+            Product.objects.create(name='Gorra ñandú', description='', price=Decimal('0.10'), stock=3, image='products/gorra 1.jpg', category=sin_imagen),
+        ]
+        # Fechas en UTC cerca de la medianoche: en La Paz (UTC-4) caen el día anterior
+        for minutes, product in enumerate(productos):
+            Product.objects.filter(pk=product.pk).update(
+                created_at=datetime(2024, 3, 1, 2, minutes, 30, 123456, tzinfo=dt_timezone.utc)
+            )
+
+    def render_drf(self, objects):
+        return self.renderer.render(ProductSerializer(objects, many=True, context={'request': self.request}).data)
+
+    def render_fast(self, rows):
+        return self.renderer.render(ProductFastSerializer.serialize(rows, self.request))
+
+    def test_listado_identico_byte_a_byte(self):
+        queryset = Product.objects.order_by('-created_at', '-id')
+        drf = self.render_drf(plan_queryset(queryset, ProductSerializer))
+        fast = self.render_fast(ProductFastSerializer.values(queryset))
+        self.assertEqual(drf, fast)
+        self.assertIn(b'"created_at":"2024-02-29T22:02:30.123456-04:00"', fast)
+        self.assertIn(b'"price":"49.90"', fast)
+
+    def test_fk_nula(self):
+        # Ninguna FK de Product admite NULL en la base: se compara la fila que
+        # daría un LEFT JOIN sin categoría con un producto sin categoría
+        product = Product(
+            pk=1, name='Suelto', description='', price=Decimal('5'), stock=1, image=None,
+            created_at=datetime(2024, 3, 1, 2, 0, tzinfo=dt_timezone.utc),
+        )
+        row = {column: None for column in ProductFastSerializer.columns}
+        row.update(id=1, name='Suelto', description='', price=Decimal('5'), stock=1, created_at=product.created_at)
+        self.assertEqual(self.render_drf([product]), self.render_fast([row]))
+
+
+@override_settings(JOBS_BACKEND='immediate')
+class CoPurchaseTests(TestCase):
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='cliente', email='cliente@example.com', password='x')
+        self.products = crear_productos(4)
+
+    def crear_orden(self, products):
+        order = Order.objects.create(user=self.user, total_price=Decimal('0'), shipping_address='Calle 1')
+        for product in products:
+            OrderItem.objects.create(order=order, product=product, quantity=1, price=product.price)
+        record_order(order.pk)
+        return order
+
+    def matriz(self):
+        return set(ProductCoPurchase.objects.values_list('product_id', 'related_id', 'count'))
+
+    def test_incremental_igual_al_recalculo(self):
+        a, b, c, d = self.products
+        self.crear_orden([a, b, c])
+        self.crear_orden([a, b])
+        cancelada = self.crear_orden([c, d])
+        repuesta = self.crear_orden([b, d])
+
+        # Cancelar resta los pares; dejar de estar cancelada los vuelve a sumar
+        for order, status in [(cancelada, 'cancelled'), (repuesta, 'cancelled'), (repuesta, 'shipped')]:
+            order.status = status
+            with self.captureOnCommitCallbacks(execute=True):
+                order.save()
+
+        incremental = self.matriz()
+        build_copurchase_counts()
+        self.assertEqual(incremental, self.matriz())
+        self.assertIn((a.pk, b.pk, 2), incremental)
+        self.assertFalse(ProductCoPurchase.objects.filter(product=c, related=d).exists())
+
+
+class RecommendationBenchmarkTests(SimpleTestCase):
+    def test_benchmark_catalogo_chico(self):
+        # Datos sintéticos en memoria: no usa la base
+        result = run_benchmark(200, queries=20, top_k=10, k=5)
+        self.assertEqual(result['products'], 200)
+        self.assertGreater(result['orders']['test'], 0)
+        for name in ('content', 'hybrid'):
+            self.assertGreaterEqual(result['quality'][name]['precision_at_k'], 0)
+            self.assertLessEqual(result['quality'][name]['recall_at_k'], 1)
+        for latency in result['latency_ms'].values():
+            self.assertLessEqual(latency['p50'], latency['p99'])
+        if result['peak_rss_mb'] is not None:
+            # En MB: con la unidad equivocada (KB o bytes) sale 1024 veces más o menos
+            self.assertTrue(1 < result['peak_rss_mb'] < 100_000)
+
+
+@override_settings(JOBS_BACKEND='database')
+class RecommendationIndexSharingTests(TestCase):
+    """
+    El worker y la web no comparten disco: el índice tiene que llegar por la base
+    """
+
+    def setUp(self):
+        self.worker_dir = tempfile.TemporaryDirectory()
+        self.web_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.worker_dir.cleanup)
+        self.addCleanup(self.web_dir.cleanup)
+        self.addCleanup(recommendations._index_cache.update, version=None, index=None)
+        self.products = crear_productos(5)
+
+    def en_worker(self):
+        return override_settings(RECOMMENDATIONS_DIR=self.worker_dir.name)
+
+    def en_web(self):
+        return override_settings(RECOMMENDATIONS_DIR=self.web_dir.name)
+
+    def test_la_web_ve_lo_que_publica_el_worker(self):
+        with self.en_worker():
+            recommendations.build_recommendation_index(top_k=3)
+        with self.en_web():
+            index = recommendations.load_index()
+            self.assertEqual(sorted(index['product_ids'].tolist()), sorted(p.pk for p in self.products))
+            first_version = recommendations._index_cache['version']
+
+        # Editar un producto encola la actualización incremental para el worker
+        product = self.products[0]
+        product.name = 'Mochila impermeable'
+        with self.captureOnCommitCallbacks(execute=True):
+            product.save()
+        with self.en_worker():
+            job = run_next()
+        self.assertEqual((job.name, job.status), ('recommendations.sync_products', 'done'))
+
+        with self.en_web():
+            recommendations.load_index()
+            self.assertNotEqual(recommendations._index_cache['version'], first_version)
+            self.assertEqual(recommendations._index_cache['version'], recommendations.current_version())
+
+
+@override_settings(CACHES=NO_CACHE)
+class PriceFilterTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        crear_productos(3)
+
+    def test_precios_no_finitos_se_ignoran(self):
+        unfiltered = self.client.get('/api/store/products/').json()
+        for value in ('nan', 'NaN', 'sNaN', 'Infinity', '-inf', 'abc'):
+            self.assertEqual(parse_filters({'min_price': value, 'max_price': value}), {})
+            for param in ('min_price', 'max_price'):
+                response = self.client.get(f'/api/store/products/?{param}={value}')
+                self.assertEqual(response.status_code, 200, f'{param}={value}')
+                self.assertEqual(response.json(), unfiltered)
+                response = self.client.get(f'/api/store/products/?{param}={value}&facets=true')
+                self.assertEqual(response.status_code, 200, f'{param}={value}&facets=true')
+
+    def test_precio_valido_filtra(self):
+        self.assertEqual(parse_filters({'min_price': '10.5'}), {'min_price': Decimal('10.5')})
+        self.assertEqual(self.client.get('/api/store/products/?max_price=1').json()['count'], 0)
+
+
+@override_settings(CACHES=RESPONSE_CACHE)
+class ResponseCacheInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.product = crear_productos(1)[0]
+        self.user = get_user_model().objects.create_user(username='cliente', email='cliente@example.com', password='x')
+
+    def get_list(self):
+        return self.client.get('/api/store/products/')
+
+    def assert_invalida(self, cambio, se_ve):
+        self.assertEqual(self.get_list()['X-Cache'], 'MISS')
+        self.assertEqual(self.get_list()['X-Cache'], 'HIT')
+        # Se invalida al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            cambio()
+        response = self.get_list()
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertTrue(se_ve(response.json()['results']))
+
+    def test_editar_producto(self):
+        def cambio():
+            self.product.name = 'Nombre nuevo'
+            self.product.save()
+        self.assert_invalida(cambio, lambda results: results[0]['name'] == 'Nombre nuevo')
+
+    def test_editar_categoria(self):
+        def cambio():
+            self.product.category.name = 'Categoría nueva'
+            self.product.category.save()
+        self.assert_invalida(cambio, lambda results: results[0]['category']['name'] == 'Categoría nueva')
+
+    def test_agregar_imagen(self):
+        def cambio():
+            ProductImage.objects.create(product=self.product, image='product_gallery/1.jpg')
+        self.assert_invalida(cambio, lambda results: len(results) == 1)
+
+    def test_agregar_review(self):
+        def cambio():
+            Review.objects.create(product=self.product, user=self.user, rating=5, comment='Muy buena')
+        self.assert_invalida(cambio, lambda results: len(results) == 1)
+        # El filtro por rating ya ve la reseña nueva
+        self.assertEqual(self.client.get('/api/store/products/?min_rating=5').json()['count'], 1)
+
+    def test_detalle_de_otro_producto_no_se_invalida(self):
+        otro = crear_productos(1)[0]
+        url = f'/api/store/products/{otro.pk}/'
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.name = 'Nombre nuevo'
+            self.product.save()
+        self.assertEqual(self.client.get(url)['X-Cache'], 'HIT')
+
+
+@override_settings(CACHES=NO_CACHE)
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.product = crear_productos(2)[0]
+
+    def test_if_none_match_responde_304(self):
+        for url in ('/api/store/products/', f'/api/store/products/{self.product.pk}/'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            etag = response['ETag']
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response['ETag'], etag)
+            self.assertFalse(response.content)
+
+    def test_editar_cambia_el_etag(self):
+        for url in ('/api/store/products/', f'/api/store/products/{self.product.pk}/'):
+            etag = self.client.get(url)['ETag']
+            self.product.name = f'{self.product.name} editado'
+            self.product.save()
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200, url)
+            self.assertNotEqual(response['ETag'], etag)
+
+
+@override_settings(CACHES=NO_CACHE)
+class FallbackSearchTests(TestCase):
+    """
+    Índices en memoria de products/search.py (los que se usan fuera de PostgreSQL)
+    """
+
+    def setUp(self):
+        # Los índices son del proceso: no arrastrar productos de otros tests
+        for index in (fallback_index, fallback_trigram_index):
+            index.clear()
+            self.addCleanup(index.clear)
+        self.client = APIClient()
+        self.categoria = Category.objects.create(name='Ropa')
+        self.polera_negra = self.crear('Polera negra', 'Algodón peinado')
+        self.polera_roja = self.crear('Polera roja', 'Tela transpirable')
+        self.gorra_negra = self.crear('Gorra negra', 'Ajuste regulable')
+
+    def crear(self, name, description):
+        return Product.objects.create(
+            name=name, description=description, price=Decimal('10.00'), stock=5, category=self.categoria,
+        )
+
+    def buscar(self, query):
+        return list(search_products(Product.objects.all(), query).values_list('id', flat=True))
+
+    def test_todas_las_palabras(self):
+        self.assertEqual(self.buscar('polera negra'), [self.polera_negra.pk])
+        self.assertEqual(self.buscar('polera azul'), [])
+
+    def test_ultima_palabra_por_prefijo(self):
+        self.assertEqual(self.buscar('polera neg'), [self.polera_negra.pk])
+        self.assertEqual(sorted(self.buscar('pol')), sorted([self.polera_negra.pk, self.polera_roja.pk]))
+        # Solo la última palabra puede estar incompleta
+        self.assertEqual(self.buscar('neg polera'), [])
+        # Sin tildes también encuentra
+        self.assertEqual(self.buscar('algodon'), [self.polera_negra.pk])
+
+    def test_el_nombre_pesa_mas_que_la_descripcion(self):
+        mochila = self.crear('Mochila urbana', 'Bolsillo para laptop')
+        bolso = self.crear('Bolso deportivo', 'Se usa como mochila')
+        self.assertEqual(self.buscar('mochila'), [mochila.pk, bolso.pk])
+
+        response = self.client.get('/api/store/products/?search=mochila')
+        self.assertEqual([product['id'] for product in response.json()['results']], [mochila.pk, bolso.pk])
+
+    def test_editar_o_borrar_actualiza_el_indice(self):
+        self.assertEqual(self.buscar('gorra'), [self.gorra_negra.pk])
+
+        self.gorra_negra.name = 'Visera negra'
+        self.gorra_negra.save()
+        self.assertEqual(self.buscar('gorra'), [])
+        self.assertEqual(self.buscar('visera'), [self.gorra_negra.pk])
+
+        # Los cambios de stock no reindexan, pero tampoco rompen nada
+        self.polera_roja.stock = 0
+        self.polera_roja.save()
+        self.assertEqual(self.buscar('roja'), [self.polera_roja.pk])
+
+        self.polera_roja.delete()
+        self.assertEqual(self.buscar('roja'), [])
+
+    def test_autocompletado_tolera_errores(self):
+        self.assertEqual(suggest_products('polra')[:2], [
+            {'id': self.polera_roja.pk, 'name': 'Polera roja'},
+            {'id': self.polera_negra.pk, 'name': 'Polera negra'},
+        ])
+        self.assertEqual(suggest_products('zzzz'), [])
+
+        response = self.client.get('/api/store/products/suggest/?q=gora')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0], {'id': self.gorra_negra.pk, 'name': 'Gorra negra'})
+
+    def test_autocompletado_ve_ediciones(self):
+        self.assertEqual(suggest_products('visra'), [])
+        self.gorra_negra.name = 'Visera negra'
+        self.gorra_negra.save()
+        self.assertEqual(suggest_products('visra')[0], {'id': self.gorra_negra.pk, 'name': 'Visera negra'})
+
+        self.polera_roja.delete()
+        self.assertNotIn(self.polera_roja.pk, [item['id'] for item in suggest_products('polera')])
+
+
+@override_settings(CACHES=NO_CACHE)
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        productos = crear_productos(23)
+        # Grupos de 5 productos con el mismo created_at: los empates caen en los bordes de página
+        base = datetime(2024, 3, 1, 12, 0, 0, 500000, tzinfo=dt_timezone.utc)
+        for index, product in enumerate(productos):
+            Product.objects.filter(pk=product.pk).update(created_at=base - timedelta(minutes=index // 5))
+        self.expected = list(Product.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+
+    def recorrer(self, url):
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            data = response.json()
+            self.assertLessEqual(len(data['results']), 7)
+            seen += [product['id'] for product in data['results']]
+            url = data['next']
+        return seen
+
+    def test_recorrido_estable_con_empates(self):
+        for fast in (True, False):
+            with self.subTest(fast_serializers=fast), override_settings(FAST_SERIALIZERS=fast):
+                self.assertEqual(self.recorrer('/api/store/products/?cursor=&page_size=7'), self.expected)
+
+    def test_un_producto_nuevo_no_desplaza_las_paginas(self):
+        first = self.client.get('/api/store/products/?cursor=&page_size=7').json()
+        crear_productos(1)  # Más nuevo que todos: con OFFSET correría la página siguiente
+        rest = self.recorrer(first['next'])
+        self.assertEqual([product['id'] for product in first['results']] + rest, self.expected)
+
+    def test_cursor_adulterado_da_404(self):
+        def encode(text):
+            return base64.urlsafe_b64encode(text.encode()).decode()
+
+        for cursor in (
+            'no-es-base64!',
+            encode('sin separador'),
+            encode('2024-03-01T12:00:00+00:00|abc'),
+            encode('2024-13-45T99:00:00+00:00|1'),
+            encode('2024-03-01T12:00:00+00:00|1|2'),
+            encode('2024-03-01T12:00:00+00:00|99999999999999999999999'),
+            base64.urlsafe_b64encode(b'\xff\xfe|1').decode(),
+        ):
+            response = self.client.get(f'/api/store/products/?cursor={cursor}')
+            self.assertEqual(response.status_code, 404, cursor)
@@ -1,6 +1,6 @@
 # products/urls.py - Actualizado
 from django.urls import path
-from .views import admin_dashboard_stats
+from .views import admin_dashboard_stats, admin_stats_cache_metrics
 from .views import (
     ProductListView,
     ProductDetailView,
@@ -14,6 +14,8 @@ from .views import (
     CategoryUpdateView,
     CategoryDeleteView,
     related_products,
+    related_products_batch,
+    product_suggest,
     ProductInventoryListView,
     InventoryMovementCreateView,
     InventoryMovementListView,
@@ -23,10 +25,12 @@ from .views import (
 urlpatterns = [
     # Rutas públicas
     path('products/', ProductListView.as_view(), name='product-list'),
+    path('products/suggest/', product_suggest, name='product-suggest'),
     path('products/<int:pk>/', ProductDetailView.as_view(), name='product-detail'),
     path('categories/', CategoryListView.as_view(), name='category-list'),
     path('categories/<int:pk>/', CategoryDetailView.as_view(), name='category-detail'),
     path('products/<int:product_id>/related/', related_products, name='related-products'),
+    path('products/related/', related_products_batch, name='related-products-batch'),
     
     # Rutas de administración
     path('admin/products/', ProductAdminListView.as_view(), name='admin-product-list'),
@@ -43,4 +47,5 @@ urlpatterns = [
     path('admin/inventory/movements/create/', InventoryMovementCreateView.as_view(), name='inventory-movement-create'),
     path('admin/inventory/alerts/low-stock/', low_stock_alerts, name='low-stock-alerts'),
     path('admin/dashboard/stats/', admin_dashboard_stats, name='admin-dashboard-stats'),
+    path('admin/dashboard/cache-metrics/', admin_stats_cache_metrics, name='admin-stats-cache-metrics'),
 ]
\ No newline at end of file
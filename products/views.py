@@ -2,49 +2,94 @@ from rest_framework import generics, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.decorators import api_view,permission_classes
-from django.db.models import Q
-from utils.pagination import OptionalPagination
+from django.db.models import Count, Max, Q
+from utils.pagination import OptionalPagination, KeysetPagination
+from utils.export import StreamingExportMixin
+from utils.response_cache import CachedResponseMixin
+from utils.conditional import ConditionalGetMixin
+from utils.prefetch import PrefetchPlannerMixin
+from utils.fast_serializers import FastListMixin
 
 from .models import Product, Category
-from .serializers import ProductSerializer, CategorySerializer
-from .recommendations import get_recommended_products
+from reviews.models import Review
+from .serializers import ProductSerializer, ProductFastSerializer, CategorySerializer, RelatedProductsBatchSerializer, ProductSuggestQuerySerializer
+from .recommendations import get_recommended_products, get_batch_recommendations
+from .search import search_products, suggest_products
+from .facets import apply_filters, compute_facets, parse_filters
 from rest_framework.permissions import AllowAny
 
 
 # Productos
-class ProductListView(generics.ListAPIView):
+class ProductListView(ConditionalGetMixin, CachedResponseMixin, StreamingExportMixin, FastListMixin, PrefetchPlannerMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
+    fast_serializer = ProductFastSerializer
     permission_classes = [AllowAny]  # <--- Esto permite acceso público
     pagination_class = OptionalPagination
-    def get_queryset(self):
+    # El producto muestra su categoría anidada
+    version_fields = ('updated_at', 'category__updated_at')
+
+    def get_cache_namespaces(self):
+        return ['products']
+
+    def get_extra_versions(self):
+        params = self.request.query_params
+        # El rating promedio sale de las reseñas: ?min_rating= y las facetas cambian con ellas
+        if 'min_rating' not in parse_filters(params) and params.get("facets") != "true":
+            return []
+        reviews = Review.objects.aggregate(count=Count('pk'), modified=Max('updated_at'))
+        return [reviews['count'], reviews['modified']]
+
+    def get_search_queryset(self):
         queryset = Product.objects.all().order_by("-created_at")
-        category = self.request.query_params.get("category")
         search = self.request.query_params.get("search")
-        if category:
-            queryset = queryset.filter(category_id=category)
         if search:
-            queryset = queryset.filter(Q(name__icontains=search) | Q(description__icontains=search))
-
+            # Búsqueda de texto completo ordenada por relevancia
+            queryset = search_products(queryset, search)
         return queryset
 
+    def get_queryset(self):
+        # Filtros facetados: category, price_range, min_price, max_price, in_stock, min_rating
+        filters = parse_filters(self.request.query_params)
+        return apply_filters(self.get_search_queryset(), filters)
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if request.query_params.get("facets") == "true" and request.query_params.get("no_paginate") != "true":
+            # Conteos por faceta en una sola consulta (evita llamar a /categories/ aparte)
+            facets = compute_facets(self.get_search_queryset(), parse_filters(request.query_params))
+            if isinstance(getattr(response, "data", None), dict):
+                response.data["facets"] = facets
+        return response
 
-class ProductDetailView(generics.RetrieveAPIView):
+
+class ProductDetailView(ConditionalGetMixin, CachedResponseMixin, PrefetchPlannerMixin, generics.RetrieveAPIView):
     queryset = Product.objects.all()
     serializer_class = ProductSerializer
     permission_classes = [AllowAny]  # <--- Esto permite acceso público
     pagination_class = OptionalPagination
+    version_fields = ('updated_at', 'category__updated_at')
+
+    def get_cache_namespaces(self):
+        return [f'product:{self.kwargs["pk"]}']
+
 # Categorías
-class CategoryListView(generics.ListAPIView):
+class CategoryListView(ConditionalGetMixin, CachedResponseMixin, generics.ListAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]  # <--- Esto permite acceso público
     pagination_class = None  # ✅ Desactiva paginación también aquí
 
-class CategoryDetailView(generics.RetrieveAPIView):
+    def get_cache_namespaces(self):
+        return ['categories']
+
+class CategoryDetailView(ConditionalGetMixin, CachedResponseMixin, generics.RetrieveAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     permission_classes = [AllowAny]  # <--- Esto permite acceso público
 
+    def get_cache_namespaces(self):
+        return [f'category:{self.kwargs["pk"]}']
+
 # Productos relacionados (ML)
 @api_view(['GET'])
 @permission_classes([AllowAny])  # <--- Esto permite acceso público
@@ -61,6 +106,35 @@ def related_products(request, product_id):
         print(f'❌ Error en related_products: {e}')
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+# Productos relacionados para varios productos a la vez (carrito o grilla)
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def related_products_batch(request):
+    input_serializer = RelatedProductsBatchSerializer(data=request.data)
+    input_serializer.is_valid(raise_exception=True)
+    data = input_serializer.validated_data
+
+    recommended_products = get_batch_recommendations(
+        data['product_ids'],
+        top_n=data['limit'],
+        exclude_given=data['exclude_cart'],
+    )
+    serializer = ProductSerializer(recommended_products, many=True, context={"request": request})
+    return Response(serializer.data)
+
+# Autocompletado del buscador (tolera errores de tipeo)
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def product_suggest(request):
+    query_serializer = ProductSuggestQuerySerializer(data=request.query_params)
+    query_serializer.is_valid(raise_exception=True)
+    data = query_serializer.validated_data
+
+    response = Response(suggest_products(data['q'], limit=data['limit']))
+    # Se llama en cada tecla: dejamos que el navegador reutilice respuestas recientes
+    response['Cache-Control'] = 'public, max-age=60'
+    return response
+
 
 # Vistas de administración para productos
 class ProductCreateView(generics.CreateAPIView):
@@ -95,11 +169,15 @@ class CategoryDeleteView(generics.DestroyAPIView):
     permission_classes = [permissions.IsAdminUser]
 
 # Vista para obtener todos los productos (sin paginación para admin)
-class ProductAdminListView(generics.ListAPIView):
+class ProductAdminListView(StreamingExportMixin, PrefetchPlannerMixin, generics.ListAPIView):
     queryset = Product.objects.all().order_by("-created_at")
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAdminUser]
     pagination_class = None  # Sin paginación para admin
+    # Streaming sin tope: JSON por defecto, ?export=ndjson|csv
+    stream_by_default = True
+    export_capped = False
+    export_filename = 'productos'
 
 
 # products/views.py - Agregar estas vistas
@@ -111,13 +189,16 @@ from .models import Product, InventoryMovement
 from .serializers import ProductSerializer, InventoryMovementSerializer
 
 # Vista para obtener productos con información de stock (para admin)
-class ProductInventoryListView(generics.ListAPIView):
+class ProductInventoryListView(StreamingExportMixin, PrefetchPlannerMixin, generics.ListAPIView):
     serializer_class = ProductSerializer
     permission_classes = [permissions.IsAdminUser]
     pagination_class = None
+    stream_by_default = True
+    export_capped = False
+    export_filename = 'inventario'
     
     def get_queryset(self):
-        return Product.objects.all().select_related('category').order_by('name')
+        return Product.objects.all().order_by('name')
 
 # Vista para crear movimientos de inventario
 class InventoryMovementCreateView(generics.CreateAPIView):
@@ -140,13 +221,16 @@ class InventoryMovementCreateView(generics.CreateAPIView):
         product.save()
 
 # Vista para obtener historial de movimientos
-class InventoryMovementListView(generics.ListAPIView):
+class InventoryMovementListView(StreamingExportMixin, PrefetchPlannerMixin, generics.ListAPIView):
     serializer_class = InventoryMovementSerializer
     permission_classes = [permissions.IsAdminUser]
-    pagination_class = None
+    pagination_class = KeysetPagination  # Sin paginación salvo que se pida ?cursor=
+    stream_by_default = True
+    export_capped = False
+    export_filename = 'movimientos'
     
     def get_queryset(self):
-        return InventoryMovement.objects.all().select_related('product', 'created_by').order_by('-created_at')
+        return InventoryMovement.objects.all().order_by('-created_at')
 
 # Vista para alertas de stock bajo
 @api_view(['GET'])
@@ -161,91 +245,113 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework import permissions, status
 from django.db.models import Count, Sum, Q
+from django.db.models.functions import TruncDate
 from django.utils import timezone
-from datetime import timedelta
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+from decimal import Decimal
 from products.models import Product, Category
-from orders.models import Order, OrderItem
+from orders.models import SalesRollup, ProductSalesRollup
 from users.models import CustomUser
+from utils.stats_cache import cached_stats, stats_cache_metrics
+
+def _percent_change(current, previous):
+    # Variación contra el período anterior en el formato del frontend ('+12%')
+    if not previous:
+        return '+100%' if current else '+0%'
+    return f'{(current - previous) * 100 / previous:+.0f}%'
+
 
 @api_view(['GET'])
 @permission_classes([permissions.IsAdminUser])
+@cached_stats('dashboard')
 def admin_dashboard_stats(request):
-    # Fecha de hoy y hace 30 días
-    today = timezone.now()
-    last_30_days = today - timedelta(days=30)
-    
+    # Días en la zona horaria del sitio: hoy, los últimos 30 (hoy incluido) y los 30 anteriores
+    tz = timezone.get_default_timezone()
+    today = timezone.localdate(timezone=tz)
+    period_start = today - timedelta(days=29)
+    previous_start = period_start - timedelta(days=30)
+
+    def day_start(day):
+        return timezone.make_aware(datetime.combine(day, time.min), tz)
+
     try:
-        # Estadísticas de productos
-        total_products = Product.objects.count()
-        low_stock_products = Product.objects.filter(stock__lt=10).count()
-        
-        # Estadísticas de órdenes
-        total_orders = Order.objects.count()
-        pending_orders = Order.objects.filter(status='pending').count()
-        today_orders = Order.objects.filter(created_at__date=today.date()).count()
-        
-        # Ventas
-        total_sales = Order.objects.filter(is_paid=True).aggregate(
-            total=Sum('total_price')
-        )['total'] or 0
-        
-        # Ventas de los últimos 30 días
-        recent_sales = Order.objects.filter(
-            created_at__gte=last_30_days,
-            is_paid=True
-        ).aggregate(total=Sum('total_price'))['total'] or 0
-        
-        # Ventas de hoy
-        today_sales = Order.objects.filter(
-            created_at__date=today.date(),
-            is_paid=True
-        ).aggregate(total=Sum('total_price'))['total'] or 0
-        
-        # Usuarios
-        total_users = CustomUser.objects.count()
-        new_users_today = CustomUser.objects.filter(
-            date_joined__date=today.date()
-        ).count()
-        
-        # Productos más vendidos (últimos 30 días)
-        top_products = OrderItem.objects.filter(
-            order__created_at__gte=last_30_days
-        ).values(
-            'product__name', 'product__image'
-        ).annotate(
-            total_sold=Sum('quantity'),
-            total_revenue=Sum('price')
-        ).order_by('-total_sold')[:5]
-        
-        # Ventas por día (últimos 7 días)
+        # Ventas y órdenes salen de los resúmenes (orders/rollups.py), no de Order
+        # Totales históricos y órdenes por estado: una fila por (estado, pagada)
+        totals = SalesRollup.objects.values('status', 'is_paid').annotate(
+            orders=Sum('orders'), amount=Sum('amount')
+        ).order_by()
+        orders_by_status = defaultdict(int)
+        total_sales = Decimal('0')
+        for row in totals:
+            orders_by_status[row['status']] += row['orders']
+            if row['is_paid']:
+                total_sales += row['amount']
+
+        # Últimos 60 días por día local: hoy, gráfico de 7 días y comparación de períodos
+        daily = SalesRollup.objects.filter(hour__gte=day_start(previous_start)).annotate(
+            day=TruncDate('hour', tzinfo=tz)
+        ).values('day', 'is_paid').annotate(
+            orders=Sum('orders'), amount=Sum('amount')
+        ).order_by()
+        orders_per_day = defaultdict(int)
+        sales_per_day = defaultdict(Decimal)
+        for row in daily:
+            orders_per_day[row['day']] += row['orders']
+            if row['is_paid']:
+                sales_per_day[row['day']] += row['amount']
+
+        def period_total(values, start, end):
+            return sum((value for day, value in values.items() if start <= day < end), 0)
+
+        tomorrow = today + timedelta(days=1)
+        recent_sales = period_total(sales_per_day, period_start, tomorrow)
+        previous_sales = period_total(sales_per_day, previous_start, period_start)
+        recent_orders = period_total(orders_per_day, period_start, tomorrow)
+        previous_orders = period_total(orders_per_day, previous_start, period_start)
+
+        # Ventas por día (últimos 7 días, del más viejo al más nuevo)
         sales_by_day = []
-        for i in range(7):
+        for i in range(6, -1, -1):
             day = today - timedelta(days=i)
-            day_sales = Order.objects.filter(
-                created_at__date=day.date(),
-                is_paid=True
-            ).aggregate(total=Sum('total_price'))['total'] or 0
             sales_by_day.append({
                 'date': day.strftime('%Y-%m-%d'),
                 'day_name': day.strftime('%a'),
-                'sales': float(day_sales)
+                'sales': float(sales_per_day[day])
             })
-        sales_by_day.reverse()
-        
-        # Órdenes por estado
-        orders_by_status = Order.objects.values('status').annotate(
-            count=Count('id')
+
+        # Productos más vendidos (últimos 30 días)
+        top_products = ProductSalesRollup.objects.filter(
+            day__gte=period_start
+        ).values(
+            'product__name', 'product__image'
+        ).annotate(
+            total_sold=Sum('units'),
+            total_revenue=Sum('revenue')
+        ).order_by('-total_sold')[:5]
+
+        # Productos y usuarios: una consulta cada uno
+        products = Product.objects.aggregate(
+            total=Count('id'),
+            low_stock=Count('id', filter=Q(stock__lt=10)),
+            recent=Count('id', filter=Q(created_at__gte=day_start(period_start))),
+            previous=Count('id', filter=Q(created_at__gte=day_start(previous_start), created_at__lt=day_start(period_start))),
         )
-        
+        users = CustomUser.objects.aggregate(
+            total=Count('id'),
+            recent=Count('id', filter=Q(date_joined__gte=day_start(period_start))),
+            previous=Count('id', filter=Q(date_joined__gte=day_start(previous_start), date_joined__lt=day_start(period_start))),
+        )
+
         stats = {
             # Tarjetas principales
             'cards': {
-                'today_sales': float(today_sales),
-                'total_products': total_products,
-                'pending_orders': pending_orders,
-                'low_stock_alerts': low_stock_products,
-                'total_users': total_users,
-                'today_orders': today_orders,
+                'today_sales': float(sales_per_day[today]),
+                'total_products': products['total'],
+                'pending_orders': orders_by_status['pending'],
+                'low_stock_alerts': products['low_stock'],
+                'total_users': users['total'],
+                'today_orders': orders_per_day[today],
                 'total_sales': float(total_sales),
                 'recent_sales': float(recent_sales),
             },
@@ -253,14 +359,17 @@ def admin_dashboard_stats(request):
             # Gráficos y listas
             'top_products': list(top_products),
             'sales_by_day': sales_by_day,
-            'orders_by_status': list(orders_by_status),
+            'orders_by_status': [
+                {'status': order_status, 'count': count}
+                for order_status, count in orders_by_status.items() if count
+            ],
             
-            # Cambios porcentuales (podrías calcular comparando con el período anterior)
+            # Últimos 30 días contra los 30 anteriores
             'changes': {
-                'sales_change': '+12%',  # Estos podrías calcularlos comparando períodos
-                'orders_change': '+8%',
-                'users_change': '+5%',
-                'products_change': '+3%'
+                'sales_change': _percent_change(recent_sales, previous_sales),
+                'orders_change': _percent_change(recent_orders, previous_orders),
+                'users_change': _percent_change(users['recent'], users['previous']),
+                'products_change': _percent_change(products['recent'], products['previous'])
             }
         }
         
@@ -271,4 +380,11 @@ def admin_dashboard_stats(request):
         return Response(
             {'error': 'Error al cargar las estadísticas'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+# Contadores del caché de estadísticas (para el monitoreo)
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def admin_stats_cache_metrics(request):
+    return Response(stats_cache_metrics())
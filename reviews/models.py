@@ -11,9 +11,13 @@ class Review(models.Model):
     rating = models.PositiveSmallIntegerField()  # 1 a 5
     comment = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ['product', 'user']  # 1 review por producto por usuario
+        indexes = [
+            models.Index(fields=['product', '-created_at'], name='review_product_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.rating} ⭐ by {self.user.username} on {self.product.name}"
@@ -1,3 +1,37 @@
-from django.test import TestCase
+from decimal import Decimal
+from itertools import count
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from products.models import Category, Product
+from utils.testing import assert_constant_queries
+from .models import Review
+
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+_sequence = count()
+
+
+@override_settings(CACHES=NO_CACHE)
+class ReviewQueryCountTests(TestCase):
+    def setUp(self):
+        categoria = Category.objects.create(name='Ropa')
+        self.product = Product.objects.create(
+            name='Polera', description='Algodón', price=Decimal('49.90'), stock=10, category=categoria,
+        )
+        self.client = APIClient()
+
+    def crear_reviews(self, n):
+        # Un usuario por reseña (una reseña por producto por usuario)
+        User = get_user_model()
+        for _ in range(n):
+            index = next(_sequence)
+            user = User.objects.create_user(username=f'cliente{index}', email=f'cliente{index}@example.com', password='x')
+            Review.objects.create(product=self.product, user=user, rating=1 + index % 5, comment='Muy buena')
+
+    def test_reviews_de_producto_sin_n_mas_1(self):
+        assert_constant_queries(
+            self, lambda: self.client.get(f'/api/reviews/product/{self.product.pk}/'), self.crear_reviews,
+        )
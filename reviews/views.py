@@ -5,6 +5,8 @@ from rest_framework import generics, permissions
 from .models import Review
 from .serializers import ReviewSerializer
 from rest_framework.exceptions import ValidationError
+from utils.conditional import ConditionalGetMixin
+from utils.prefetch import PrefetchPlannerMixin
 
 class ReviewCreateView(generics.CreateAPIView):
     serializer_class = ReviewSerializer
@@ -17,7 +19,7 @@ class ReviewCreateView(generics.CreateAPIView):
             raise ValidationError("Ya has dejado una review para este producto.")
         serializer.save(user=user)
 
-class ProductReviewListView(generics.ListAPIView):
+class ProductReviewListView(ConditionalGetMixin, PrefetchPlannerMixin, generics.ListAPIView):
     serializer_class = ReviewSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -7,6 +7,7 @@ from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
 from rest_framework import serializers
 from .models import CustomUser
+from utils.export import StreamingExportMixin
 
 User = get_user_model()
 
@@ -144,11 +145,15 @@ class CurrentUserView(APIView):
         return Response(serializer.data)
 
 # Vistas de administración
-class UserAdminListView(generics.ListAPIView):
+class UserAdminListView(StreamingExportMixin, generics.ListAPIView):
     queryset = CustomUser.objects.all().order_by('-date_joined')
     serializer_class = UserAdminSerializer
     permission_classes = [permissions.IsAdminUser]
     pagination_class = None
+    # Streaming sin tope: JSON por defecto, ?export=ndjson|csv
+    stream_by_default = True
+    export_capped = False
+    export_filename = 'usuarios'
 
 class UserAdminCreateView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
@@ -0,0 +1,86 @@
+# utils/conditional.py
+import hashlib
+from datetime import datetime
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified baratos para GET: 304 sin serializar nada
+
+    La versión sale de UNA consulta agregada sobre el mismo queryset de la
+    vista: Max() de cada campo de version_fields (pueden cruzar relaciones,
+    ej. 'category__updated_at') más Count('pk'), así que cambia al editar,
+    al agregar y al borrar filas.
+
+    - Listados: get_version_queryset() = queryset filtrado de la vista
+    - Detalles: el queryset filtrado por el pk de la URL (si no existe, no hay
+      validadores y la vista responde su 404 de siempre)
+
+    Si la respuesta depende de otra tabla que no se puede cruzar desde el
+    queryset, get_extra_versions() agrega valores a la versión.
+
+    Los campos de versión se actualizan con auto_now, por lo que un
+    queryset.update() debe setear updated_at a mano.
+    """
+    version_fields = ('updated_at',)
+
+    def is_detail(self):
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_version_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.is_detail():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_extra_versions(self):
+        """
+        Valores extra de la versión (las fechas cuentan también para Last-Modified)
+        """
+        return []
+
+    def get_validators(self, request):
+        aggregates = {f'max_{index}': Max(field) for index, field in enumerate(self.version_fields)}
+        version = self.get_version_queryset().select_related(None).prefetch_related(None).order_by().aggregate(count=Count('pk', distinct=True), **aggregates)
+        if not version['count'] and self.is_detail():
+            return None
+
+        extra = self.get_extra_versions()
+        modified = [value for key, value in version.items() if key.startswith('max_') and value is not None]
+        modified += [value for value in extra if isinstance(value, datetime)]
+        last_modified = int(max(modified).timestamp()) if modified else None
+        token = '|'.join(
+            [request.accepted_renderer.format, str(version['count'])]
+            + [value.isoformat() if value else '' for key, value in sorted(version.items()) if key.startswith('max_')]
+            + [value.isoformat() if isinstance(value, datetime) else str(value) for value in extra]
+        )
+        etag = 'W/"%s"' % hashlib.sha1(token.encode()).hexdigest()
+        return etag, last_modified
+
+    def _set_validators(self, response, validators):
+        etag, last_modified = validators
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def get(self, request, *args, **kwargs):
+        self._validators = self.get_validators(request)
+        if self._validators is not None:
+            etag, last_modified = self._validators
+            not_modified = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return self._set_validators(not_modified, self._validators)
+        return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators is not None and response.status_code == 200 and not response.streaming:
+            self._set_validators(response, validators)
+        return response
@@ -0,0 +1,122 @@
+# utils/export.py
+import csv
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def _encoder():
+    # Mismo formato compacto que el JSONRenderer de DRF (incluido el escape de U+2028/U+2029)
+    encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+    def encode(row):
+        return encoder.encode(row).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return encode
+
+
+def _json_chunks(rows):
+    encode = _encoder()
+    yield '['
+    for index, row in enumerate(rows):
+        yield (',' if index else '') + encode(row)
+    yield ']'
+
+
+def _ndjson_chunks(rows):
+    encode = _encoder()
+    for row in rows:
+        yield encode(row) + '\n'
+
+
+def _flatten(row, prefix=''):
+    # {'category': {'id': 1}} -> {'category.id': 1}; las listas van como JSON
+    flat = {}
+    for key, value in row.items():
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{prefix}{key}.'))
+        elif isinstance(value, list):
+            flat[f'{prefix}{key}'] = json.dumps(value, cls=JSONEncoder, ensure_ascii=False)
+        else:
+            flat[f'{prefix}{key}'] = value
+    return flat
+
+
+class _Echo:
+    # csv.writer escribe en un "archivo" que solo devuelve la línea
+    def write(self, value):
+        return value
+
+
+def _csv_chunks(rows):
+    writer = None
+    for row in rows:
+        row = _flatten(row)
+        if writer is None:
+            # Las columnas salen de la primera fila
+            writer = csv.DictWriter(_Echo(), fieldnames=list(row), extrasaction='ignore')
+            yield '\ufeff'  # BOM para que Excel detecte UTF-8
+            yield writer.writeheader()
+        yield writer.writerow(row)
+
+
+EXPORT_FORMATS = {
+    'json': (_json_chunks, 'application/json'),
+    'ndjson': (_ndjson_chunks, 'application/x-ndjson'),
+    'csv': (_csv_chunks, 'text/csv; charset=utf-8'),
+}
+
+
+class StreamingExportMixin:
+    """
+    Listado en streaming para un ListAPIView (JSON, NDJSON o CSV)
+
+    Las filas se leen con queryset.iterator() y se serializan una por una, así
+    que la memoria no crece con la tabla y el primer byte sale enseguida.
+
+    - ?no_paginate=true: arreglo JSON, cortado en settings.EXPORT_MAX_ROWS
+      salvo que la vista tenga export_capped = False
+    - ?export=json|ndjson|csv: mismo streaming en el formato pedido
+    - stream_by_default = True: las vistas sin paginación responden siempre
+      en streaming (mismo JSON que antes, sin armar la lista en memoria)
+    """
+    export_query_param = 'export'
+    export_chunk_size = 500
+    export_capped = True
+    export_filename = 'export'
+    stream_by_default = False
+
+    def get_export_format(self, request):
+        requested = request.query_params.get(self.export_query_param)
+        if requested in EXPORT_FORMATS:
+            return requested
+        if request.query_params.get('no_paginate') == 'true':
+            return 'json'
+        if self.stream_by_default:
+            # Si la vista pagina (ej. ?cursor=) se respeta la paginación
+            paginator = self.paginator
+            if paginator is None or (hasattr(paginator, 'is_active') and not paginator.is_active(request)):
+                return 'json'
+        return None
+
+    def iter_export_rows(self, queryset):
+        serializer_class = self.get_serializer_class()
+        context = self.get_serializer_context()
+        if self.export_capped:
+            queryset = queryset[:settings.EXPORT_MAX_ROWS]
+        # chunk_size hace que prefetch_related siga funcionando con iterator()
+        for obj in queryset.iterator(chunk_size=self.export_chunk_size):
+            yield serializer_class(obj, context=context).data
+
+    def list(self, request, *args, **kwargs):
+        export_format = self.get_export_format(request)
+        if export_format is None:
+            return super().list(request, *args, **kwargs)
+
+        chunks, content_type = EXPORT_FORMATS[export_format]
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(chunks(self.iter_export_rows(queryset)), content_type=content_type)
+        if export_format == 'csv':
+            response['Content-Disposition'] = f'attachment; filename="{self.export_filename}.csv"'
+        return response
@@ -0,0 +1,276 @@
+# utils/fast_serializers.py
+"""
+Serialización rápida para listados de solo lectura.
+
+FastSerializer toma un serializer DRF y lo "compila": por cada campo de
+lectura arma una columna de values() y una función de conversión con el
+mismo formato que el campo DRF (DecimalField -> '10.00', DateTimeField ->
+ISO en la zona horaria actual, ImageField -> URL absoluta, etc.). Así se
+arman dicts directo desde las filas, sin instanciar un serializer ni un
+modelo por fila, y la salida es idéntica byte a byte a la del serializer.
+
+Soporta: campos del modelo (también a través de FKs, ej. 'product.name'),
+PrimaryKeyRelatedField, serializers anidados por FK y serializers anidados
+many=True por FK inversa (una consulta extra por relación). Lo que no se
+puede leer de una columna (métodos como get_full_name) se declara en
+computed. Cualquier otro campo levanta ImproperlyConfigured al compilar.
+
+La equivalencia se verifica con: python manage.py benchmark_serializers
+"""
+import decimal
+from collections import defaultdict
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import fields as drf_fields
+from rest_framework import serializers
+from rest_framework.relations import PrimaryKeyRelatedField
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+def _decimal_converter(field):
+    coerce_to_string = getattr(field, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.normalize_output or field.localize:
+        raise ImproperlyConfigured(f'DecimalField {field.field_name}: formato no soportado')
+    if field.decimal_places is None:
+        quantize = lambda value: value  # noqa: E731
+    else:
+        quantum = decimal.Decimal('.1') ** field.decimal_places
+        context = decimal.getcontext().copy()
+        if field.max_digits is not None:
+            context.prec = field.max_digits
+        rounding = field.rounding
+
+        def quantize(value):
+            return value.quantize(quantum, rounding=rounding, context=context)
+
+    def convert(value, request):
+        if value is None:
+            return '' if coerce_to_string else None
+        if not isinstance(value, decimal.Decimal):
+            value = decimal.Decimal(str(value).strip())
+        value = quantize(value)
+        return '{:f}'.format(value) if coerce_to_string else value
+    return convert
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != drf_fields.ISO_8601 or not settings.USE_TZ:
+        raise ImproperlyConfigured(f'DateTimeField {field.field_name}: formato no soportado')
+    field_timezone = getattr(field, 'timezone', None)
+
+    def convert(value, request):
+        if not value:
+            return None
+        value = value.astimezone(field_timezone or timezone.get_current_timezone()).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return convert
+
+
+def _file_converter(field):
+    if not getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL):
+        return lambda value, request: value or None
+    storage = default_storage
+
+    def convert(value, request):
+        if not value:
+            return None
+        url = storage.url(value)
+        return request.build_absolute_uri(url) if request is not None else url
+    return convert
+
+
+def _choice_converter(field):
+    choices = dict(field.choice_strings_to_values)
+
+    def convert(value, request):
+        if value in ('', None):
+            return value
+        return choices.get(str(value), value)
+    return convert
+
+
+def _identity(value, request):
+    return value
+
+
+def _converter(field):
+    # El orden importa: EmailField es CharField, ImageField es FileField
+    if isinstance(field, drf_fields.DecimalField):
+        return _decimal_converter(field)
+    if isinstance(field, drf_fields.DateTimeField):
+        return _datetime_converter(field)
+    if isinstance(field, drf_fields.FileField):
+        return _file_converter(field)
+    if isinstance(field, drf_fields.ChoiceField):
+        return _choice_converter(field)
+    if isinstance(field, drf_fields.CharField):
+        return lambda value, request: None if value is None else str(value)
+    if isinstance(field, drf_fields.IntegerField):
+        return lambda value, request: None if value is None else int(value)
+    if isinstance(field, drf_fields.BooleanField):
+        return lambda value, request: None if value is None else bool(value)
+    if isinstance(field, (PrimaryKeyRelatedField, drf_fields.ReadOnlyField)):
+        return _identity
+    raise ImproperlyConfigured(f'Campo {field.field_name} ({type(field).__name__}) no soportado')
+
+
+class _Compiled:
+    def __init__(self, columns, builders, nested_many):
+        self.columns = columns
+        self.builders = builders        # [(clave, función(fila, request, hijos))]
+        self.nested_many = nested_many  # [(clave, FastSerializer hijo, columna fk en el hijo)]
+
+
+class FastSerializer:
+    """
+    Versión compilada (a dicts desde values()) de un serializer DRF
+
+    Args:
+        serializer_class: Serializer DRF de referencia
+        computed: {clave: (columnas, función(*valores))} para campos que no son columnas
+    """
+
+    def __init__(self, serializer_class, computed=None, prefix=''):
+        self.serializer_class = serializer_class
+        self.computed = computed or {}
+        self.prefix = prefix
+        self._compiled = None
+
+    @property
+    def compiled(self):
+        if self._compiled is None:
+            self._compiled = self._compile()
+        return self._compiled
+
+    @property
+    def columns(self):
+        return self.compiled.columns
+
+    def _compile(self):
+        serializer = self.serializer_class()
+        model = serializer.Meta.model
+        columns = [self.prefix + model._meta.pk.name]
+        builders = []
+        nested_many = []
+
+        for key, field in serializer.fields.items():
+            if field.write_only:
+                continue
+
+            if key in self.computed:
+                computed_columns, function = self.computed[key]
+                computed_columns = [self.prefix + column for column in computed_columns]
+                columns += computed_columns
+                builders.append((key, self._computed_builder(computed_columns, function)))
+                continue
+
+            source = field.source.replace('.', '__')
+            if isinstance(field, serializers.ListSerializer):
+                if self.prefix:
+                    raise ImproperlyConfigured(f'{key}: many=True dentro de un serializer anidado no soportado')
+                relation = model._meta.get_field(field.source)
+                child = FastSerializer(type(field.child))
+                nested_many.append((key, child, relation.field.attname))
+                builders.append((key, self._many_builder(key, columns[0])))
+                continue
+
+            if isinstance(field, serializers.BaseSerializer):
+                child = FastSerializer(type(field), prefix=f'{self.prefix}{source}__')
+                if child.compiled.nested_many:
+                    raise ImproperlyConfigured(f'{key}: many=True dentro de un serializer anidado no soportado')
+                columns += child.columns
+                builders.append((key, self._nested_builder(child)))
+                continue
+
+            column = self.prefix + source
+            columns.append(column)
+            builders.append((key, self._field_builder(column, _converter(field))))
+
+        return _Compiled(list(dict.fromkeys(columns)), builders, nested_many)
+
+    @staticmethod
+    def _field_builder(column, convert):
+        def build(row, request, many):
+            return convert(row[column], request)
+        return build
+
+    @staticmethod
+    def _computed_builder(columns, function):
+        def build(row, request, many):
+            return function(*[row[column] for column in columns])
+        return build
+
+    @staticmethod
+    def _many_builder(key, pk_column):
+        def build(row, request, many):
+            return many[key].get(row[pk_column], [])
+        return build
+
+    @staticmethod
+    def _nested_builder(child):
+        pk_column = child.columns[0]
+
+        def build(row, request, many):
+            # FK nula -> None, igual que el serializer anidado
+            if row[pk_column] is None:
+                return None
+            return child.build(row, request, many)
+        return build
+
+    def build(self, row, request, many=None):
+        return {key: build(row, request, many) for key, build in self.compiled.builders}
+
+    def values(self, queryset):
+        """
+        El queryset de la vista convertido a filas con las columnas necesarias
+        """
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def serialize(self, rows, request=None):
+        """
+        Lista de dicts idéntica a serializer_class(objetos, many=True).data
+        """
+        rows = list(rows)
+        pk_column = self.columns[0]
+        many = {}
+        for key, child, fk_column in self.compiled.nested_many:
+            # Una consulta por relación many=True, repartida por la FK al padre
+            groups = defaultdict(list)
+            parent_ids = [row[pk_column] for row in rows]
+            if parent_ids:
+                related_model = child.serializer_class.Meta.model
+                queryset = related_model._default_manager.filter(
+                    **{f'{fk_column}__in': parent_ids}
+                ).order_by(*(related_model._meta.ordering or ['pk']))
+                for child_row in queryset.values(*dict.fromkeys(child.columns + [fk_column])):
+                    groups[child_row[fk_column]].append(child.build(child_row, request))
+            many[key] = groups
+
+        return [self.build(row, request, many) for row in rows]
+
+
+class FastListMixin:
+    """
+    Listados con FastSerializer en vez del serializer DRF (se apaga con FAST_SERIALIZERS = False)
+    """
+    fast_serializer = None
+
+    def list(self, request, *args, **kwargs):
+        if self.fast_serializer is None or not settings.FAST_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.fast_serializer.values(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        rows = page if page is not None else queryset
+        data = self.fast_serializer.serialize(rows, request)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
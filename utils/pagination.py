@@ -1,15 +1,135 @@
 # utils/pagination.py
-from rest_framework.pagination import PageNumberPagination
+import base64
+from urllib.parse import urlencode
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
 
+
+def estimate_count(queryset):
+    """
+    Cantidad aproximada de filas según el planificador de PostgreSQL (sin COUNT(*))
+
+    En otras bases hace el COUNT normal.
+    """
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por cursor sobre (created_at, id), de más nuevo a más viejo
+
+    Se activa enviando ?cursor= (vacío para la primera página). Cada página
+    es un WHERE (created_at, id) < (último visto) con LIMIT, así que cuesta
+    lo mismo en la página 1 que en la 10.000. El total es opcional:
+    ?count=exact (COUNT(*)) o ?count=estimate (estimación del planificador).
+    Sin ?cursor= no pagina.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 10
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering_field = 'created_at'
+
+    def is_active(self, request):
+        return self.cursor_query_param in request.query_params
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def encode_cursor(self, obj):
+        # obj puede ser un modelo o una fila de values() (utils/fast_serializers.py)
+        if isinstance(obj, dict):
+            value, pk = obj[self.ordering_field], obj['id']
+        else:
+            value, pk = getattr(obj, self.ordering_field), obj.pk
+        return base64.urlsafe_b64encode(f'{value.isoformat()}|{pk}'.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            value, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            created_at = parse_datetime(value)
+            pk = int(pk)
+        except (ValueError, UnicodeDecodeError):
+            created_at = None
+        # Un id fuera de rango (cursor adulterado) desbordaría el bigint de la consulta
+        if created_at is None or not 0 < pk < 2 ** 63:
+            raise NotFound('Cursor inválido')
+        return created_at, pk
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_active(request):
+            return None
+
+        self.request = request
+        self.count = None
+        count_mode = request.query_params.get('count')
+        if count_mode == 'exact':
+            self.count = queryset.count()
+        elif count_mode == 'estimate':
+            self.count = estimate_count(queryset)
+
+        # El cursor reemplaza cualquier otro orden (ej. relevancia de la búsqueda)
+        field = self.ordering_field
+        queryset = queryset.order_by(f'-{field}', '-pk')
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            created_at, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{field}__lt': created_at}) | Q(**{field: created_at, 'pk__lt': pk})
+            )
+
+        page_size = self.get_page_size(request)
+        # Una fila de más para saber si hay página siguiente sin contar
+        results = list(queryset[:page_size + 1])
+        self.has_next = len(results) > page_size
+        self.page = results[:page_size]
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        params = self.request.query_params.copy()
+        params[self.cursor_query_param] = self.encode_cursor(self.page[-1])
+        return self.request.build_absolute_uri(f'{self.request.path}?{urlencode(params, doseq=True)}')
+
+    def get_paginated_response(self, data):
+        response = {'next': self.get_next_link(), 'results': data}
+        if self.count is not None:
+            response = {'count': self.count, **response}
+        return Response(response)
+
+
 class OptionalPagination(PageNumberPagination):
     page_size = 10  # Tamaño por defecto
     page_size_query_param = 'page_size'
 
+    # Con ?cursor= se usa paginación por cursor (recomendada para scroll infinito);
+    # ?no_paginate=true lo resuelve StreamingExportMixin como exportación con tope
     def paginate_queryset(self, queryset, request, view=None):
-        if request.query_params.get('no_paginate') == 'true':
-            return None  # Sin paginación
+        keyset = KeysetPagination()
+        if keyset.is_active(request):
+            self.keyset = keyset
+            return keyset.paginate_queryset(queryset, request, view)
+        self.keyset = None
         return super().paginate_queryset(queryset, request, view)
 
     def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
         return super().get_paginated_response(data)
@@ -0,0 +1,166 @@
+# utils/prefetch.py
+"""
+Planificador de select_related / prefetch_related / only() a partir de un serializer.
+
+Recorre los campos de lectura del serializer y, por cada relación que se
+toca, decide cómo traerla:
+
+- FK / OneToOne (serializer anidado, source con punto o StringRelatedField):
+  select_related
+- FK inversa / ManyToMany (serializer anidado con many=True): Prefetch con un
+  queryset planificado igual, recursivamente
+- only(): solo las columnas que el serializer lee. Si algo necesita el objeto
+  completo (SerializerMethodField, source='*', un método o propiedad como
+  get_full_name, __str__ de StringRelatedField) ese modelo se trae entero
+
+Así la cantidad de consultas de un listado no depende de cuántas filas tiene.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+ALL = None  # el modelo se necesita completo
+
+
+class _Plan:
+    def __init__(self, model):
+        self.select = set()
+        self.prefetch = {}
+        # prefijo de select_related ('' = modelo raíz) -> (modelo, campos o ALL)
+        self.levels = {'': (model, set())}
+
+    def level(self, prefix, model):
+        if prefix not in self.levels:
+            self.levels[prefix] = (model, set())
+        return self.levels[prefix][1]
+
+    def need(self, prefix, model, name):
+        fields = self.level(prefix, model)
+        if fields is not ALL:
+            fields.add(name)
+
+    def need_all(self, prefix, model):
+        self.level(prefix, model)
+        self.levels[prefix] = (model, ALL)
+
+    def only_fields(self):
+        only = []
+        for prefix, (model, fields) in self.levels.items():
+            if fields is ALL:
+                # Todo menos lo que el manager ya difiere (ej. Product.search_vector)
+                deferred, is_defer = model._default_manager.all().query.deferred_loading
+                fields = {
+                    field.name for field in model._meta.concrete_fields
+                    if not (is_defer and field.name in deferred)
+                }
+            fields = set(fields) | {model._meta.pk.name}
+            only += [f'{prefix}__{name}' if prefix else name for name in sorted(fields)]
+        return only
+
+
+def _join(prefix, name):
+    return f'{prefix}__{name}' if prefix else name
+
+
+def _readable_fields(serializer):
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    return serializer, [field for field in serializer.fields.values() if not field.write_only]
+
+
+def _walk(plan, serializer, model, prefix):
+    serializer, fields = _readable_fields(serializer)
+    for field in fields:
+        if isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            plan.need_all(prefix, model)
+            continue
+        _follow(plan, field, model, prefix, field.source.split('.'))
+
+
+def _follow(plan, field, model, prefix, attrs):
+    name, rest = attrs[0], attrs[1:]
+    try:
+        model_field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        # Propiedad o método del modelo: puede leer cualquier columna
+        plan.need_all(prefix, model)
+        return
+
+    if not model_field.is_relation:
+        plan.need(prefix, model, name)
+        return
+
+    path = _join(prefix, name)
+    related_model = model_field.related_model
+
+    if model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+        plan.need(prefix, model, name)
+        if not rest and isinstance(field, serializers.PrimaryKeyRelatedField):
+            # Solo usa la columna *_id, no hace falta el join
+            return
+        plan.select.add(path)
+        if rest:
+            _follow(plan, field, related_model, path, rest)
+        elif isinstance(field, serializers.BaseSerializer):
+            _walk(plan, field, related_model, path)
+        else:
+            # StringRelatedField y similares usan __str__
+            plan.need_all(path, related_model)
+        return
+
+    # FK inversa, OneToOne inverso o ManyToMany: consulta aparte con su propio plan
+    related_queryset = related_model._default_manager.all()
+    if not related_model._meta.ordering:
+        # Orden estable de los hijos (el mismo que usa utils/fast_serializers.py)
+        related_queryset = related_queryset.order_by('pk')
+    if isinstance(field, serializers.BaseSerializer) and not rest:
+        related_queryset = plan_queryset(related_queryset, field, keep=_remote_field_name(model_field))
+    plan.prefetch[path] = Prefetch(path, queryset=related_queryset)
+
+
+def _remote_field_name(model_field):
+    # La FK que apunta al modelo padre, necesaria para repartir los resultados del prefetch
+    remote = getattr(model_field, 'field', None)
+    return remote.name if remote is not None and remote.many_to_one else None
+
+
+def plan_queryset(queryset, serializer, keep=None):
+    """
+    Aplica select_related, prefetch_related y only() según el serializer
+
+    Args:
+        queryset: Queryset del modelo que serializa el serializer
+        serializer: Clase o instancia de serializer (many=True también sirve)
+        keep: Campo extra que only() debe conservar (lo usan los Prefetch anidados)
+
+    Returns:
+        El queryset con el plan aplicado
+    """
+    if isinstance(serializer, type):
+        serializer = serializer()
+
+    plan = _Plan(queryset.model)
+    _walk(plan, serializer, queryset.model, '')
+    if keep:
+        plan.need('', queryset.model, keep)
+
+    if plan.select:
+        queryset = queryset.select_related(*sorted(plan.select))
+    if plan.prefetch:
+        queryset = queryset.prefetch_related(*[plan.prefetch[path] for path in sorted(plan.prefetch)])
+    return queryset.only(*plan.only_fields())
+
+
+class PrefetchPlannerMixin:
+    """
+    Para vistas genéricas: planifica el queryset con el serializer de la vista
+
+    Se aplica en filter_queryset() para que funcione también con vistas que
+    sobrescriben get_queryset(). No se deben repetir a mano los
+    select_related / prefetch_related que ya resuelve el plan.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return plan_queryset(queryset, self.get_serializer_class())
@@ -0,0 +1,141 @@
+# utils/response_cache.py
+"""
+Caché de respuestas ya renderizadas para vistas públicas de solo lectura.
+
+Cada entrada se guarda bajo una clave armada con la ruta, los query params
+normalizados, el host (las imágenes salen con URL absoluta) y el formato, más
+la versión de los "namespaces" de los que depende ('products',
+'product:12', ...). Invalidar es cambiar la versión de un namespace: las
+entradas viejas quedan huérfanas y expiran solas con el TTL.
+
+Las versiones son marcas de tiempo, así que sirven también de Last-Modified.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+from .conditional import ConditionalGetMixin
+
+
+# Cabeceras de la respuesta original que se guardan junto al contenido
+CACHED_HEADERS = ('Content-Type', 'Vary', 'Allow')
+
+
+def _cache():
+    return caches[settings.RESPONSE_CACHE_ALIAS]
+
+
+def _version_key(namespace):
+    return f'rc:ns:{namespace}'
+
+
+def namespace_versions(namespaces):
+    """
+    Versión actual de cada namespace (se crea si no existe)
+    """
+    cache = _cache()
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    versions = cache.get_many(list(keys))
+    for key in keys:
+        if key not in versions:
+            now = time.time_ns()
+            # add() para no pisar una versión que otro proceso creó recién
+            cache.add(key, now, None)
+            versions[key] = cache.get(key, now)
+    return [versions[key] for key in keys]
+
+
+def invalidate(*namespaces):
+    """
+    Invalida todas las respuestas que dependen de alguno de los namespaces
+    """
+    now = time.time_ns()
+    _cache().set_many({_version_key(namespace): now for namespace in namespaces}, None)
+
+
+def _normalized_query(request):
+    # Orden fijo: ?b=2&a=1 y ?a=1&b=2 son la misma entrada. Los parámetros vacíos
+    # se conservan: ?cursor= activa la paginación por cursor (otra forma de respuesta)
+    items = sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+    return urlencode(items)
+
+
+class CachedResponseMixin:
+    """
+    Sirve GET desde el caché y responde 304 con ETag / Last-Modified
+
+    Las vistas definen get_cache_namespaces() con los namespaces de los que
+    depende su respuesta; las señales de products/signals.py los invalidan.
+    """
+    cache_timeout = None  # None = settings.RESPONSE_CACHE_TIMEOUT
+
+    def get_cache_namespaces(self):
+        raise NotImplementedError
+
+    def get_cache_key(self, request, versions):
+        parts = [
+            request.path,
+            _normalized_query(request),
+            request.get_host(),
+            request.scheme,
+            request.accepted_renderer.format,
+            *map(str, versions),
+        ]
+        return 'rc:response:' + hashlib.sha1('|'.join(parts).encode()).hexdigest()
+
+    def _conditional(self, request, content, headers, last_modified):
+        # Si la vista ya calcula sus propios validadores (ConditionalGetMixin) se usan esos
+        own_validators = not isinstance(self, ConditionalGetMixin)
+        etag = '"%s"' % hashlib.sha1(content).hexdigest()
+        response = None
+        if own_validators:
+            response = get_conditional_response(request._request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = HttpResponse(content)
+        for header, value in headers.items():
+            response[header] = value
+        if own_validators:
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified)
+        response['X-Cache'] = self._cache_status
+        return response
+
+    def get(self, request, *args, **kwargs):
+        versions = namespace_versions(self.get_cache_namespaces())
+        self._cache_key = self.get_cache_key(request, versions)
+        self._last_modified = max(versions) // 1_000_000_000
+
+        entry = _cache().get(self._cache_key)
+        if entry is not None:
+            self._cache_status = 'HIT'
+            content, headers = entry
+            return self._conditional(request, content, headers, self._last_modified)
+
+        self._cache_status = 'MISS'
+        return super().get(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        # Solo se guardan respuestas 200 de DRF (no errores ni exportaciones en streaming)
+        if getattr(self, '_cache_key', None) is None or not isinstance(response, Response):
+            return response
+        if response.status_code != 200:
+            return response
+
+        response.render()
+        headers = {header: response[header] for header in CACHED_HEADERS if response.has_header(header)}
+        timeout = self.cache_timeout if self.cache_timeout is not None else settings.RESPONSE_CACHE_TIMEOUT
+        _cache().set(self._cache_key, (response.content, headers), timeout)
+        self._cache_key = None
+        return self._conditional(request, response.content, headers, self._last_modified)
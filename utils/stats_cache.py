@@ -0,0 +1,161 @@
+# utils/stats_cache.py
+"""
+Caché corto para vistas de estadísticas caras (dashboard, order_stats).
+
+Cada pestaña de admin abierta consulta estas vistas cada pocos segundos; con
+@cached_stats el cálculo se hace como mucho una vez por TTL:
+
+- HIT: durante ttl segundos se sirve el resultado guardado.
+- STALE: pasado el TTL y hasta ttl + stale_ttl se sirve el resultado viejo
+  y se recalcula en un hilo aparte (stale-while-revalidate).
+- MISS: sin resultado, una sola petición calcula; las que llegan mientras
+  tanto esperan ese resultado (COALESCED) en vez de recalcular. El candado
+  es un cache.add(), así que con un caché compartido (Redis) coordina
+  también entre procesos.
+
+Los contadores de cada vista se guardan en el mismo caché y se leen con
+stats_cache_metrics().
+
+Va debajo de @api_view / @permission_classes, así la autenticación y los
+permisos se revisan en cada petición. El resultado no depende del usuario:
+usar solo en vistas de admin con datos globales.
+"""
+import functools
+import hashlib
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from rest_framework.response import Response
+
+from .response_cache import _normalized_query
+
+METRICS = ('hits', 'stale', 'coalesced', 'misses')
+# Valor de X-Cache -> contador
+_STATUS_METRICS = {'HIT': 'hits', 'STALE': 'stale', 'COALESCED': 'coalesced'}
+
+# Nombres de las vistas decoradas (para listar sus contadores)
+_registry = set()
+
+
+def _cache():
+    return caches[settings.STATS_CACHE_ALIAS]
+
+
+def _metric_key(name, metric):
+    return f'sc:metrics:{name}:{metric}'
+
+
+def _count(name, metric):
+    cache = _cache()
+    key = _metric_key(name, metric)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Primer conteo: add() no pisa el contador si otro proceso lo creó recién
+        cache.add(key, 0, None)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Caché que no guarda valores (DummyCache): los contadores son opcionales
+            pass
+
+
+def stats_cache_metrics():
+    """
+    Contadores por vista: {nombre: {hits, stale, coalesced, misses, hit_ratio}}
+    """
+    names = sorted(_registry)
+    keys = {_metric_key(name, metric): (name, metric) for name in names for metric in METRICS}
+    values = _cache().get_many(list(keys))
+
+    metrics = {name: dict.fromkeys(METRICS, 0) for name in names}
+    for key, (name, metric) in keys.items():
+        metrics[name][metric] = values.get(key, 0)
+    for counters in metrics.values():
+        total = sum(counters[metric] for metric in METRICS)
+        served_from_cache = total - counters['misses']
+        counters['hit_ratio'] = round(served_from_cache / total, 4) if total else None
+    return metrics
+
+
+def _refresh(compute, lock_key):
+    try:
+        compute()
+    except Exception as e:
+        print(f"Error recalculando estadísticas en segundo plano: {e}")
+    finally:
+        _cache().delete(lock_key)
+        # El hilo abrió sus propias conexiones a la base
+        connections.close_all()
+
+
+def cached_stats(name, ttl=None, stale_ttl=None, wait=10):
+    """
+    Decorador de vistas de estadísticas con TTL, single-flight y stale-while-revalidate
+
+    Args:
+        name: Nombre de la vista en las claves y en los contadores
+        ttl: Segundos en que el resultado se sirve sin recalcular (settings.STATS_CACHE_TTL)
+        stale_ttl: Segundos extra en que se sirve viejo mientras se recalcula (settings.STATS_CACHE_STALE_TTL)
+        wait: Segundos máximos esperando el cálculo de otra petición
+    """
+    def decorator(view):
+        _registry.add(name)
+
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            cache = _cache()
+            fresh_for = ttl if ttl is not None else settings.STATS_CACHE_TTL
+            stale_for = stale_ttl if stale_ttl is not None else settings.STATS_CACHE_STALE_TTL
+            key = f'sc:{name}:' + hashlib.sha1(_normalized_query(request).encode()).hexdigest()
+            lock_key = f'{key}:lock'
+
+            def compute():
+                response = view(request, *args, **kwargs)
+                # Los errores no se guardan
+                if response.status_code == 200:
+                    cache.set(key, (time.time(), response.data), fresh_for + stale_for)
+                return response
+
+            def cached(data, status):
+                _count(name, _STATUS_METRICS[status])
+                response = Response(data)
+                response['X-Cache'] = status
+                return response
+
+            entry = cache.get(key)
+            if entry is not None:
+                computed_at, data = entry
+                if time.time() - computed_at < fresh_for:
+                    return cached(data, 'HIT')
+                # Viejo: se sirve igual y un solo hilo lo recalcula
+                if cache.add(lock_key, 1, wait):
+                    threading.Thread(target=_refresh, args=(compute, lock_key), daemon=True).start()
+                return cached(data, 'STALE')
+
+            owner = cache.add(lock_key, 1, wait)
+            if not owner:
+                # Otra petición está calculando: esperar su resultado
+                deadline = time.monotonic() + wait
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    entry = cache.get(key)
+                    if entry is not None:
+                        return cached(entry[1], 'COALESCED')
+                    if cache.get(lock_key) is None:
+                        break  # Terminó sin guardar (error): calcular acá
+
+            _count(name, 'misses')
+            try:
+                response = compute()
+            finally:
+                if owner:
+                    cache.delete(lock_key)
+            response['X-Cache'] = 'MISS'
+            return response
+
+        return wrapper
+    return decorator
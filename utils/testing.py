@@ -0,0 +1,56 @@
+# utils/testing.py
+"""
+Ayudas para tests: cantidad de consultas por endpoint.
+
+Ejemplo (en un tests.py):
+
+    def test_order_list_sin_n_mas_1(self):
+        def crear(n):
+            for _ in range(n):
+                crear_orden_con_items(self.user, items=3)
+
+        assert_constant_queries(self, lambda: self.client.get('/api/orders/'), crear)
+"""
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+
+
+def count_queries(request, using=DEFAULT_DB_ALIAS):
+    """
+    Ejecuta request() y devuelve (respuesta, consultas capturadas)
+    """
+    with CaptureQueriesContext(connections[using]) as context:
+        response = request()
+        # Las respuestas en streaming consultan mientras se consumen
+        if getattr(response, 'streaming', False):
+            b''.join(response.streaming_content)
+    return response, context.captured_queries
+
+
+def assert_constant_queries(testcase, request, grow, sizes=(1, 10), expected=None, using=DEFAULT_DB_ALIAS):
+    """
+    Falla si la cantidad de consultas de request() cambia con la cantidad de filas
+
+    Args:
+        testcase: TestCase (para los mensajes de error)
+        request: Función sin argumentos que hace la petición
+        grow: Función grow(n) que agrega n filas antes de cada medición
+        sizes: Cantidades de filas a agregar en cada medición
+        expected: Cantidad exacta esperada (opcional)
+    """
+    counts = []
+    for size in sizes:
+        grow(size)
+        response, queries = count_queries(request, using)
+        testcase.assertLess(response.status_code, 400, f'Respuesta {response.status_code}')
+        counts.append((size, len(queries), queries))
+
+    first_count = counts[0][1]
+    for size, count, queries in counts[1:]:
+        if count != first_count:
+            sql = '\n'.join(query['sql'] for query in queries)
+            testcase.fail(
+                f'N+1: {first_count} consultas con +{sizes[0]} filas y {count} con +{size} filas\n{sql}'
+            )
+    if expected is not None:
+        testcase.assertEqual(first_count, expected, f'Se esperaban {expected} consultas')